@@ -0,0 +1,319 @@
+"""
+Precomputed dashboard analytics: salary bounds and per-user snapshots
+
+GET /api/analytics reads one analytics_snapshots row by primary key, so it
+costs the same whatever the account size. A refresh job writes the rows
+(`flask --app app refresh-analytics`, from cron or with --loop):
+
+1. salary_range is free text. Rows changed since the last run have it parsed
+   once into annual bounds, applications.salary_min and salary_max.
+2. Every user with a row changed or deleted since then gets their snapshot
+   recomputed from their applications, in batches committed one at a time.
+3. The watermark moves to the start of the run only once both steps have
+   finished, so an interrupted run is simply redone.
+
+Changed rows are found through ix_applications_updated_user, with the same
+overlap as delta sync for transactions that commit late. The snapshots are a
+plain table on PostgreSQL too: a materialized view can only be refreshed as
+a whole, which would recompute every user on every run.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, case, func, select, update
+from models import db, AnalyticsSnapshot, Application, ApplicationTombstone, JobWatermark
+from queries import SYNC_OVERLAP
+from stats import period_expression
+import re
+import statistics
+
+WATERMARK = 'analytics'
+DEFAULT_BATCH_SIZE = 500
+# Breakdown sizes, which keep every snapshot small
+TOP_LOCATIONS = 10
+TOP_COMPANIES = 10
+WEEKS = 26
+# Salary bands are SALARY_BAND wide; the last one is open-ended (200k+)
+SALARY_BAND = 20000
+SALARY_BANDS = 10
+
+# Multipliers from an amount per period to an annual one (40h weeks, 260 days)
+PERIOD_FACTORS = {
+    'hour': 2080, 'hr': 2080, 'hourly': 2080,
+    'day': 260, 'daily': 260,
+    'week': 52, 'wk': 52, 'weekly': 52,
+    'month': 12, 'mo': 12, 'monthly': 12,
+    'year': 1, 'yr': 1, 'annum': 1, 'annual': 1, 'annually': 1, 'yearly': 1,
+}
+SUFFIXES = {'k': 1000, 'thousand': 1000, 'm': 1000000, 'mil': 1000000, 'million': 1000000}
+_PERIOD = re.compile(r'\b(' + '|'.join(sorted(PERIOD_FACTORS, key=len, reverse=True)) + r')s?\b')
+_AMOUNT = re.compile(r'(\d+(?:[.,]\d+)*)\s*(' + '|'.join(sorted(SUFFIXES, key=len, reverse=True)) + r')?\b')
+_UPPER_ONLY = re.compile(r'\b(?:up to|max(?:imum)?)\b|<')
+_LOWER_ONLY = re.compile(r'\b(?:from|min(?:imum)?|at least)\b|\+|>')
+# Annual amounts outside this range are misparses, not salaries
+PLAUSIBLE = (1000, 10000000)
+
+
+def _number(text):
+    """Parse "80,000", "80.000", "80.5" or "80,5" into a float"""
+    if re.fullmatch(r'\d{1,3}([.,])\d{3}(\1\d{3})*', text):
+        return float(re.sub(r'[.,]', '', text))
+    return float(text.replace(',', '.'))
+
+
+def parse_salary_range(text):
+    """Parse a free-text salary into (annual_min, annual_max)
+
+    Understands ranges and single amounts with k/m suffixes ("$80k-100k",
+    "80,000 - 95,000", "120k+", "up to 90k") and per-period amounts ("$45/hr",
+    "5,000 per month"). A bound the text leaves open is None; (None, None)
+    means it could not be parsed. Amounts are taken as written, without
+    currency conversion, and a bare number under 1000 is too ambiguous to use.
+    """
+    if not text:
+        return None, None
+    text = text.lower()
+    amounts = []
+    for match in _AMOUNT.finditer(text):
+        amounts.append((_number(match.group(1)), SUFFIXES.get(match.group(2), 1)))
+        if len(amounts) == 2:
+            break
+    if not amounts:
+        return None, None
+    # "80-100k": the suffix of the second amount applies to the first
+    if len(amounts) == 2 and amounts[0][1] == 1 and amounts[1][1] > 1 and amounts[0][0] < 1000:
+        amounts[0] = (amounts[0][0], amounts[1][1])
+
+    period = _PERIOD.search(text)
+    factor = PERIOD_FACTORS[period.group(1)] if period else 1
+    if factor == 1 and all(multiplier == 1 and value < 1000 for value, multiplier in amounts):
+        return None, None
+    values = sorted(round(value * multiplier * factor) for value, multiplier in amounts)
+    if not all(PLAUSIBLE[0] <= value <= PLAUSIBLE[1] for value in values):
+        return None, None
+
+    if len(values) == 2:
+        return values[0], values[1]
+    if _UPPER_ONLY.search(text):
+        return None, values[0]
+    if _LOWER_ONLY.search(text):
+        return values[0], None
+    return values[0], values[0]
+
+
+def salary_band(low, high):
+    """Index of the band holding the midpoint of the known bounds"""
+    known = [value for value in (low, high) if value is not None]
+    midpoint = sum(known) / len(known)
+    return min(int(midpoint // SALARY_BAND), SALARY_BANDS)
+
+
+def band_label(index):
+    low = index * SALARY_BAND // 1000
+    if index == SALARY_BANDS:
+        return f"{low}k+"
+    return f"{low}k-{low + SALARY_BAND // 1000}k"
+
+
+def _salary_batches(session, since, batch_size):
+    """Yield (id, salary_range, salary_min, salary_max) rows in batches of batch_size
+
+    A full pass walks the primary key; an incremental one collects the changed
+    ids from ix_applications_updated_user first.
+    """
+    A = Application
+    columns = (A.id, A.salary_range, A.salary_min, A.salary_max)
+    if since is None:
+        last_id = 0
+        while True:
+            rows = session.execute(select(*columns).where(A.id > last_id).order_by(A.id).limit(batch_size)).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+    ids = sorted(session.scalars(select(A.id).where(A.updated_at >= since)))
+    for start in range(0, len(ids), batch_size):
+        yield session.execute(select(*columns).where(A.id.in_(ids[start:start + batch_size]))).all()
+
+
+def normalize_salaries(session, since, batch_size=DEFAULT_BATCH_SIZE):
+    """Parse salary_range on rows updated at or after `since` (None: all rows)
+
+    Commits each batch. updated_at is written back unchanged, so parsing is
+    not itself a change. Returns how many rows' bounds changed.
+    """
+    table = Application.__table__
+    write = update(table).where(table.c.id == bindparam('row_id')).values(
+        salary_min=bindparam('low'), salary_max=bindparam('high'), updated_at=table.c.updated_at
+    )
+    changed = 0
+    for rows in _salary_batches(session, since, batch_size):
+        updates = []
+        for row in rows:
+            low, high = parse_salary_range(row.salary_range)
+            if (low, high) != (row.salary_min, row.salary_max):
+                updates.append({'row_id': row.id, 'low': low, 'high': high})
+        if updates:
+            session.connection().execute(write, updates)
+            changed += len(updates)
+        session.commit()
+    return changed
+
+
+def changed_users(session, since):
+    """Users with applications changed or deleted at or after `since` (None: every user)"""
+    A = Application
+    if since is None:
+        users = session.scalars(select(A.user_id).distinct()).all()
+        # Users whose applications have all been deleted still need an update
+        return set(users) | set(session.scalars(select(AnalyticsSnapshot.user_id)))
+    deleted = session.scalars(
+        select(ApplicationTombstone.user_id).where(ApplicationTombstone.deleted_at >= since).distinct()
+    ).all()
+    changed = session.scalars(select(A.user_id).where(A.updated_at >= since).distinct()).all()
+    return set(deleted) | set(changed)
+
+
+def _rate(responses, applications):
+    return round(responses / applications * 100, 1) if applications else 0
+
+
+def _breakdown(session, user_id, column, limit):
+    """The user's top `limit` values of a text column, case- and space-insensitive"""
+    A = Application
+    key = func.lower(func.trim(column))
+    count = func.count(A.id)
+    responses = func.sum(case((A.status != 'Applied', 1), else_=0))
+    rows = session.query(func.min(func.trim(column)), count, responses) \
+        .filter(A.user_id == user_id, column.isnot(None), func.trim(column) != '') \
+        .group_by(key) \
+        .order_by(count.desc(), key) \
+        .limit(limit) \
+        .all()
+    return [
+        {'name': name, 'applications': n, 'responses': int(resp or 0), 'response_rate': _rate(int(resp or 0), n)}
+        for name, n, resp in rows
+    ]
+
+
+def window_start(today=None):
+    """The Monday that starts the WEEKS-week window ending in `today`'s week (UTC)"""
+    today = today or datetime.utcnow().date()
+    return today - timedelta(days=today.weekday(), weeks=WEEKS - 1)
+
+
+def _weekly(session, user_id, today=None):
+    """Applications and responses per week, for the WEEKS weeks up to `today`
+
+    Snapshots of inactive users are not recomputed, so read_snapshot cuts the
+    window again when a snapshot is read; a stored snapshot never holds more
+    than WEEKS weeks.
+    """
+    A = Application
+    week = period_expression('week', session.get_bind().dialect.name).label('week')
+    responses = func.sum(case((A.status != 'Applied', 1), else_=0))
+    rows = session.query(week, func.count(A.id), responses) \
+        .filter(A.user_id == user_id, A.date_applied >= window_start(today)) \
+        .group_by(week) \
+        .order_by(week) \
+        .all()
+    return [{'week': str(w), 'applications': n, 'responses': int(resp or 0)} for w, n, resp in rows]
+
+
+def _salaries(session, user_id):
+    """Distribution of the parsed salary bounds over SALARY_BAND-wide bands"""
+    A = Application
+    rows = session.query(A.salary_min, A.salary_max, A.status) \
+        .filter(A.user_id == user_id, A.salary_range.isnot(None), A.salary_range != '') \
+        .all()
+    bands = {}
+    midpoints = []
+    unparsed = 0
+    for low, high, status in rows:
+        if low is None and high is None:
+            unparsed += 1
+            continue
+        band = bands.setdefault(salary_band(low, high), [0, 0])
+        band[0] += 1
+        band[1] += status != 'Applied'
+        known = [value for value in (low, high) if value is not None]
+        midpoints.append(sum(known) / len(known))
+    return {
+        'parsed': len(midpoints),
+        'unparsed': unparsed,
+        'median': round(statistics.median(midpoints)) if midpoints else None,
+        'bands': [
+            {'band': band_label(index), 'min': index * SALARY_BAND, 'applications': n,
+             'responses': resp, 'response_rate': _rate(resp, n)}
+            for index, (n, resp) in sorted(bands.items())
+        ]
+    }
+
+
+def compute_snapshot(session, user_id, today=None):
+    """Build a user's analytics payload from their applications"""
+    return {
+        'weekly': _weekly(session, user_id, today),
+        'by_location': _breakdown(session, user_id, Application.location, TOP_LOCATIONS),
+        'by_company': _breakdown(session, user_id, Application.company, TOP_COMPANIES),
+        'salary': _salaries(session, user_id),
+    }
+
+
+def write_snapshots(session, snapshots, refreshed_at):
+    """Upsert {user_id: payload} with one INSERT; the caller commits"""
+    if not snapshots:
+        return
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(AnalyticsSnapshot).values([
+        {'user_id': user_id, 'payload': payload, 'refreshed_at': refreshed_at}
+        for user_id, payload in snapshots.items()
+    ])
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'payload': stmt.excluded.payload, 'refreshed_at': stmt.excluded.refreshed_at}
+    ))
+
+
+def refresh_analytics(session=None, full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Bring salary bounds and snapshots up to date with the applications
+
+    Only rows changed since the last run are parsed, and only their users'
+    snapshots rebuilt, unless `full` is set or nothing has run yet. Returns
+    (rows whose salary bounds changed, snapshots written).
+    """
+    session = session or db.session
+    started = datetime.utcnow()
+    mark = session.get(JobWatermark, WATERMARK)
+    since = None if full or mark is None else mark.high_water - SYNC_OVERLAP
+
+    parsed = normalize_salaries(session, since, batch_size)
+    users = sorted(changed_users(session, since))
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        write_snapshots(session, {user_id: compute_snapshot(session, user_id) for user_id in batch}, started)
+        session.commit()
+
+    session.merge(JobWatermark(name=WATERMARK, high_water=started))
+    session.commit()
+    return parsed, len(users)
+
+
+def read_snapshot(session, user_id, today=None):
+    """The /api/analytics payload: the stored snapshot and when it was computed
+
+    weekly is cut to the WEEKS weeks up to `today` (UTC, the same clock the
+    refresh job uses). analytics is None until the first refresh after the
+    user's first application.
+    """
+    row = session.execute(
+        select(AnalyticsSnapshot.payload, AnalyticsSnapshot.refreshed_at).where(AnalyticsSnapshot.user_id == user_id)
+    ).first()
+    if row is None:
+        return {'analytics': None, 'refreshed_at': None}
+    start = window_start(today).isoformat()
+    weekly = [week for week in row.payload['weekly'] if week['week'] >= start]
+    return {'analytics': {**row.payload, 'weekly': weekly}, 'refreshed_at': row.refreshed_at}
@@ -1,53 +1,207 @@
 """
 JobTracker Flask API with JWT Authentication
 Manages job application tracking data with user authentication
+
+create_app() builds the app from the environment without connecting to the
+database, SMTP or Redis, so a cold process answers its first request as soon
+as it has imported. Schema migrations are a separate step:
+
+    flask --app app upgrade-db
 """
 
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from flask_mail import Mail, Message
-from models import db, User, Application, PasswordResetToken
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt, get_jwt_identity
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db, User, Application, ApplicationTombstone, OutboundEmail, PasswordResetToken, UserStats
+from hashing import password_hasher, calibrate_rounds, HashingBusy
+from cache import response_cache, user_cache
+from schema import register_migrations, upgrade_database
+from metrics import request_metrics
+from ratelimit import rate_limiter, DEFAULT_LIMITS
+from realtime import event_publisher, issue_stream_ticket, TICKET_SECONDS
+from routing import engine_options, pool_metrics, replica_router, DEFAULT_REPLICA_ENDPOINTS, REPLICA_BIND
+from serialization import OrjsonProvider
+from emails import email_dispatcher, enqueue_email, PASSWORD_RESET_SUBJECT, PASSWORD_RESET_TEMPLATE
+from transfer import export_query, export_rows, import_rows, CONTENT_TYPES, FORMATS as EXPORT_FORMATS
+from search import make_snippet, rebuild_search, search_applications
+from queries import application_changes, decode_sync_token, filter_applications, get_user_application, list_applications
+from board import board_columns, move_card, BoardConflict
+from analytics import read_snapshot, refresh_analytics, DEFAULT_BATCH_SIZE as ANALYTICS_BATCH_SIZE
+from history import StatusHistory, backfill_events, forget_events, stage_reach, time_in_stage, transitions
+from stats import compute_statistics, reconcile_user_stats, track_change, StatsDelta, INTERVALS, BREAKDOWNS
+from sqlalchemy import update, delete
 from datetime import datetime, timedelta
+import click
 import os
+import time
+
+api = Blueprint('api', __name__, cli_group=None)
+jwt = JWTManager()
+
+
+def database_url_from(name, default=None):
+    url = os.environ.get(name, default)
+    # Fix for Render PostgreSQL URLs (postgres:// -> postgresql://)
+    if url and url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def load_config(app):
+    """Read settings from the environment into app.config"""
+    # Database configuration
+    database_url = database_url_from('DATABASE_URL', 'sqlite:///jobtracker.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Connection pools (see routing.py), per process: size them to gunicorn's
+    # --threads. Connections are recycled rather than pinged on each checkout.
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 8))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 4))
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 300))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'false').lower() == 'true'
+
+    # Read replica: REPLICA_ENDPOINTS read from it unless the user wrote within
+    # the last REPLICA_STICKY_SECONDS
+    app.config['DATABASE_REPLICA_URL'] = database_url_from('DATABASE_REPLICA_URL')
+    app.config['REPLICA_ENDPOINTS'] = [
+        endpoint.strip()
+        for endpoint in os.environ.get('REPLICA_ENDPOINTS', ','.join(DEFAULT_REPLICA_ENDPOINTS)).split(',')
+        if endpoint.strip()
+    ]
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    app.config['REPLICA_STICKY_BACKEND'] = os.environ.get('REPLICA_STICKY_BACKEND', 'memory')
+    app.config['REPLICA_STICKY_URL'] = os.environ.get('REPLICA_STICKY_URL', os.environ.get('CACHE_URL'))
+
+    # JWT configuration
+    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['JWT_HEADER_NAME'] = 'Authorization'
+    app.config['JWT_HEADER_TYPE'] = 'Bearer'
+    # Embed the user's public profile (id, email, name, created_at) in access
+    # tokens so /api/auth/me never needs the database
+    app.config['JWT_PROFILE_CLAIMS'] = os.environ.get('JWT_PROFILE_CLAIMS', 'false').lower() == 'true'
+
+    # Email configuration (Gmail SMTP by default)
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', os.environ.get('MAIL_USERNAME'))
+
+    # Outbox dispatcher: 'thread' sends from each web process, 'none' leaves it to
+    # `flask send-emails`
+    app.config['EMAIL_DISPATCHER'] = os.environ.get('EMAIL_DISPATCHER', 'thread')
+    app.config['EMAIL_POLL_INTERVAL'] = int(os.environ.get('EMAIL_POLL_INTERVAL', 30))
+    app.config['EMAIL_BATCH_SIZE'] = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    # A failed send is retried after EMAIL_BACKOFF_SECONDS, doubling each time
+    app.config['EMAIL_MAX_ATTEMPTS'] = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    app.config['EMAIL_BACKOFF_SECONDS'] = int(os.environ.get('EMAIL_BACKOFF_SECONDS', 30))
+
+    # Password hashing configuration (see hashing.py)
+    app.config['BCRYPT_ROUNDS'] = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    app.config['HASH_POOL'] = os.environ.get('HASH_POOL', 'process')
+    app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', 0)) or None
+    app.config['HASH_CONCURRENCY'] = int(os.environ.get('HASH_CONCURRENCY', 0)) or None
+    app.config['HASH_QUEUE_TIMEOUT'] = float(os.environ.get('HASH_QUEUE_TIMEOUT', 5))
+    # Request threads per web worker (gunicorn --threads); password operations
+    # past HASH_ADMISSION_LIMIT, by default half of them, get 503 at once
+    app.config['WEB_THREADS'] = int(os.environ.get('WEB_THREADS', 8))
+    app.config['HASH_ADMISSION_LIMIT'] = int(os.environ.get('HASH_ADMISSION_LIMIT', 0)) or None
+
+    # Response cache configuration (see cache.py)
+    app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'none')
+    app.config['CACHE_URL'] = os.environ.get('CACHE_URL')
+    app.config['CACHE_TTL'] = int(os.environ.get('CACHE_TTL', 300))
+    app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+    # Authenticated user profile cache; USER_CACHE_TTL=0 disables it
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+    app.config['USER_CACHE_MAX_ENTRIES'] = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+
+    # Server-sent change events (see realtime.py); the stream is served by asgi.py
+    app.config['EVENTS_BACKEND'] = os.environ.get('EVENTS_BACKEND', 'memory')
+    app.config['EVENTS_URL'] = os.environ.get('EVENTS_URL', os.environ.get('CACHE_URL'))
+    app.config['EVENTS_HEARTBEAT'] = int(os.environ.get('EVENTS_HEARTBEAT', 25))
+    app.config['EVENTS_QUEUE_SIZE'] = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+
+    # Rate limits per endpoint (see ratelimit.py), e.g.
+    # RATE_LIMIT_LOGIN="20/minute per ip, 5/minute per email"; empty disables one
+    app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_URL'] = os.environ.get('RATE_LIMIT_URL', os.environ.get('CACHE_URL'))
+    app.config['RATE_LIMITS'] = {
+        endpoint: os.environ.get(f'RATE_LIMIT_{endpoint.upper()}', default)
+        for endpoint, default in DEFAULT_LIMITS.items()
+    }
+    # Number of proxies in front of the app whose X-Forwarded-For is trusted, so
+    # per-IP limits see the client address rather than the load balancer's
+    app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', 0))
+
+    # Seconds between runs of `flask purge-reset-tokens --loop`
+    app.config['PURGE_INTERVAL'] = int(os.environ.get('PURGE_INTERVAL', 3600))
+    # The same job deletes sent and failed outbox rows older than this
+    app.config['OUTBOX_RETENTION_DAYS'] = int(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+
+    # `flask refresh-analytics --loop` recomputes changed snapshots this often
+    app.config['ANALYTICS_REFRESH_INTERVAL'] = int(os.environ.get('ANALYTICS_REFRESH_INTERVAL', 300))
+
+    # Delta sync keeps deletion tombstones this long; older sync tokens reload
+    app.config['SYNC_TOMBSTONE_DAYS'] = int(os.environ.get('SYNC_TOMBSTONE_DAYS', 30))
+
+    # Instrumentation (see metrics.py): statements slower than SLOW_QUERY_MS are
+    # logged; users in ADMIN_EMAILS may add ?profile=1 to any request
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 500))
+    app.config['ADMIN_EMAILS'] = {
+        email.strip().lower() for email in os.environ.get('ADMIN_EMAILS', '').split(',') if email.strip()
+    }
+    # /api/metrics and /api/cache/metrics are admin-only; scrapers send this as a bearer token
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Frontend URL for password reset links
+    app.config['FRONTEND_URL'] = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
+
+
+def create_app(config=None):
+    """Create the Flask app; `config` overrides settings from the environment
+
+    Extensions connect lazily: the engines, Redis clients, SMTP connection and
+    the email dispatcher thread are all set up on first use.
+    """
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    CORS(app)
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(database_url, app.config, 'primary'))
+    replica_url = app.config['DATABASE_REPLICA_URL']
+    if replica_url:
+        app.config.setdefault('SQLALCHEMY_BINDS', {
+            REPLICA_BIND: {'url': replica_url, **engine_options(replica_url, app.config, 'replica')}
+        })
+
+    db.init_app(app)
+    register_migrations(app)
+    jwt.init_app(app)
+    response_cache.init_app(app)
+    user_cache.init_app(app, load_user_profile)
+    request_metrics.init_app(app)
+    rate_limiter.init_app(app)
+    replica_router.init_app(app)
+    if app.config['TRUSTED_PROXIES']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+    password_hasher.init_app(app)
+    email_dispatcher.init_app(app)
+    event_publisher.init_app(app)
+    app.register_blueprint(api)
+    return app
 
-app = Flask(__name__)
-CORS(app)
-
-# Database configuration
-database_url = os.environ.get('DATABASE_URL', 'sqlite:///jobtracker.db')
-# Fix for Render PostgreSQL URLs (postgres:// -> postgresql://)
-if database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-}
-
-# JWT configuration
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
-app.config['JWT_TOKEN_LOCATION'] = ['headers']
-app.config['JWT_HEADER_NAME'] = 'Authorization'
-app.config['JWT_HEADER_TYPE'] = 'Bearer'
-
-# Email configuration (Gmail SMTP)
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_USERNAME')
-
-# Frontend URL for password reset links
-FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:5173')
-
-# Initialize extensions
-db.init_app(app)
-jwt = JWTManager(app)
-mail = Mail(app)
 
 # JWT error handlers for debugging
 @jwt.invalid_token_loader
@@ -62,13 +216,28 @@ def unauthorized_callback(error_string):
 def expired_token_callback(jwt_header, jwt_payload):
     return jsonify({"success": False, "error": "Token has expired"}), 401
 
-with app.app_context():
-    db.create_all()
 
+def load_user_profile(user_id):
+    user = db.session.get(User, user_id)
+    return user.to_dict() if user else None
+
+
+def issue_access_token(user):
+    """Create an access token (identity must be a string for Flask-JWT-Extended 4.x)"""
+    claims = {'profile': user.to_dict()} if current_app.config['JWT_PROFILE_CLAIMS'] else None
+    return create_access_token(identity=str(user.id), additional_claims=claims)
+
+
+@api.app_errorhandler(HashingBusy)
+def hashing_busy_handler(error):
+    db.session.rollback()
+    response = jsonify({"success": False, "error": "Server is busy, please try again shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 # ============= Authentication Endpoints =============
 
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/api/auth/register', methods=['POST'])
 def register():
     """Register a new user"""
     try:
@@ -97,9 +266,10 @@ def register():
 
         db.session.add(user)
         db.session.commit()
+        # The new account's first requests must not miss it on the replica
+        replica_router.mark_write(user.id)
 
-        # Create access token (identity must be string for Flask-JWT-Extended 4.x)
-        access_token = create_access_token(identity=str(user.id))
+        access_token = issue_access_token(user)
 
         return jsonify({
             "success": True,
@@ -107,12 +277,14 @@ def register():
             "access_token": access_token
         }), 201
 
+    except HashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     """Login user"""
     try:
@@ -128,8 +300,12 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({"success": False, "error": "Invalid email or password"}), 401
 
-        # Create access token (identity must be string for Flask-JWT-Extended 4.x)
-        access_token = create_access_token(identity=str(user.id))
+        # Upgrade hashes made with an outdated cost factor
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+
+        access_token = issue_access_token(user)
 
         return jsonify({
             "success": True,
@@ -137,31 +313,48 @@ def login():
             "access_token": access_token
         })
 
+    except HashingBusy:
+        raise
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/me', methods=['GET'])
+@api.route('/api/auth/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    """Get current user info"""
+    """Get current user info (from the token or the user cache)"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-
-        if not user:
-            return jsonify({"success": False, "error": "User not found"}), 404
-
+        profile = user_cache.current()
+        if profile is None:
+            return jsonify({"success": False, "error": "User not found"}), 401
         return jsonify({
             "success": True,
-            "user": user.to_dict()
+            "user": profile
         })
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/forgot-password', methods=['POST'])
+@api.route('/api/events/ticket', methods=['POST'])
+@jwt_required()
+def get_stream_ticket():
+    """Issue a short-lived ticket for opening GET /api/events (served by asgi.py)
+
+    EventSource cannot send an Authorization header, so the ticket goes in the
+    query string instead of the access token.
+    """
+    try:
+        ticket = issue_stream_ticket(
+            get_jwt_identity(), get_jwt().get('exp'),
+            current_app.config['JWT_SECRET_KEY'], current_app.config.get('JWT_ALGORITHM', 'HS256')
+        )
+        return jsonify({"success": True, "ticket": ticket, "expires_in": TICKET_SECONDS})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/auth/forgot-password', methods=['POST'])
 def forgot_password():
     """Send password reset email"""
     try:
@@ -175,47 +368,18 @@ def forgot_password():
         user = User.query.filter_by(email=email).first()
 
         if user:
-            # Invalidate any existing tokens for this user
-            PasswordResetToken.query.filter_by(user_id=user.id, used=False).update({'used': True})
-
-            # Create new reset token
-            reset_token = PasswordResetToken.create_for_user(user.id)
-            db.session.add(reset_token)
-            db.session.commit()
-
-            # Send email
-            reset_url = f"{FRONTEND_URL}/reset-password?token={reset_token.token}"
-
-            msg = Message(
-                subject="Reset Your JobTracker Password",
-                recipients=[user.email]
+            # Replace any existing tokens for this user with a new one
+            reset_token = PasswordResetToken.issue(user.id)
+
+            # Queue the email in the same transaction as the token
+            reset_url = f"{current_app.config['FRONTEND_URL']}/reset-password?token={reset_token}"
+            enqueue_email(
+                user.email,
+                PASSWORD_RESET_SUBJECT,
+                PASSWORD_RESET_TEMPLATE.render(name=user.name, reset_url=reset_url)
             )
-            msg.html = f"""
-            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background: linear-gradient(to right, #16a34a, #10b981); padding: 20px; text-align: center;">
-                    <h1 style="color: white; margin: 0;">JobTracker</h1>
-                </div>
-                <div style="padding: 30px; background: #f9fafb;">
-                    <h2 style="color: #374151;">Password Reset Request</h2>
-                    <p style="color: #6b7280;">Hi {user.name},</p>
-                    <p style="color: #6b7280;">We received a request to reset your password. Click the button below to create a new password:</p>
-                    <div style="text-align: center; margin: 30px 0;">
-                        <a href="{reset_url}" style="background: #16a34a; color: white; padding: 12px 30px; text-decoration: none; border-radius: 8px; font-weight: bold;">Reset Password</a>
-                    </div>
-                    <p style="color: #6b7280; font-size: 14px;">This link will expire in 1 hour.</p>
-                    <p style="color: #6b7280; font-size: 14px;">If you didn't request this, you can safely ignore this email.</p>
-                    <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-                    <p style="color: #9ca3af; font-size: 12px;">If the button doesn't work, copy and paste this link into your browser:</p>
-                    <p style="color: #9ca3af; font-size: 12px; word-break: break-all;">{reset_url}</p>
-                </div>
-            </div>
-            """
-
-            try:
-                mail.send(msg)
-            except Exception as e:
-                print(f"Failed to send email: {e}")
-                # Don't expose email errors to user
+            db.session.commit()
+            email_dispatcher.wake()
 
         # Always return success (security: don't reveal if email exists)
         return jsonify({
@@ -228,7 +392,7 @@ def forgot_password():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/reset-password', methods=['POST'])
+@api.route('/api/auth/reset-password', methods=['POST'])
 def reset_password():
     """Reset password using token"""
     try:
@@ -242,35 +406,36 @@ def reset_password():
         if len(new_password) < 6:
             return jsonify({"success": False, "error": "Password must be at least 6 characters"}), 400
 
-        # Find and validate token
-        reset_token = PasswordResetToken.query.filter_by(token=token).first()
-
-        if not reset_token:
+        # Reject bad tokens before spending a bcrypt hash on them
+        if PasswordResetToken.find_valid(token) is None:
             return jsonify({"success": False, "error": "Invalid or expired reset link"}), 400
 
-        if not reset_token.is_valid():
-            return jsonify({"success": False, "error": "Reset link has expired. Please request a new one."}), 400
-
-        # Update password
-        user = User.query.get(reset_token.user_id)
-        user.set_password(new_password)
-
-        # Mark token as used
-        reset_token.used = True
+        # Hash outside the write transaction so no lock is held while bcrypt runs
+        password_hash = password_hasher.hash(new_password)
 
+        # Use the token and set the password in one transaction; consume()
+        # re-checks validity, so a concurrent reset with the same token fails
+        user_id = PasswordResetToken.consume(token)
+        if user_id is None:
+            db.session.rollback()
+            return jsonify({"success": False, "error": "Invalid or expired reset link"}), 400
+        db.session.execute(update(User).where(User.id == user_id).values(password_hash=password_hash))
         db.session.commit()
+        user_cache.invalidate(user_id)
 
         return jsonify({
             "success": True,
             "message": "Password reset successfully. You can now log in with your new password."
         })
 
+    except HashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/verify-reset-token', methods=['POST'])
+@api.route('/api/auth/verify-reset-token', methods=['POST'])
 def verify_reset_token():
     """Verify if a reset token is valid"""
     try:
@@ -280,9 +445,7 @@ def verify_reset_token():
         if not token:
             return jsonify({"success": False, "error": "Token is required"}), 400
 
-        reset_token = PasswordResetToken.query.filter_by(token=token).first()
-
-        if not reset_token or not reset_token.is_valid():
+        if PasswordResetToken.find_valid(token) is None:
             return jsonify({"success": False, "valid": False, "error": "Invalid or expired reset link"}), 400
 
         return jsonify({
@@ -296,34 +459,218 @@ def verify_reset_token():
 
 # ============= Application Endpoints (Protected) =============
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "message": "JobTracker API is running"})
 
 
-@app.route('/api/applications', methods=['GET'])
+@api.route('/api/cache/metrics', methods=['GET'])
+@request_metrics.admin_only
+def cache_metrics():
+    """Response cache hit/miss/eviction counters for this process"""
+    return jsonify({
+        "success": True,
+        "backend": current_app.config['CACHE_BACKEND'],
+        "metrics": response_cache.metrics.to_dict(),
+        "user_cache": user_cache.metrics.to_dict()
+    })
+
+
+@api.route('/api/metrics', methods=['GET'])
+@request_metrics.admin_only
+def prometheus_metrics():
+    """Request, SQL, pool, bcrypt, cache and event stream metrics for this process in Prometheus format"""
+    cache = response_cache.metrics
+    body = request_metrics.render(extra=[
+        ('jobtracker_password_hash_seconds_total', 'counter',
+         'Time spent hashing and verifying passwords', password_hasher.total_seconds),
+        ('jobtracker_password_hash_operations_total', 'counter',
+         'Password hashes and verifications', password_hasher.operations),
+        ('jobtracker_response_cache_hits_total', 'counter', 'Response cache hits', cache.hits),
+        ('jobtracker_response_cache_misses_total', 'counter', 'Response cache misses', cache.misses),
+        ('jobtracker_response_cache_evictions_total', 'counter', 'Response cache evictions', cache.evictions),
+        ('jobtracker_user_cache_hits_total', 'counter', 'Authenticated user cache hits', user_cache.metrics.hits),
+        ('jobtracker_user_cache_misses_total', 'counter', 'Authenticated user cache misses', user_cache.metrics.misses),
+        ('jobtracker_user_cache_evictions_total', 'counter', 'Authenticated user cache evictions',
+         user_cache.metrics.evictions),
+        ('jobtracker_rate_limited_total', 'counter', 'Requests rejected by rate limits',
+         rate_limiter.limited),
+        ('jobtracker_event_streams', 'gauge', 'Open event streams served by this process',
+         event_publisher.broker.connections),
+        ('jobtracker_events_published_total', 'counter', 'Change notifications published',
+         event_publisher.published),
+        ('jobtracker_events_publish_failures_total', 'counter', 'Change notifications that failed to publish',
+         event_publisher.failures),
+        ('jobtracker_replica_reads_total', 'counter', 'Requests that read from the replica',
+         replica_router.routed['replica']),
+        ('jobtracker_replica_sticky_reads_total', 'counter', 'Replica-eligible requests kept on the primary after a write',
+         replica_router.routed['primary']),
+    ])
+    body += '\n'.join(pool_metrics.render(db.engines.values())) + '\n'
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+
+@api.route('/api/applications', methods=['GET'])
 @jwt_required()
+@response_cache.cached
 def get_applications():
-    """Get all applications for current user"""
+    """Get applications for current user
+
+    Query parameters:
+        status, q, is_favorite -- filters applied in SQL
+        sort -- one of SORTABLE_FIELDS (default date_applied)
+        order -- asc or desc (default desc)
+        limit -- page size; when omitted the full filtered list is returned
+        cursor -- next_cursor from the previous page
+        fields -- comma-separated subset of fields to return (id is always included)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        try:
+            page = list_applications(db.session, user_id, request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify({"success": True, **page})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/applications/changes', methods=['GET'])
+@jwt_required()
+def get_application_changes():
+    """Get applications created, updated or deleted since a sync token
+
+    Query parameters:
+        since -- sync_token from the list endpoint or the previous call
+
+    Returns changed rows, deleted ids and the next sync_token. With
+    reset=true the client must reload the full list instead.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        since = request.args.get('since')
+        if not since:
+            return jsonify({"success": False, "error": "since is required"}), 400
+        try:
+            changes = application_changes(
+                db.session, user_id, decode_sync_token(since), timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify({"success": True, **changes})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/applications/export', methods=['GET'])
+@jwt_required()
+def export_applications():
+    """Stream the current user's applications as CSV or NDJSON
+
+    Accepts the same status, q and is_favorite filters as the list endpoint.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        fmt = request.args.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"success": False, "error": "Format must be 'csv' or 'ndjson'"}), 400
+
+        query = export_query(filter_applications(db.session.query(Application), user_id, request.args))
+        return Response(
+            stream_with_context(export_rows(query, fmt)),
+            content_type=CONTENT_TYPES[fmt],
+            headers={'Content-Disposition': f'attachment; filename=applications.{fmt}'}
+        )
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/applications/import', methods=['POST'])
+@jwt_required()
+def import_applications():
+    """Import applications from a CSV or NDJSON upload
+
+    The file may be sent as multipart field "file" or as the raw request body.
+    Rows are parsed incrementally and inserted in batches; invalid rows are
+    skipped and reported.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        fmt = request.args.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"success": False, "error": "Format must be 'csv' or 'ndjson'"}), 400
+
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+
+        imported, failed, errors = import_rows(user_id, stream, fmt)
+        db.session.commit()
+        if imported:
+            response_cache.invalidate(user_id)
+            event_publisher.publish_changes(user_id)
+
+        return jsonify({
+            "success": True,
+            "imported": imported,
+            "failed": failed,
+            "errors": errors
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/applications/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Full-text search over company, position, location and notes
+
+    Query parameters:
+        q -- search text; the last word matches as a prefix
+        limit -- maximum results (default 20, max 100)
+    """
     try:
         user_id = int(get_jwt_identity())
-        applications = Application.query.filter_by(user_id=user_id).order_by(Application.date_applied.desc()).all()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+        query = request.args.get('q', '')
+        matches = search_applications(db.session, user_id, query, limit)
+        applications = {
+            application.id: application
+            for application in Application.query.filter(
+                Application.user_id == user_id,
+                Application.id.in_([row_id for row_id, _ in matches])
+            )
+        } if matches else {}
+
         return jsonify({
             "success": True,
-            "applications": [app.to_dict() for app in applications]
+            "results": [
+                {
+                    **applications[row_id].to_dict(),
+                    'rank': rank,
+                    'snippet': make_snippet(applications[row_id], query)
+                }
+                for row_id, rank in matches
+                if row_id in applications
+            ]
         })
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/applications/<int:id>', methods=['GET'])
+@api.route('/api/applications/<int:id>', methods=['GET'])
 @jwt_required()
+@response_cache.cached
 def get_application(id):
     """Get a specific application"""
     try:
         user_id = int(get_jwt_identity())
-        application = Application.query.filter_by(id=id, user_id=user_id).first()
+        application = get_user_application(db.session, user_id, id)
 
         if not application:
             return jsonify({"success": False, "error": "Application not found"}), 404
@@ -336,35 +683,30 @@ def get_application(id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/applications', methods=['POST'])
+@api.route('/api/applications', methods=['POST'])
 @jwt_required()
 def create_application():
     """Create a new application"""
     try:
         user_id = int(get_jwt_identity())
-        data = request.json
-
-        # Validate required fields
-        required_fields = ['company', 'position', 'date_applied', 'status']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
+        try:
+            values = Application.validate(request.json)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
 
         # Create new application
-        application = Application(
-            user_id=user_id,
-            company=data['company'],
-            position=data['position'],
-            status=data['status'],
-            date_applied=datetime.strptime(data['date_applied'], '%Y-%m-%d').date(),
-            job_url=data.get('job_url'),
-            location=data.get('location'),
-            salary_range=data.get('salary_range'),
-            notes=data.get('notes')
-        )
+        application = Application(user_id=user_id, **values)
+        application.board_rank = Application.top_rank(user_id, application.status)
 
         db.session.add(application)
+        db.session.flush()
+        track_change(user_id, None, (application.status, application.is_favorite))
+        history = StatusHistory()
+        history.created(application.id, application.status, application.date_applied)
+        history.write(user_id)
         db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(user_id, changed=[application.id])
 
         return jsonify({
             "success": True,
@@ -376,7 +718,161 @@ def create_application():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/applications/<int:id>', methods=['PUT'])
+BULK_MAX_ITEMS = 5000
+
+
+@api.route('/api/applications/bulk', methods=['POST'])
+@jwt_required()
+def bulk_applications():
+    """Create, update and delete many applications in one transaction
+
+    Body: {"create": [{...}], "update": [{"id": 1, ...}], "delete": [1, 2]}
+    Every item is validated before anything is written; if any item fails the
+    whole batch is rejected and the per-item results say why.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.json or {}
+        creates = data.get('create', [])
+        updates = data.get('update', [])
+        deletes = data.get('delete', [])
+
+        if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+            return jsonify({"success": False, "error": "create, update and delete must be lists"}), 400
+        if len(creates) + len(updates) + len(deletes) > BULK_MAX_ITEMS:
+            return jsonify({"success": False, "error": f"A batch may contain at most {BULK_MAX_ITEMS} items"}), 400
+
+        results = {'create': [], 'update': [], 'delete': []}
+        errors = 0
+
+        def record(op, index, error=None, **extra):
+            nonlocal errors
+            item = {'index': index, 'success': error is None, **extra}
+            if error is not None:
+                item['error'] = error
+                errors += 1
+            results[op].append(item)
+
+        # Validate everything before writing anything
+        create_rows = []
+        for index, item in enumerate(creates):
+            try:
+                create_rows.append(Application.validate(item))
+            except ValueError as e:
+                record('create', index, str(e))
+
+        update_rows = []
+        seen_ids = set()
+        for index, item in enumerate(updates):
+            row_id = item.get('id') if isinstance(item, dict) else None
+            # bool is an int subclass: true would address application 1
+            if not isinstance(row_id, int) or isinstance(row_id, bool):
+                record('update', index, "Missing or invalid id")
+                continue
+            if row_id in seen_ids:
+                record('update', index, "Duplicate id in batch", id=row_id)
+                continue
+            seen_ids.add(row_id)
+            try:
+                update_rows.append((index, row_id, Application.validate(item, partial=True)))
+            except ValueError as e:
+                record('update', index, str(e), id=row_id)
+
+        delete_ids = []
+        for index, row_id in enumerate(deletes):
+            if not isinstance(row_id, int) or isinstance(row_id, bool):
+                record('delete', index, "Invalid id")
+            elif row_id in seen_ids:
+                record('delete', index, "Duplicate id in batch", id=row_id)
+            else:
+                seen_ids.add(row_id)
+                delete_ids.append((index, row_id))
+
+        # Load the current state of every targeted row in one query
+        existing = {}
+        if seen_ids:
+            existing = {
+                row.id: (row.status, row.is_favorite)
+                for row in db.session.query(Application.id, Application.status, Application.is_favorite)
+                .filter(Application.user_id == user_id, Application.id.in_(seen_ids))
+            }
+        for index, row_id, _ in update_rows:
+            if row_id not in existing:
+                record('update', index, "Application not found", id=row_id)
+        for index, row_id in delete_ids:
+            if row_id not in existing:
+                record('delete', index, "Application not found", id=row_id)
+
+        if errors:
+            for op in results:
+                results[op].sort(key=lambda item: item['index'])
+            return jsonify({"success": False, "error": f"{errors} item(s) failed validation", "results": results}), 400
+
+        # Write everything with executemany-style statements
+        deltas = StatsDelta()
+        history = StatusHistory()
+
+        if create_rows:
+            for values in create_rows:
+                deltas.change(None, (values['status'], values.get('is_favorite', False)))
+            for index, new_id in enumerate(Application.insert_many(user_id, create_rows)):
+                history.created(new_id, create_rows[index]['status'], create_rows[index]['date_applied'])
+                record('create', index, id=new_id)
+
+        if update_rows:
+            now = datetime.utcnow()
+            # Cards changing status go on top of their new column
+            moved = [(row_id, values['status']) for _, row_id, values in update_rows
+                     if values.get('status', existing[row_id][0]) != existing[row_id][0]]
+            ranks = dict(zip(
+                (row_id for row_id, _ in moved),
+                Application.top_ranks(user_id, [status for _, status in moved]) if moved else ()
+            ))
+            params = []
+            for index, row_id, values in update_rows:
+                before = existing[row_id]
+                deltas.change(before, (values.get('status', before[0]), values.get('is_favorite', before[1])))
+                history.changed(row_id, before[0], values.get('status', before[0]))
+                params.append({'id': row_id, 'updated_at': now, **values})
+                if row_id in ranks:
+                    params[-1]['board_rank'] = ranks[row_id]
+                record('update', index, id=row_id)
+            db.session.execute(update(Application), params)
+
+        if delete_ids:
+            ids = [row_id for _, row_id in delete_ids]
+            for index, row_id in delete_ids:
+                deltas.change(existing[row_id], None)
+                record('delete', index, id=row_id)
+            db.session.execute(
+                delete(Application)
+                .where(Application.user_id == user_id, Application.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            ApplicationTombstone.record(user_id, ids)
+            forget_events(user_id, ids)
+
+        deltas.apply(user_id)
+        history.write(user_id)
+        db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(
+            user_id,
+            changed=[item['id'] for item in results['create'] + results['update']],
+            deleted=[row_id for _, row_id in delete_ids]
+        )
+
+        return jsonify({
+            "success": True,
+            "results": results
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/applications/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_application(id):
     """Update an existing application"""
@@ -387,30 +883,27 @@ def update_application(id):
         if not application:
             return jsonify({"success": False, "error": "Application not found"}), 404
 
-        data = request.json
+        try:
+            values = Application.validate(request.json, partial=True)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        before = (application.status, application.is_favorite)
 
         # Update fields
-        if 'company' in data:
-            application.company = data['company']
-        if 'position' in data:
-            application.position = data['position']
-        if 'status' in data:
-            application.status = data['status']
-        if 'date_applied' in data:
-            application.date_applied = datetime.strptime(data['date_applied'], '%Y-%m-%d').date()
-        if 'job_url' in data:
-            application.job_url = data['job_url']
-        if 'location' in data:
-            application.location = data['location']
-        if 'salary_range' in data:
-            application.salary_range = data['salary_range']
-        if 'notes' in data:
-            application.notes = data['notes']
-        if 'is_favorite' in data:
-            application.is_favorite = data['is_favorite']
+        for field, value in values.items():
+            setattr(application, field, value)
+        if application.status != before[0]:
+            application.board_rank = Application.top_rank(user_id, application.status)
 
         application.updated_at = datetime.utcnow()
+        track_change(user_id, before, (application.status, application.is_favorite))
+        history = StatusHistory()
+        history.changed(application.id, before[0], application.status)
+        history.write(user_id)
         db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(user_id, changed=[application.id])
 
         return jsonify({
             "success": True,
@@ -422,7 +915,7 @@ def update_application(id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/applications/<int:id>', methods=['DELETE'])
+@api.route('/api/applications/<int:id>', methods=['DELETE'])
 @jwt_required()
 def delete_application(id):
     """Delete an application"""
@@ -434,7 +927,12 @@ def delete_application(id):
             return jsonify({"success": False, "error": "Application not found"}), 404
 
         db.session.delete(application)
+        track_change(user_id, (application.status, application.is_favorite), None)
+        ApplicationTombstone.record(user_id, [application.id])
+        forget_events(user_id, [application.id])
         db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(user_id, deleted=[id])
 
         return jsonify({
             "success": True,
@@ -446,7 +944,7 @@ def delete_application(id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/applications/<int:id>/favorite', methods=['PUT'])
+@api.route('/api/applications/<int:id>/favorite', methods=['PUT'])
 @jwt_required()
 def toggle_favorite(id):
     """Toggle favorite status of an application"""
@@ -458,7 +956,10 @@ def toggle_favorite(id):
             return jsonify({"success": False, "error": "Application not found"}), 404
 
         application.is_favorite = not application.is_favorite
+        UserStats.apply_delta(user_id, application.status, favorites=1 if application.is_favorite else -1)
         db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(user_id, changed=[application.id])
 
         return jsonify({
             "success": True,
@@ -470,36 +971,262 @@ def toggle_favorite(id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/board', methods=['GET'])
+@jwt_required()
+@response_cache.cached
+def get_board():
+    """Get the Kanban board: one column per status, each with its count
+
+    Query parameters:
+        limit -- cards per column (default 20, max 100)
+        status, cursor -- page through one column with its next_cursor
+        fields -- comma-separated subset of the application fields
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        try:
+            columns = board_columns(db.session, user_id, request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return jsonify({"success": True, "columns": columns})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/board/move', methods=['POST'])
+@jwt_required()
+def move_board_card():
+    """Move a card to a column and position
+
+    Body: {"id": 1, "status": "Interview", "after_id": 7}; after_id is the
+    card it lands below, null for the top of the column.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.json or {}
+        card_id = data.get('id')
+        status = data.get('status')
+        after_id = data.get('after_id')
+        # bool is an int subclass: reject true/false like any other non-integer
+        if not isinstance(card_id, int) or (after_id is not None and not isinstance(after_id, int)) \
+                or isinstance(card_id, bool) or isinstance(after_id, bool):
+            return jsonify({"success": False, "error": "id and after_id must be integers"}), 400
+        if not isinstance(status, str) or not status:
+            return jsonify({"success": False, "error": "status is required"}), 400
+
+        try:
+            moved = move_card(db.session, user_id, card_id, status, after_id)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 400
+        except BoardConflict as e:
+            db.session.rollback()
+            return jsonify({"success": False, "error": str(e)}), 409
+        if moved is None:
+            db.session.rollback()
+            return jsonify({"success": False, "error": "Application not found"}), 404
+
+        before, is_favorite = moved
+        track_change(user_id, (before, is_favorite), (status, is_favorite))
+        history = StatusHistory()
+        history.changed(card_id, before, status)
+        history.write(user_id)
+        db.session.commit()
+        response_cache.invalidate(user_id)
+        event_publisher.publish_changes(user_id, changed=[card_id])
+
+        return jsonify({"success": True, "id": card_id, "status": status})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached
 def get_statistics():
-    """Get dashboard statistics for current user"""
+    """Get dashboard statistics for current user
+
+    Query parameters:
+        include -- comma-separated extra breakdowns: timeline, median
+        interval -- timeline bucket, 'week' or 'month' (default month)
+    """
     try:
         user_id = int(get_jwt_identity())
-        all_apps = Application.query.filter_by(user_id=user_id).all()
-        total = len(all_apps)
 
-        # Count by status
-        status_counts = {}
-        for app in all_apps:
-            status_counts[app.status] = status_counts.get(app.status, 0) + 1
+        interval = request.args.get('interval', 'month')
+        if interval not in INTERVALS:
+            return jsonify({"success": False, "error": "Interval must be 'week' or 'month'"}), 400
 
-        # Calculate response rate (any status beyond "Applied")
-        responses = sum(1 for app in all_apps if app.status != 'Applied')
-        response_rate = round((responses / total * 100) if total > 0 else 0, 1)
+        include = [part for part in request.args.get('include', '').split(',') if part]
+        for part in include:
+            if part not in BREAKDOWNS:
+                return jsonify({"success": False, "error": f"Unknown breakdown: {part}"}), 400
 
         return jsonify({
             "success": True,
-            "stats": {
-                "total_applications": total,
-                "response_rate": response_rate,
-                "by_status": status_counts
-            }
+            "stats": compute_statistics(user_id, interval, include)
+        })
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/stats/transitions', methods=['GET'])
+@jwt_required()
+@response_cache.cached
+def get_transitions():
+    """Get status-change counts and the funnel of stages ever reached"""
+    try:
+        user_id = int(get_jwt_identity())
+        return jsonify({
+            "success": True,
+            "transitions": transitions(user_id, db.session),
+            "funnel": stage_reach(user_id, db.session)
         })
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@api.route('/api/stats/time-in-stage', methods=['GET'])
+@jwt_required()
+@response_cache.cached
+def get_time_in_stage():
+    """Get mean and percentile days spent in each stage before moving on"""
+    try:
+        user_id = int(get_jwt_identity())
+        return jsonify({
+            "success": True,
+            "stages": time_in_stage(user_id, db.session)
+        })
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@api.route('/api/analytics', methods=['GET'])
+@jwt_required()
+def get_analytics():
+    """Get precomputed dashboard analytics for current user
+
+    Weekly volumes, response rates by location and company, and the salary
+    distribution, from the snapshot `flask refresh-analytics` wrote. The
+    figures lag writes by up to ANALYTICS_REFRESH_INTERVAL; refreshed_at
+    says when they were computed.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        return jsonify({"success": True, **read_snapshot(db.session, user_id)})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ============= CLI Commands =============
+
+@api.cli.command('reconcile-stats')
+@click.option('--dry-run', is_flag=True, help='Report drift without correcting the rollup.')
+def reconcile_stats_command(dry_run):
+    """Correct drifted user_stats counters from applications and report them"""
+    drift = reconcile_user_stats(fix=not dry_run)
+    for user_id, status, expected, actual in drift:
+        click.echo(f"user {user_id} {status!r}: expected {expected}, found {actual}")
+    action = 'found' if dry_run else 'fixed'
+    click.echo(f"{len(drift)} drifted counter(s) {action}")
+
+
+@api.cli.command('backfill-events')
+def backfill_events_command():
+    """Record status history for applications that have none"""
+    inserted = backfill_events()
+    db.session.commit()
+    click.echo(f"Inserted {inserted} event(s)")
+
+
+@api.cli.command('purge-tombstones')
+def purge_tombstones_command():
+    """Delete tombstones older than SYNC_TOMBSTONE_DAYS"""
+    purged = ApplicationTombstone.purge(datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS']))
+    db.session.commit()
+    click.echo(f"Purged {purged} tombstone(s)")
+
+
+@api.cli.command('purge-reset-tokens')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction.')
+@click.option('--loop', is_flag=True, help='Keep purging every PURGE_INTERVAL seconds instead of exiting.')
+def purge_reset_tokens_command(batch_size, loop):
+    """Delete used and expired password reset tokens and old sent or failed emails"""
+    while True:
+        purged = PasswordResetToken.purge(batch_size)
+        click.echo(f"Purged {purged} reset token(s)")
+        retention = timedelta(days=current_app.config['OUTBOX_RETENTION_DAYS'])
+        emails = OutboundEmail.purge(datetime.utcnow() - retention, batch_size)
+        click.echo(f"Purged {emails} outbox email(s)")
+        if not loop:
+            return
+        time.sleep(current_app.config['PURGE_INTERVAL'])
+
+
+@api.cli.command('refresh-analytics')
+@click.option('--full', is_flag=True, help='Recompute every user instead of those with changes since the last run.')
+@click.option('--batch-size', default=ANALYTICS_BATCH_SIZE, show_default=True, help='Rows or users per transaction.')
+@click.option('--loop', is_flag=True, help='Keep refreshing every ANALYTICS_REFRESH_INTERVAL seconds instead of exiting.')
+def refresh_analytics_command(full, batch_size, loop):
+    """Parse salary ranges and recompute analytics snapshots"""
+    while True:
+        parsed, refreshed = refresh_analytics(full=full, batch_size=batch_size)
+        click.echo(f"Updated salary bounds on {parsed} application(s), refreshed {refreshed} snapshot(s)")
+        if not loop:
+            return
+        full = False
+        time.sleep(current_app.config['ANALYTICS_REFRESH_INTERVAL'])
+
+
+@api.cli.command('rebuild-search-index')
+def rebuild_search_command():
+    """Repopulate the full-text search index from applications"""
+    rebuild_search(db.engine)
+    click.echo("Search index rebuilt")
+
+
+@api.cli.command('calibrate-bcrypt')
+@click.option('--target-ms', default=250, show_default=True, help='Maximum time one hash may take.')
+def calibrate_bcrypt_command(target_ms):
+    """Suggest a BCRYPT_ROUNDS value for this machine"""
+    rounds = calibrate_rounds(target_ms)
+    click.echo(f"BCRYPT_ROUNDS={rounds} (configured: {current_app.config['BCRYPT_ROUNDS']})")
+
+
+@api.cli.command('send-emails')
+@click.option('--loop', is_flag=True, help='Keep polling the outbox instead of exiting when it is empty.')
+def send_emails_command(loop):
+    """Send queued outbox emails"""
+    if loop:
+        email_dispatcher.run_forever()
+        return
+
+    processed = 0
+    while True:
+        claimed = email_dispatcher.dispatch_batch()
+        processed += claimed
+        if claimed < email_dispatcher.batch_size:
+            break
+    click.echo(f"Processed {processed} email(s)")
+
+
+@api.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Apply pending migrations, one process at a time"""
+    upgrade_database(current_app._get_current_object())
+
+
+# Module-level app for `gunicorn app:app`, asgi.py and `flask --app app`
+app = create_app()
+
 if __name__ == '__main__':
+    # Development server: bring the database up to date first
+    upgrade_database(app)
     app.run(debug=True, port=5000)
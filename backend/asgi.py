@@ -0,0 +1,313 @@
+"""
+ASGI entry point for JobTracker
+
+    uvicorn asgi:app --workers 2
+
+The read endpoints that dominate traffic run as async views on an async
+SQLAlchemy engine (aiosqlite / asyncpg). They reuse the query code in
+queries.py, stats.py, board.py and analytics.py through
+AsyncSession.run_sync, so both entry points return identical payloads.
+Every other route is served by the Flask app through asgiref's WSGI
+adapter; `gunicorn app:app` keeps working unchanged.
+
+The async views do not go through the Flask response cache. They read from
+the replica on the same terms as the Flask views (routing.py).
+
+GET /api/events is the per-user Server-Sent Events stream (realtime.py).
+It only exists here: an idle stream is a parked coroutine, so one process
+holds thousands of them. EventSource cannot send headers, so browsers pass a
+short-lived ?ticket= from POST /api/events/ticket instead of their access
+token.
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from urllib.parse import parse_qsl
+from werkzeug.datastructures import MultiDict
+import asyncio
+import jwt
+import re
+import time
+
+from analytics import read_snapshot
+from app import app as flask_app
+from board import board_columns
+from models import db, User
+from queries import get_user_application, list_applications
+from realtime import decode_stream_ticket, event_publisher
+from routing import engine_options, replica_router, REPLICA_BIND
+from serialization import dumps
+from stats import compute_statistics, INTERVALS, BREAKDOWNS
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_engine_url(bind_key=None):
+    """The URL of one of the Flask app's engines with its async driver swapped in"""
+    with flask_app.app_context():
+        url = db.engines[bind_key].url
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def create_engine_for(bind_key, name):
+    url = async_engine_url(bind_key)
+    return create_async_engine(url, **engine_options(url, flask_app.config, name, is_async=True))
+
+
+engine = create_engine_for(None, 'async-primary')
+Session = async_sessionmaker(engine, expire_on_commit=False)
+replica_engine = create_engine_for(REPLICA_BIND, 'async-replica') if replica_router.enabled else None
+ReplicaSession = async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else None
+
+
+def read_session(user_id, endpoint):
+    """A session on the replica when replica_router allows it for the Flask view `endpoint`, else the primary"""
+    if ReplicaSession is not None and endpoint in replica_router.endpoints and replica_router.prefer_replica(user_id):
+        return ReplicaSession()
+    return Session()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def current_claims(scope):
+    """Decode the bearer token the same way Flask-JWT-Extended does"""
+    headers = dict(scope['headers'])
+    header = headers.get(b'authorization', b'').decode('latin-1')
+    if header.startswith('Bearer '):
+        token = header[len('Bearer '):]
+    else:
+        raise HTTPError(401, "Missing token: Missing Authorization Header")
+    try:
+        claims = jwt.decode(
+            token,
+            flask_app.config['JWT_SECRET_KEY'],
+            algorithms=[flask_app.config.get('JWT_ALGORITHM', 'HS256')]
+        )
+    except jwt.ExpiredSignatureError:
+        raise HTTPError(401, "Token has expired")
+    except jwt.PyJWTError as e:
+        raise HTTPError(401, f"Invalid token: {e}")
+    if claims.get('type') != 'access':
+        raise HTTPError(401, "Invalid token: Only access tokens are allowed")
+    return claims
+
+
+def current_user_id(scope):
+    return int(current_claims(scope)['sub'])
+
+
+async def health(scope):
+    return 200, {"status": "healthy", "message": "JobTracker API is running"}
+
+
+async def me(scope):
+    claims = current_claims(scope)
+    if flask_app.config['JWT_PROFILE_CLAIMS'] and 'profile' in claims:
+        return 200, {"success": True, "user": claims['profile']}
+    user_id = int(claims['sub'])
+    async with read_session(user_id, 'get_current_user') as session:
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPError(401, "User not found")
+        return 200, {"success": True, "user": user.to_dict()}
+
+
+async def applications(scope):
+    user_id = current_user_id(scope)
+    args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+    async with read_session(user_id, 'get_applications') as session:
+        try:
+            page = await session.run_sync(lambda s: list_applications(s, user_id, args))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+    return 200, {"success": True, **page}
+
+
+async def application(scope, application_id):
+    user_id = current_user_id(scope)
+    async with read_session(user_id, 'get_application') as session:
+        found = await session.run_sync(lambda s: get_user_application(s, user_id, application_id))
+        if not found:
+            raise HTTPError(404, "Application not found")
+        return 200, {"success": True, "application": found.to_dict()}
+
+
+async def statistics(scope):
+    user_id = current_user_id(scope)
+    args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+    interval = args.get('interval', 'month')
+    if interval not in INTERVALS:
+        raise HTTPError(400, "Interval must be 'week' or 'month'")
+    include = [part for part in args.get('include', '').split(',') if part]
+    for part in include:
+        if part not in BREAKDOWNS:
+            raise HTTPError(400, f"Unknown breakdown: {part}")
+    async with read_session(user_id, 'get_statistics') as session:
+        stats = await session.run_sync(lambda s: compute_statistics(user_id, interval, include, session=s))
+    return 200, {"success": True, "stats": stats}
+
+
+async def board(scope):
+    user_id = current_user_id(scope)
+    args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+    async with read_session(user_id, 'get_board') as session:
+        try:
+            columns = await session.run_sync(lambda s: board_columns(s, user_id, args))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+    return 200, {"success": True, "columns": columns}
+
+
+async def analytics(scope):
+    user_id = current_user_id(scope)
+    async with read_session(user_id, 'get_analytics') as session:
+        snapshot = await session.run_sync(lambda s: read_snapshot(s, user_id))
+    return 200, {"success": True, **snapshot}
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def event_stream(scope, receive, send):
+    """Stream the user's change events until the client leaves or its access token expires
+
+    Authenticated by ?ticket= (browsers) or an Authorization header.
+    """
+    ticket = dict(parse_qsl(scope['query_string'].decode('latin-1'))).get('ticket')
+    try:
+        if ticket is not None:
+            try:
+                claims = decode_stream_ticket(ticket, flask_app.config['JWT_SECRET_KEY'],
+                                              flask_app.config.get('JWT_ALGORITHM', 'HS256'))
+            except jwt.ExpiredSignatureError:
+                raise HTTPError(401, "Ticket has expired")
+            except jwt.PyJWTError as e:
+                raise HTTPError(401, f"Invalid ticket: {e}")
+            expires_at = claims.get('until')
+        else:
+            claims = current_claims(scope)
+            expires_at = claims.get('exp')
+    except HTTPError as e:
+        return await send_json(send, e.status, {"success": False, "error": str(e)})
+
+    user_id = int(claims['sub'])
+    queue = event_publisher.broker.subscribe(user_id)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop nginx-style proxies from buffering the stream
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+        while expires_at is None or time.time() < expires_at:
+            message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnected}, timeout=event_publisher.heartbeat, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnected in done:
+                message.cancel()
+                return
+            if message in done:
+                chunk = message.result()
+            else:
+                # Comment line: keeps proxies from closing an idle stream
+                message.cancel()
+                chunk = b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        event_publisher.broker.unsubscribe(user_id, queue)
+
+
+STREAMS = {
+    '/api/events': event_stream,
+}
+
+ROUTES = [
+    (re.compile(r'^/api/health$'), health),
+    (re.compile(r'^/api/auth/me$'), me),
+    (re.compile(r'^/api/applications$'), applications),
+    (re.compile(r'^/api/applications/(\d+)$'), application),
+    (re.compile(r'^/api/stats$'), statistics),
+    (re.compile(r'^/api/board$'), board),
+    (re.compile(r'^/api/analytics$'), analytics),
+]
+
+
+async def send_json(send, status, payload):
+    body = dumps(payload)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class JobTrackerASGI:
+    """Serve ROUTES natively and hand everything else to the Flask app"""
+
+    def __init__(self, wsgi_app):
+        self.fallback = WsgiToAsgi(wsgi_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            stream = STREAMS.get(scope['path'])
+            if stream is not None:
+                return await stream(scope, receive, send)
+            for pattern, view in ROUTES:
+                match = pattern.match(scope['path'])
+                if match:
+                    try:
+                        status, payload = await view(scope, *(int(g) for g in match.groups()))
+                    except HTTPError as e:
+                        status, payload = e.status, {"success": False, "error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"success": False, "error": str(e)}
+                    return await send_json(send, status, payload)
+
+        return await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        listener = None
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Relay events published by other processes to this one's streams
+                listener = asyncio.ensure_future(event_publisher.listen())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if listener is not None:
+                    listener.cancel()
+                await engine.dispose()
+                if replica_engine is not None:
+                    await replica_engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = JobTrackerASGI(flask_app)
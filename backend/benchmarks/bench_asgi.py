@@ -0,0 +1,129 @@
+"""
+Compare the WSGI and ASGI serving modes under the same mixed workload.
+
+    wsgi -- gunicorn app:app, gthread workers (as in the Procfile)
+    asgi -- uvicorn asgi:app
+
+Both serve a fresh SQLite database seeded with one user and `--rows`
+applications. Each client loops over a weighted mix of list, stats, detail
+and create requests; p50/p99 latency and requests per second are reported.
+
+Usage (from backend/):
+    python benchmarks/bench_asgi.py [--clients 32] [--duration 15] [--rows 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+from common import BACKEND_DIR, call, free_port, migrate, percentile, wait_until_up
+
+WORKERS = '2'
+MODES = {
+    'wsgi': ['gunicorn', 'app:app', '--workers', WORKERS, '--worker-class', 'gthread', '--threads', '8',
+             '--bind', '127.0.0.1:{port}'],
+    'asgi': ['uvicorn', 'asgi:app', '--workers', WORKERS, '--no-access-log', '--port', '{port}'],
+}
+
+# (name, weight)
+WORKLOAD = [('list', 6), ('stats', 2), ('detail', 1), ('create', 1)]
+
+
+def seed(base, rows):
+    credentials = {'email': 'bench@example.com', 'password': 'benchmark', 'name': 'Bench'}
+    req = urllib.request.Request(f'{base}/auth/register', data=json.dumps(credentials).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req) as response:
+        token = json.loads(response.read())['access_token']
+
+    creates = [
+        {'company': f'Company {i}', 'position': 'Engineer', 'status': 'Applied', 'date_applied': '2024-01-01'}
+        for i in range(rows)
+    ]
+    req = urllib.request.Request(f'{base}/applications/bulk', data=json.dumps({'create': creates}).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(req) as response:
+        ids = [item['id'] for item in json.loads(response.read())['results']['create']]
+    return token, ids
+
+
+def run_mode(name, clients, duration, rows):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}/api'
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+               BCRYPT_ROUNDS='4', EMAIL_DISPATCHER='none', RATE_LIMIT_BACKEND='none')
+    migrate(env)
+    command = [part.format(port=port) for part in MODES[name]]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base)
+        token, ids = seed(base, rows)
+        names = [n for n, weight in WORKLOAD for _ in range(weight)]
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def worker(seed_value):
+            nonlocal errors
+            rng = random.Random(seed_value)
+            while time.monotonic() < deadline:
+                kind = rng.choice(names)
+                if kind == 'list':
+                    status, elapsed = call(f'{base}/applications?limit=50', token=token)
+                elif kind == 'stats':
+                    status, elapsed = call(f'{base}/stats', token=token)
+                elif kind == 'detail':
+                    status, elapsed = call(f'{base}/applications/{rng.choice(ids)}', token=token)
+                else:
+                    status, elapsed = call(f'{base}/applications', {
+                        'company': 'New', 'position': 'Engineer', 'status': 'Applied', 'date_applied': '2024-02-01'
+                    }, token=token)
+                with lock:
+                    if status in (200, 201):
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'mode': name,
+            'rps': round(len(latencies) / duration, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'errors': errors,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    rows = [run_mode(mode, args.clients, args.duration, args.rows) for mode in args.modes]
+    columns = list(rows[0])
+    print(' '.join(f'{c:>10}' for c in columns))
+    for row in rows:
+        print(' '.join(f'{row[c]!s:>10}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Load benchmark for /api/auth/login under a login burst.
+
+Runs gunicorn twice against a fresh SQLite database:
+    before -- sync workers, bcrypt inline on the request thread
+    after  -- gthread workers, bcrypt in the process pool behind the limiter
+
+While `--clients` threads log in as fast as they can, a few more threads poll
+GET /api/applications so the effect on CRUD latency is visible.
+
+Usage (from backend/):
+    python benchmarks/bench_login.py [--clients 50] [--duration 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from common import BACKEND_DIR, call, free_port, migrate, percentile, wait_until_up
+
+MODES = {
+    'before': {
+        'args': ['--workers', '2'],
+        'env': {'HASH_POOL': 'inline'},
+    },
+    'after': {
+        'args': ['--workers', '2', '--worker-class', 'gthread', '--threads', '8'],
+        'env': {'HASH_POOL': 'process'},
+    },
+}
+
+
+def run_mode(name, clients, crud_clients, duration):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}/api'
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+               RATE_LIMIT_BACKEND='none', **MODES[name]['env'])
+    migrate(env)
+    server = subprocess.Popen(
+        ['gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}', '--timeout', '120', *MODES[name]['args']],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base)
+
+        credentials = {'email': 'bench@example.com', 'password': 'benchmark', 'name': 'Bench'}
+        req = urllib.request.Request(f'{base}/auth/register', data=json.dumps(credentials).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as response:
+            token = json.loads(response.read())['access_token']
+
+        results = {'login': [], 'list': [], 'shed': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def worker(kind):
+            while time.monotonic() < deadline:
+                if kind == 'login':
+                    status, elapsed = call(f'{base}/auth/login', credentials)
+                else:
+                    status, elapsed = call(f'{base}/applications', token=token)
+                with lock:
+                    if status == 200:
+                        results[kind].append(elapsed)
+                    elif status == 503:
+                        results['shed'] += 1
+                    else:
+                        results['errors'] += 1
+                if status == 503:
+                    # Refused past the hashing admission limit: back off as Retry-After asks
+                    time.sleep(1)
+
+        threads = [threading.Thread(target=worker, args=('login',)) for _ in range(clients)]
+        threads += [threading.Thread(target=worker, args=('list',)) for _ in range(crud_clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'mode': name,
+            'login_rps': round(len(results['login']) / duration, 1),
+            'login_p50_ms': round(percentile(results['login'], 50) * 1000, 1),
+            'login_p99_ms': round(percentile(results['login'], 99) * 1000, 1),
+            'list_rps': round(len(results['list']) / duration, 1),
+            'list_p50_ms': round(percentile(results['list'], 50) * 1000, 1),
+            'list_p99_ms': round(percentile(results['list'], 99) * 1000, 1),
+            'login_shed': results['shed'],
+            'errors': results['errors'],
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--crud-clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    rows = [run_mode(mode, args.clients, args.crud_clients, args.duration) for mode in args.modes]
+    columns = list(rows[0])
+    print(' '.join(f'{c:>13}' for c in columns))
+    for row in rows:
+        print(' '.join(f'{row[c]!s:>13}' for c in columns))
+    json.dump(rows, sys.stderr)
+    sys.stderr.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for GET /api/applications serialization.
+
+Compares, for the full list of one user's applications:
+    orm      -- load Application objects, to_dict() each, encode with the stdlib
+                json module (the previous list_applications + jsonify path)
+    columns  -- list_applications(): column tuples encoded with orjson
+    sparse   -- the same with ?fields=company,position,status
+
+Time is the best of --repeat runs; memory is the tracemalloc peak of one run.
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from werkzeug.datastructures import MultiDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stats import seed
+
+os.environ.setdefault('HASH_POOL', 'inline')
+os.environ.setdefault('EMAIL_DISPATCHER', 'none')
+
+
+def orm_path(db, Application, user_id):
+    applications = Application.query.filter_by(user_id=user_id) \
+        .order_by(Application.date_applied.desc(), Application.id.desc()).all()
+    body = json.dumps({
+        "success": True,
+        "applications": [application.to_dict() for application in applications],
+        "total": len(applications),
+        "next_cursor": None
+    }, separators=(',', ':')).encode('utf-8')
+    db.session.expunge_all()
+    return body
+
+
+def columns_path(db, list_applications, dumps, user_id, args):
+    return dumps({"success": True, **list_applications(db.session, user_id, args)})
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    size = len(fn())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='jobtracker-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import app
+    from models import db, Application, User
+    from queries import list_applications
+    from serialization import dumps
+
+    paths = {
+        'orm': lambda user_id: orm_path(db, Application, user_id),
+        'columns': lambda user_id: columns_path(db, list_applications, dumps, user_id, MultiDict()),
+        'sparse': lambda user_id: columns_path(db, list_applications, dumps, user_id,
+                                               MultiDict({'fields': 'company,position,status'})),
+    }
+
+    print(f"{'rows':>8} {'path':>8} {'time (ms)':>10} {'peak (MiB)':>11} {'body (KiB)':>11}")
+    with app.app_context():
+        for rows in args.sizes:
+            db.drop_all()
+            db.create_all()
+            user_id = seed(db, Application, User, rows)
+            for name, fn in paths.items():
+                elapsed, peak, size = measure(lambda: fn(user_id), args.repeat)
+                print(f"{rows:>8} {name:>8} {elapsed * 1000:>10.1f} {peak / 2**20:>11.1f} {size / 1024:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
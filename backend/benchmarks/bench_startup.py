@@ -0,0 +1,122 @@
+"""
+Cold start benchmark: import time and time to first response.
+
+Every measurement runs in a fresh process, as on a scale-to-zero host:
+    import          -- `import app` with DATABASE_URL pointing somewhere
+                       unreachable, so it also fails if importing touches
+                       the database
+    first response  -- from spawning the server to its first /api/health
+                       answer, then the first request that queries the
+                       database (a login)
+
+Reports the median of --runs and exits 1 if a median is over its budget, so
+CI can run it as the startup check:
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--servers gunicorn uvicorn]
+    python benchmarks/bench_startup.py --import-budget 800 --first-response-budget 2000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from common import BACKEND_DIR, call, free_port, migrate
+
+SERVERS = {
+    'gunicorn': ['gunicorn', 'app:app', '--workers', '1', '--worker-class', 'gthread', '--threads', '8',
+                 '--bind', '127.0.0.1:{port}'],
+    'uvicorn': ['uvicorn', 'asgi:app', '--no-access-log', '--port', '{port}'],
+}
+
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import app; print(time.perf_counter() - started)"
+UNREACHABLE_DATABASE = 'sqlite:////nonexistent-jobtracker-dir/jobtracker.db'
+
+
+def base_env(database_url):
+    return dict(os.environ, DATABASE_URL=database_url, EMAIL_DISPATCHER='none', RATE_LIMIT_BACKEND='none',
+                HASH_POOL='inline', BCRYPT_ROUNDS='4')
+
+
+def import_seconds():
+    """Seconds to import the app in a fresh interpreter, with no database to reach"""
+    result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=BACKEND_DIR,
+                            env=base_env(UNREACHABLE_DATABASE), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app failed without a database:\n{result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def first_response(server, database_url, timeout=60):
+    """(seconds from spawn to the first /api/health answer, seconds for the first database request)"""
+    port = free_port()
+    base = f'http://127.0.0.1:{port}/api'
+    command = [part.format(port=port) for part in SERVERS[server]]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=base_env(database_url),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f'{base}/health', timeout=timeout) as response:
+                    response.read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if process.poll() is not None:
+                    raise RuntimeError(f"{server} exited with status {process.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"{server} did not answer within {timeout}s")
+                time.sleep(0.005)
+        ready = time.perf_counter() - started
+        status, query = call(f'{base}/auth/login', {'email': 'nobody@example.com', 'password': 'wrong'})
+        if status != 401:
+            raise RuntimeError(f"First database request returned {status}")
+        return ready, query
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--servers', nargs='+', default=['gunicorn'], choices=list(SERVERS))
+    parser.add_argument('--import-budget', type=float, default=1500, help='ms, median import time')
+    parser.add_argument('--first-response-budget', type=float, default=3000,
+                        help='ms, median spawn-to-first-response time')
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    migrate(base_env(database_url))
+
+    rows = [{'measure': 'import', 'median_ms': round(statistics.median(
+        import_seconds() for _ in range(args.runs)) * 1000, 1), 'budget_ms': args.import_budget}]
+    for server in args.servers:
+        samples = [first_response(server, database_url) for _ in range(args.runs)]
+        rows.append({'measure': f'{server} first response',
+                     'median_ms': round(statistics.median(ready for ready, _ in samples) * 1000, 1),
+                     'budget_ms': args.first_response_budget})
+        rows.append({'measure': f'{server} first query',
+                     'median_ms': round(statistics.median(query for _, query in samples) * 1000, 1),
+                     'budget_ms': None})
+
+    over = [row for row in rows if row['budget_ms'] is not None and row['median_ms'] > row['budget_ms']]
+    print(f"{'measure':<26} {'median (ms)':>12} {'budget (ms)':>12}")
+    for row in rows:
+        budget = '' if row['budget_ms'] is None else row['budget_ms']
+        flag = '  OVER BUDGET' if row in over else ''
+        print(f"{row['measure']:<26} {row['median_ms']:>12} {budget:>12}{flag}")
+    json.dump(rows, sys.stderr)
+    sys.stderr.write('\n')
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark /api/stats: Python-side counting (previous implementation) versus
+the UserStats rollup read and the SQL-aggregated timeline/median breakdowns.
+
+Usage (from backend/):
+    python benchmarks/bench_stats.py [--sizes 10000 100000 1000000] [--repeat 5]
+
+Each size is seeded into a fresh SQLite database under a single user.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ['Applied', 'Phone Screen', 'Interview', 'Offer', 'Rejected']
+
+
+def legacy_statistics(Application, user_id):
+    """The original get_statistics body: load every row and count in Python"""
+    all_apps = Application.query.filter_by(user_id=user_id).all()
+    total = len(all_apps)
+    status_counts = {}
+    for app in all_apps:
+        status_counts[app.status] = status_counts.get(app.status, 0) + 1
+    responses = sum(1 for app in all_apps if app.status != 'Applied')
+    response_rate = round((responses / total * 100) if total > 0 else 0, 1)
+    return {
+        "total_applications": total,
+        "response_rate": response_rate,
+        "by_status": status_counts
+    }
+
+
+def seed(db, Application, User, rows):
+    """Insert one user with `rows` applications using a bulk insert"""
+    user = User(email='bench@example.com', name='Bench', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    now = datetime.utcnow()
+    batch = []
+    for i in range(rows):
+        applied = start + timedelta(days=rng.randrange(1500))
+        batch.append({
+            'user_id': user.id,
+            'company': f'Company {i % 5000}',
+            'position': 'Engineer',
+            'status': rng.choice(STATUSES),
+            'date_applied': applied,
+            'is_favorite': False,
+            'created_at': now,
+            'updated_at': datetime.combine(applied, datetime.min.time()) + timedelta(days=rng.randrange(60)),
+        })
+        if len(batch) == 10000:
+            db.session.execute(Application.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Application.__table__.insert(), batch)
+    db.session.commit()
+    return user.id
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='jobtracker-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import app
+    from models import db, Application, User
+    from stats import compute_statistics, reconcile_user_stats
+
+    print(f"{'rows':>10} {'legacy (ms)':>12} {'rollup (ms)':>12} {'breakdowns (ms)':>16}")
+    with app.app_context():
+        for rows in args.sizes:
+            db.drop_all()
+            db.create_all()
+            user_id = seed(db, Application, User, rows)
+            reconcile_user_stats()
+
+            legacy = best_of(lambda: (legacy_statistics(Application, user_id), db.session.expunge_all()), args.repeat)
+            rollup = best_of(lambda: compute_statistics(user_id), args.repeat)
+            breakdowns = best_of(lambda: compute_statistics(user_id, include=('timeline', 'median')), args.repeat)
+            print(f"{rows:>10} {legacy * 1000:>12.1f} {rollup * 1000:>12.2f} {breakdowns * 1000:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
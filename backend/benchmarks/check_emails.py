@@ -0,0 +1,167 @@
+"""
+Check the email outbox end to end against a local SMTP stand-in (aiosmtpd).
+
+    delivery  -- forgot-password for --users accounts queues one email each;
+                 one dispatch_batch() sends them all over one connection and
+                 every message arrives with its reset link
+    retry     -- with the SMTP server stopped, the connection is refused: the
+                 email stays pending, is not claimed again before its backoff,
+                 waits twice as long after a second failure, is marked failed
+                 after EMAIL_MAX_ATTEMPTS, and is delivered once the server
+                 is back
+    cleanup   -- finished rows hold no reset link, and OutboundEmail.purge()
+                 deletes them
+
+Runs on a temporary SQLite database. Needs aiosmtpd (requirements-dev.txt).
+
+Usage (from backend/):
+    python benchmarks/check_emails.py [--users 4]
+
+Exits 1 if any check fails.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from aiosmtpd.controller import Controller
+
+from common import free_port
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKOFF_SECONDS = 30
+MAX_ATTEMPTS = 3
+
+
+class Sink:
+    """aiosmtpd handler that keeps every message it receives"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode('utf-8', 'replace')))
+        return '250 Message accepted for delivery'
+
+
+def check(name, passed, detail=''):
+    print(f"{'ok' if passed else 'FAIL':>4}  {name}" + (f"  ({detail})" if detail and not passed else ''))
+    return passed
+
+
+def backoff(email, now):
+    """Seconds until the email is due again"""
+    return (email.next_attempt_at - now).total_seconds()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=4)
+    args = parser.parse_args()
+
+    port = free_port()
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'emails.db')}",
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(port),
+        'MAIL_USE_TLS': 'false',
+        'MAIL_DEFAULT_SENDER': 'noreply@jobtracker.test',
+        'EMAIL_DISPATCHER': 'none',
+        'EMAIL_BACKOFF_SECONDS': str(BACKOFF_SECONDS),
+        'EMAIL_MAX_ATTEMPTS': str(MAX_ATTEMPTS),
+        'RATE_LIMIT_BACKEND': 'none',
+        'HASH_POOL': 'inline',
+        'BCRYPT_ROUNDS': '4',
+    })
+
+    from app import app
+    from emails import email_dispatcher
+    from models import db, OutboundEmail
+    from schema import upgrade_database
+
+    upgrade_database(app)
+    client = app.test_client()
+    emails = [f'outbox{i}@example.com' for i in range(args.users + 1)]
+    for email in emails:
+        client.post('/api/auth/register', json={'email': email, 'password': 'Password1!', 'name': 'Outbox'})
+
+    def forgot(email):
+        response = client.post('/api/auth/forgot-password', json={'email': email})
+        assert response.status_code == 200, response.get_json()
+
+    sink = Sink()
+    server = Controller(sink, hostname='127.0.0.1', port=port)
+    results = []
+    with app.app_context():
+        # Delivery
+        server.start()
+        for email in emails[:-1]:
+            forgot(email)
+        claimed = email_dispatcher.dispatch_batch()
+        sent = OutboundEmail.query.filter_by(status=OutboundEmail.SENT).count()
+        recipients = sorted(rcpt for rcpts, _ in sink.messages for rcpt in rcpts)
+        results.append(check('one batch claims every queued email', claimed == args.users, f'claimed {claimed}'))
+        results.append(check('every email is delivered', recipients == sorted(emails[:-1]), f'got {recipients}'))
+        results.append(check('delivered rows are marked sent', sent == args.users, f'{sent} sent'))
+        results.append(check('messages carry the reset link',
+                             all('reset-password?token=' in body for _, body in sink.messages)))
+        results.append(check('sent rows no longer hold the reset link',
+                             OutboundEmail.query.filter(OutboundEmail.html != '').count() == 0))
+        server.stop()
+
+        # Retry with backoff on a refused connection
+        forgot(emails[-1])
+        email_dispatcher.dispatch_batch()
+        row = OutboundEmail.query.filter_by(recipient=emails[-1]).one()
+        first = backoff(row, datetime.utcnow())
+        results.append(check('a refused connection leaves the email pending',
+                             row.status == OutboundEmail.PENDING and row.attempts == 1 and row.last_error,
+                             f'{row.status}, {row.attempts} attempt(s)'))
+        results.append(check('the first retry waits EMAIL_BACKOFF_SECONDS',
+                             BACKOFF_SECONDS - 5 < first <= BACKOFF_SECONDS, f'{first:.1f}s'))
+        results.append(check('an email is not claimed before its backoff',
+                             email_dispatcher.dispatch_batch() == 0))
+
+        for attempt in range(2, MAX_ATTEMPTS + 1):
+            row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            email_dispatcher.dispatch_batch()
+            db.session.refresh(row)
+            if attempt == 2:
+                second = backoff(row, datetime.utcnow())
+                results.append(check('the second retry waits twice as long',
+                                     2 * BACKOFF_SECONDS - 5 < second <= 2 * BACKOFF_SECONDS, f'{second:.1f}s'))
+        results.append(check('EMAIL_MAX_ATTEMPTS failures mark the email failed and blank it',
+                             row.status == OutboundEmail.FAILED and row.attempts == MAX_ATTEMPTS and row.html == '',
+                             f'{row.status}, {row.attempts} attempt(s)'))
+
+        # The server is back: a requeued email goes out
+        server = Controller(sink, hostname='127.0.0.1', port=port)
+        server.start()
+        row.status = OutboundEmail.PENDING
+        row.attempts = 0
+        row.html = '<p>Requeued</p>'
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        email_dispatcher.dispatch_batch()
+        db.session.refresh(row)
+        server.stop()
+        results.append(check('the email is delivered once SMTP is back',
+                             row.status == OutboundEmail.SENT and [emails[-1]] in [r for r, _ in sink.messages],
+                             row.status))
+
+        # The purge job deletes finished rows past their retention
+        purged = OutboundEmail.purge(datetime.utcnow() + timedelta(seconds=1))
+        results.append(check('purge deletes sent and failed rows', purged == args.users + 1 and
+                             OutboundEmail.query.count() == 0, f'purged {purged}'))
+
+    failures = results.count(False)
+    print(f"{failures} of {len(results)} checks failed" if failures else "All email checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Check that the hot queries use the indexes designed for them (migrations 0005-0010).
+
+Seeds a database (seed_data.py), runs ANALYZE, then runs each query shape
+below through the real query code, captures the SQL it sends, and EXPLAINs
+that statement. A check fails if the plan does not name the expected index
+or has to sort rows the index should already return in order.
+
+Usage (from backend/):
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --database-url postgresql://localhost/jobtracker_plans
+
+The database must be empty; exits 1 if any check fails.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+from werkzeug.datastructures import MultiDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed_data import seed
+
+# Plan fragments that mean "rows were sorted after being read"
+SORT_MARKERS = {
+    'sqlite': 'USE TEMP B-TREE FOR ORDER BY',
+    'postgresql': 'Sort',
+}
+# How each dialect names primary key indexes
+PRIMARY_KEYS = {
+    'sqlite': {'applications': 'INTEGER PRIMARY KEY', 'user_stats': 'sqlite_autoindex_user_stats_1',
+               'analytics_snapshots': 'INTEGER PRIMARY KEY'},
+    'postgresql': {'applications': 'applications_pkey', 'user_stats': 'user_stats_pkey',
+                   'analytics_snapshots': 'analytics_snapshots_pkey'},
+}
+
+
+def seed_side_tables(db, PasswordResetToken, OutboundEmail, users):
+    """Give the planner realistic row counts for the token and outbox tables"""
+    now = datetime.utcnow()
+    db.session.execute(PasswordResetToken.__table__.insert(), [
+        {'user_id': (i % users) + 1, 'token_hash': PasswordResetToken.hash_token(f'token-{i}'), 'created_at': now,
+         'expires_at': now + timedelta(hours=1), 'used': i % 2 == 0}
+        for i in range(users * 20)
+    ])
+    db.session.execute(OutboundEmail.__table__.insert(), [
+        {'recipient': f'bench{i % users}@example.com', 'subject': 'Reset', 'html': '<p>Reset</p>',
+         'status': OutboundEmail.SENT, 'attempts': 1, 'created_at': now, 'next_attempt_at': now, 'sent_at': now}
+        for i in range(users * 20)
+    ])
+    db.session.commit()
+
+
+def checks(dialect):
+    """(name, acceptable indexes, must not sort, callable(session, user_id))"""
+    from analytics import changed_users, read_snapshot
+    from board import board_columns, move_card
+    from history import time_in_stage, transitions
+    from models import Application, OutboundEmail, PasswordResetToken, User
+    from queries import changed_rows, deleted_ids, filter_applications, get_user_application, list_applications
+    from stats import status_counts, timeline
+    from transfer import export_query
+
+    def listing(**args):
+        return lambda session, user_id: list_applications(session, user_id, MultiDict(args))
+
+    def export(session, user_id):
+        query = export_query(filter_applications(session.query(Application), user_id, MultiDict()))
+        return query.order_by(Application.id).limit(1000).all()
+
+    def outbox_claim(session, user_id):
+        return session.query(OutboundEmail.id).filter(
+            OutboundEmail.status == OutboundEmail.PENDING,
+            OutboundEmail.next_attempt_at <= datetime.utcnow()
+        ).order_by(OutboundEmail.next_attempt_at).limit(50).all()
+
+    def board_page_two(session, user_id):
+        """Follow one column's next_cursor: the second page must continue the first"""
+        first = board_columns(session, user_id, MultiDict({'status': 'Interview', 'limit': '5'}))[0]
+        if not first['next_cursor']:
+            raise RuntimeError("board column has no second page")
+        second = board_columns(session, user_id, MultiDict(
+            {'status': 'Interview', 'limit': '5', 'cursor': first['next_cursor']}))[0]
+        first_ids = {card['id'] for card in first['applications']}
+        if not second['applications'] or first_ids & {card['id'] for card in second['applications']}:
+            raise RuntimeError("board page 2 does not continue page 1")
+
+    recently = datetime.utcnow() - timedelta(hours=1)
+    pk = PRIMARY_KEYS[dialect]
+    return [
+        ('list, default sort', 'ix_applications_user_date_id', True, listing(limit='50')),
+        ('list, ascending', 'ix_applications_user_date_id', True, listing(limit='50', order='asc')),
+        ('list, filtered by status', 'ix_applications_user_status_date_id', True,
+         listing(limit='50', status='Interview')),
+        ('detail (id, user_id)', pk['applications'], False,
+         lambda session, user_id: get_user_application(session, user_id, 1)),
+        ('export by id', 'ix_applications_user_id_id', True, export),
+        ('stats rollup', pk['user_stats'], False, lambda session, user_id: status_counts(user_id, session)),
+        # Either (user_id, ...) index covers the date_applied scan
+        ('stats timeline', ('ix_applications_user_date_id', 'ix_applications_user_status_date_id'), False,
+         lambda session, user_id: timeline(user_id, 'month', session)),
+        # The stage percentiles sort stays by duration, which no index can avoid
+        ('status transitions', 'ix_application_events_user_app_time', False,
+         lambda session, user_id: transitions(user_id, session)),
+        ('time in stage', 'ix_application_events_user_app_time', False,
+         lambda session, user_id: time_in_stage(user_id, session)),
+        # The board sorts the few rows of its per-column pages into column order
+        ('board, all columns', 'ix_applications_user_status_rank', False,
+         lambda session, user_id: board_columns(session, user_id, MultiDict({'limit': '20'}))),
+        ('board, one column', 'ix_applications_user_status_rank', True,
+         lambda session, user_id: board_columns(session, user_id, MultiDict({'status': 'Interview'}))),
+        ('board, column page 2', 'ix_applications_user_status_rank', True, board_page_two),
+        ('board move', pk['applications'], False,
+         lambda session, user_id: move_card(session, user_id, 1, 'Offer')),
+        ('analytics snapshot', pk['analytics_snapshots'], False,
+         lambda session, user_id: read_snapshot(session, user_id)),
+        # The last statement finds users with rows changed since the last refresh;
+        # with few users SQLite may skip-scan the (user_id, updated_at) index instead
+        ('analytics refresh, changed users', ('ix_applications_updated_user', 'ix_applications_user_updated'), False,
+         lambda session, user_id: changed_users(session, recently)),
+        ('sync, changed rows', 'ix_applications_user_updated', True,
+         lambda session, user_id: changed_rows(session, user_id, recently, 1001)),
+        ('sync, deleted ids', 'ix_application_tombstones_user_deleted', False,
+         lambda session, user_id: deleted_ids(session, user_id, recently)),
+        ('login by email', 'ix_users_email', False,
+         lambda session, user_id: User.query.filter_by(email='bench1@example.com').first()),
+        ('reset token lookup', 'ix_password_reset_tokens_token_hash', False,
+         lambda session, user_id: PasswordResetToken.find_valid('token-7')),
+        ('reset token revocation', 'ix_password_reset_tokens_user_id', False,
+         lambda session, user_id: PasswordResetToken.revoke(user_id)),
+        # The last statement is the pass over used, unexpired tokens
+        ('reset token purge', 'ix_password_reset_tokens_expires_at', False,
+         lambda session, user_id: PasswordResetToken.purge()),
+        ('outbox claim', 'ix_outbound_emails_status_next_attempt', True, outbox_claim),
+        # The last statement is the pass over failed rows
+        ('outbox purge', 'ix_outbound_emails_status_next_attempt', False,
+         lambda session, user_id: OutboundEmail.purge(recently)),
+    ]
+
+
+def capture_last_statement(engine, fn):
+    """Run fn and return the (statement, parameters) of its last SQL statement"""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return captured[-1]
+
+
+def explain(session, dialect, statement, parameters):
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = session.connection().exec_driver_sql(prefix + statement, parameters).all()
+    # SQLite returns (id, parent, notused, detail); PostgreSQL one text column
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--apps', type=int, default=2000, help='applications per user')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+    seed(args.users, args.apps)
+
+    from app import app
+    from models import db, OutboundEmail, PasswordResetToken
+
+    failures = 0
+    with app.app_context():
+        seed_side_tables(db, PasswordResetToken, OutboundEmail, args.users)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        dialect = db.engine.dialect.name
+
+        for name, indexes, no_sort, fn in checks(dialect):
+            indexes = (indexes,) if isinstance(indexes, str) else indexes
+            statement, parameters = capture_last_statement(db.engine, lambda: fn(db.session, 1))
+            plan = explain(db.session, dialect, statement, parameters)
+            db.session.rollback()
+            problems = []
+            if not any(index in plan for index in indexes):
+                problems.append(f"expected {' or '.join(indexes)}")
+            if no_sort and SORT_MARKERS[dialect] in plan:
+                problems.append('sorts rows the index should return in order')
+            print(f"{'FAIL' if problems else 'ok':>4}  {name}")
+            if problems:
+                failures += 1
+                print(f"      {'; '.join(problems)}")
+                print('      ' + plan.replace('\n', '\n      '))
+
+    print(f"{failures} of {len(checks(dialect))} checks failed" if failures else "All query plans use their indexes")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
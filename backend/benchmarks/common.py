@@ -0,0 +1,61 @@
+"""
+Helpers shared by the HTTP benchmarks in this directory
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def migrate(env):
+    """Bring the database at env['DATABASE_URL'] to the latest migration"""
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'upgrade-db'], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def call(url, body=None, token=None, method=None):
+    """Issue a request and return (status, seconds)"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    started = time.perf_counter()
+    try:
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def wait_until_up(base, attempts=100):
+    """Poll /health until the server answers"""
+    for _ in range(attempts):
+        try:
+            call(f'{base}/health')
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {base} did not start")
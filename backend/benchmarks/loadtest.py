@@ -0,0 +1,355 @@
+"""
+Load test the whole API with scripted mixed workloads and concurrency ramps.
+
+    run      -- seed a fresh database, start a server (or target --url), ramp
+                through --concurrency levels and write JSON results
+    compare  -- compare two result files; exits 1 if the candidate regressed
+
+Each virtual user logs in as one of the seeded users, then loops over a
+weighted mix of operations for --duration seconds per ramp step:
+
+    login   POST /api/auth/login
+    list    GET  /api/applications?limit=50 (a quarter filtered by status)
+    stats   GET  /api/stats
+    detail  GET  /api/applications/:id
+    create  POST /api/applications
+    update  PUT  /api/applications/:id   (notes)
+    move    POST /api/board/move         (a kanban drag: a random card lands
+                                          below a random card of a random column)
+
+Virtual users beyond --users share accounts, so a move can race another
+user's drag and get 409; that counts as an error and the mover reloads its
+board. Results hold p50/p95/p99 latency (ms), RPS and errors per operation and in
+total for every concurrency step.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py run --output baseline.json
+    python benchmarks/loadtest.py run --workload read --concurrency 1 8 32 --output after.json
+    python benchmarks/loadtest.py run --url http://localhost:5000/api --output staging.json
+    python benchmarks/loadtest.py compare baseline.json after.json --threshold 10
+
+With --url the target must already hold data from seed_data.py.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from common import BACKEND_DIR, call, free_port, percentile, wait_until_up
+from seed_data import PASSWORD, STATUSES, user_email
+
+WORKLOADS = {
+    'mixed': {'login': 2, 'list': 40, 'stats': 15, 'detail': 15, 'create': 8, 'update': 10, 'move': 10},
+    'read': {'list': 60, 'stats': 20, 'detail': 20},
+    'write': {'create': 40, 'update': 30, 'move': 30},
+    'login': {'login': 1},
+}
+
+SERVERS = {
+    'gunicorn': ['gunicorn', 'app:app', '--timeout', '120', '--workers', '2',
+                 '--worker-class', 'gthread', '--threads', '8', '--bind', '127.0.0.1:{port}'],
+    'uvicorn': ['uvicorn', 'asgi:app', '--workers', '2', '--no-access-log', '--port', '{port}'],
+}
+
+# Metrics `compare` can check, with the direction that counts as worse. p99
+# over a short step is noisy, so only p95 and RPS are checked by default.
+WORSE_IF = {'p50_ms': 'higher', 'p95_ms': 'higher', 'p99_ms': 'higher', 'rps': 'lower'}
+DEFAULT_METRICS = ['p95_ms', 'rps']
+
+
+def login(base, email):
+    req = urllib.request.Request(f'{base}/auth/login',
+                                 data=json.dumps({'email': email, 'password': PASSWORD}).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=120) as response:
+        return json.loads(response.read())['access_token']
+
+
+def application_ids(base, token):
+    req = urllib.request.Request(f'{base}/applications?limit=200&fields=id',
+                                 headers={'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(req, timeout=120) as response:
+        return [item['id'] for item in json.loads(response.read())['applications']]
+
+
+def board_columns(base, token):
+    """{status: [card ids in board order]} for the first 100 cards of each column"""
+    req = urllib.request.Request(f'{base}/board?limit=100&fields=id',
+                                 headers={'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(req, timeout=120) as response:
+        columns = json.loads(response.read())['columns']
+    return {column['status']: [card['id'] for card in column['applications']] for column in columns}
+
+
+class VirtualUser:
+    """One client: a seeded account, its application ids and a private RNG"""
+
+    def __init__(self, base, index, users):
+        self.base = base
+        self.rng = random.Random(index)
+        self.email = user_email(index % users)
+        self.token = login(base, self.email)
+        self.ids = application_ids(base, self.token) or [0]
+        self.columns = board_columns(base, self.token)
+
+    def run(self, op):
+        base, rng = self.base, self.rng
+        if op == 'login':
+            return call(f'{base}/auth/login', {'email': self.email, 'password': PASSWORD})
+        if op == 'list':
+            query = f'&status={urllib.parse.quote(rng.choice(STATUSES))}' if rng.random() < 0.25 else ''
+            return call(f'{base}/applications?limit=50{query}', token=self.token)
+        if op == 'stats':
+            return call(f'{base}/stats', token=self.token)
+        if op == 'detail':
+            return call(f'{base}/applications/{rng.choice(self.ids)}', token=self.token)
+        if op == 'create':
+            return call(f'{base}/applications', {
+                'company': f'Load Test {rng.randrange(10000)}', 'position': 'Engineer',
+                'status': 'Applied', 'date_applied': '2024-06-01'
+            }, token=self.token)
+        if op == 'update':
+            return call(f'{base}/applications/{rng.choice(self.ids)}',
+                        {'notes': f'load test note {rng.randrange(10000)}'}, token=self.token, method='PUT')
+        if op == 'move':
+            return self.move()
+        raise ValueError(f"Unknown operation: {op}")
+
+    def move(self):
+        """Drag a random card below a random card of a random column (or to its top)"""
+        rng = self.rng
+        card_id = rng.choice([card for cards in self.columns.values() for card in cards] or self.ids)
+        status = rng.choice(STATUSES)
+        column = [card for card in self.columns.get(status, []) if card != card_id]
+        after_id = rng.choice(column + [None])
+        result = call(f'{self.base}/board/move', {'id': card_id, 'status': status, 'after_id': after_id},
+                      token=self.token, method='POST')
+        if result[0] == 200:
+            for cards in self.columns.values():
+                if card_id in cards:
+                    cards.remove(card_id)
+            column.insert(column.index(after_id) + 1 if after_id is not None else 0, card_id)
+            self.columns[status] = column
+        elif result[0] == 409:
+            self.columns = board_columns(self.base, self.token)
+        return result
+
+
+def summarize(latencies, errors, duration):
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_step(base, workload, concurrency, users, duration, warmup):
+    """Drive `concurrency` virtual users for warmup + duration seconds"""
+    vusers = [VirtualUser(base, i, users) for i in range(concurrency)]
+    ops = [op for op, weight in WORKLOADS[workload].items() for _ in range(weight)]
+    latencies = {op: [] for op in WORKLOADS[workload]}
+    errors = {op: 0 for op in WORKLOADS[workload]}
+    lock = threading.Lock()
+    measure_from = time.monotonic() + warmup
+    deadline = measure_from + duration
+
+    def worker(vuser):
+        while True:
+            op = vuser.rng.choice(ops)
+            try:
+                status, elapsed = vuser.run(op)
+            except OSError:
+                # Connection refused/reset under overload counts as an error
+                status, elapsed = None, 0.0
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            if now < measure_from:
+                continue
+            with lock:
+                if status in (200, 201):
+                    latencies[op].append(elapsed)
+                else:
+                    errors[op] += 1
+
+    threads = [threading.Thread(target=worker, args=(vuser,)) for vuser in vusers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    every = [value for values in latencies.values() for value in values]
+    return {
+        'concurrency': concurrency,
+        'total': summarize(every, sum(errors.values()), duration),
+        'operations': {op: summarize(latencies[op], errors[op], duration) for op in latencies},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(args):
+    """Seed a fresh database in a child process and start the server on it"""
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+               EMAIL_DISPATCHER='none', RATE_LIMIT_BACKEND='none')
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'benchmarks', 'seed_data.py'),
+                    '--users', str(args.users), '--apps', str(args.apps),
+                    '--bcrypt-rounds', str(args.bcrypt_rounds)],
+                   cwd=BACKEND_DIR, env=env, check=True)
+    port = free_port()
+    command = [part.format(port=port) for part in SERVERS[args.server]]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}/api'
+    wait_until_up(base)
+    return server, base
+
+
+def print_results(results):
+    print(f"{'conc':>5} {'op':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for step in results['steps']:
+        for op, summary in [('total', step['total'])] + sorted(step['operations'].items()):
+            print(f"{step['concurrency']:>5} {op:>8} {summary['rps']:>8} {summary['p50_ms']:>8} "
+                  f"{summary['p95_ms']:>8} {summary['p99_ms']:>8} {summary['errors']:>7}")
+
+
+def compare(baseline, candidate, threshold, metrics=DEFAULT_METRICS, min_count=20):
+    """Return (rows, regressions) comparing matching steps and operations
+
+    Operations with fewer than `min_count` samples on either side are shown
+    but never counted as regressions; their percentiles are noise.
+    """
+    rows, regressions = [], []
+    base_steps = {step['concurrency']: step for step in baseline['steps']}
+    for step in candidate['steps']:
+        base_step = base_steps.get(step['concurrency'])
+        if base_step is None:
+            continue
+        pairs = [('total', base_step['total'], step['total'])]
+        pairs += [(op, base_step['operations'][op], summary)
+                  for op, summary in sorted(step['operations'].items()) if op in base_step['operations']]
+        for op, before, after in pairs:
+            for metric in metrics:
+                worse = WORSE_IF[metric]
+                if not before[metric]:
+                    continue
+                change = (after[metric] - before[metric]) / before[metric] * 100
+                regressed = (change > threshold if worse == 'higher' else change < -threshold) \
+                    and min(before['count'], after['count']) >= min_count
+                row = (step['concurrency'], op, metric, before[metric], after[metric], change, regressed)
+                rows.append(row)
+                if regressed:
+                    regressions.append(row)
+    return rows, regressions
+
+
+def cmd_run(args):
+    server = None
+    base = args.url
+    if base is None:
+        server, base = start_server(args)
+    try:
+        results = {
+            'revision': git_revision(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'config': {
+                'server': args.server if args.url is None else args.url,
+                'workload': args.workload,
+                'users': args.users,
+                'apps_per_user': args.apps,
+                'duration': args.duration,
+                'warmup': args.warmup,
+            },
+            'steps': [],
+        }
+        for concurrency in args.concurrency:
+            results['steps'].append(run_step(base, args.workload, concurrency, args.users,
+                                             args.duration, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return report_comparison(json.load(f), results, args.threshold, args.metrics)
+    return 0
+
+
+def report_comparison(baseline, candidate, threshold, metrics):
+    rows, regressions = compare(baseline, candidate, threshold, metrics)
+    print(f"{'conc':>5} {'op':>8} {'metric':>7} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for concurrency, op, metric, before, after, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{concurrency:>5} {op:>8} {metric:>7} {before:>10} {after:>10} {change:>+7.1f}%{flag}")
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {threshold}%")
+        return 1
+    print(f"No regressions beyond {threshold}%")
+    return 0
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    return report_comparison(baseline, candidate, args.threshold, args.metrics)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run a load test')
+    run.add_argument('--workload', choices=list(WORKLOADS), default='mixed')
+    run.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32])
+    run.add_argument('--duration', type=float, default=20, help='measured seconds per step')
+    run.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before each step')
+    run.add_argument('--users', type=int, default=50)
+    run.add_argument('--apps', type=int, default=1000, help='applications per user')
+    run.add_argument('--server', choices=list(SERVERS), default='gunicorn')
+    run.add_argument('--database-url', help='seed and serve this database instead of a temporary SQLite file')
+    run.add_argument('--url', help='test a running server (e.g. http://host:5000/api) instead of starting one')
+    run.add_argument('--bcrypt-rounds', type=int, default=4)
+    run.add_argument('--output', help='write JSON results here')
+    run.add_argument('--baseline', help='compare against this result file and fail on regression')
+    run.add_argument('--threshold', type=float, default=10, help='allowed regression in percent')
+    run.add_argument('--metrics', nargs='+', choices=list(WORSE_IF), default=DEFAULT_METRICS)
+    run.set_defaults(handler=cmd_run)
+
+    diff = commands.add_parser('compare', help='compare two result files')
+    diff.add_argument('baseline')
+    diff.add_argument('candidate')
+    diff.add_argument('--threshold', type=float, default=10, help='allowed regression in percent')
+    diff.add_argument('--metrics', nargs='+', choices=list(WORSE_IF), default=DEFAULT_METRICS)
+    diff.set_defaults(handler=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
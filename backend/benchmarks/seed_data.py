@@ -0,0 +1,116 @@
+"""
+Seed a database with synthetic users and applications for load testing.
+
+Users are bench0@example.com, bench1@example.com, ... all sharing one
+password, hashed once at --bcrypt-rounds (start the server with the same
+BCRYPT_ROUNDS or every first login will rehash). Application data is drawn
+from a seeded RNG, so the same arguments always produce the same rows.
+
+Usage (from backend/):
+    python benchmarks/seed_data.py --users 50 --apps 1000 \\
+        [--database-url postgresql://localhost/jobtracker_bench]
+
+Without --database-url, DATABASE_URL or the app's SQLite default is used.
+The target database should be empty; tables are created if missing.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'benchmark'
+STATUSES = ['Applied', 'Phone Screen', 'Interview', 'Offer', 'Rejected']
+STATUS_WEIGHTS = [50, 15, 12, 3, 20]
+POSITIONS = ['Software Engineer', 'Backend Engineer', 'Data Engineer', 'Frontend Developer',
+             'Site Reliability Engineer', 'Product Manager', 'Data Scientist', 'QA Engineer']
+LOCATIONS = ['Remote', 'London', 'Berlin', 'New York', 'San Francisco', 'Toronto', 'Accra', None]
+NOTE_WORDS = ('referral recruiter onsite python postgres react kubernetes salary visa '
+              'follow up take home system design culture fit offer deadline').split()
+BATCH_SIZE = 5000
+
+
+def user_email(index):
+    return f'bench{index}@example.com'
+
+
+def seed(users, apps_per_user, rounds=4, rng_seed=42):
+    """Insert users, applications and their status history; returns row counts"""
+    os.environ.setdefault('HASH_POOL', 'inline')
+    os.environ.setdefault('EMAIL_DISPATCHER', 'none')
+    from app import app
+    from models import db, Application, User
+    from history import backfill_events
+    from schema import upgrade_database
+    from stats import reconcile_user_stats
+
+    upgrade_database(app)
+
+    rng = random.Random(rng_seed)
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    now = datetime.utcnow()
+    start = date.today() - timedelta(days=730)
+
+    with app.app_context():
+        user_ids = db.session.execute(
+            User.__table__.insert().returning(User.__table__.c.id, sort_by_parameter_order=True),
+            [{'email': user_email(i), 'name': f'Bench {i}', 'password_hash': password_hash, 'created_at': now}
+             for i in range(users)]
+        ).scalars().all()
+
+        batch = []
+        for user_id in user_ids:
+            for i in range(apps_per_user):
+                applied = start + timedelta(days=rng.randrange(730))
+                batch.append({
+                    'user_id': user_id,
+                    'company': f'Company {rng.randrange(5000)}',
+                    'position': rng.choice(POSITIONS),
+                    'status': rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                    'date_applied': applied,
+                    'job_url': f'https://jobs.example.com/{user_id}/{i}',
+                    'location': rng.choice(LOCATIONS),
+                    'salary_range': rng.choice([None, '$80k - $100k', '$100k - $130k', '$130k - $160k']),
+                    'notes': ' '.join(rng.choices(NOTE_WORDS, k=rng.randrange(0, 12))) or None,
+                    'is_favorite': rng.random() < 0.1,
+                    'board_rank': i * Application.RANK_GAP,
+                    'created_at': now,
+                    'updated_at': datetime.combine(applied, datetime.min.time()) + timedelta(days=rng.randrange(60)),
+                })
+                if len(batch) == BATCH_SIZE:
+                    db.session.execute(Application.__table__.insert(), batch)
+                    batch = []
+        if batch:
+            db.session.execute(Application.__table__.insert(), batch)
+        backfill_events()
+        db.session.commit()
+        reconcile_user_stats()
+
+    return {'users': len(user_ids), 'applications': len(user_ids) * apps_per_user}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--apps', type=int, default=1000, help='applications per user')
+    parser.add_argument('--database-url')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    started = time.perf_counter()
+    counts = seed(args.users, args.apps, args.bcrypt_rounds, args.seed)
+    print(f"Seeded {counts['users']} users and {counts['applications']} applications "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
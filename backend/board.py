@@ -0,0 +1,188 @@
+"""
+Kanban board: status columns with a persistent card order
+
+A column lists the user's applications with one status by (board_rank, id).
+Ranks are integers spaced Application.RANK_GAP apart, so dropping a card
+between two neighbours gives it the midpoint of their ranks and rewrites
+that card alone. When a gap is used up the column is respaced with one
+UPDATE and the move retried. New cards, and cards whose status changes
+outside the board, go on top of their column (Application.top_rank).
+
+Column counts come from the UserStats rollup and every page is a keyset
+range on ix_applications_user_status_rank, so a board costs the same
+whatever the column sizes.
+"""
+
+from sqlalchemy import and_, func, literal, or_, select, union_all, update
+from sqlalchemy.orm import aliased
+from datetime import datetime
+from models import Application
+from queries import decode_cursor, encode_cursor, parse_fields
+from stats import status_counts
+
+BOARD_STATUSES = ('Applied', 'Phone Screen', 'Interview', 'Offer', 'Rejected')
+DEFAULT_CARDS = 20
+MAX_CARDS = 100
+
+
+class BoardConflict(Exception):
+    """The board changed under the client; it should reload and retry"""
+
+
+def column_page(user_id, position, status, fields, limit, after=None):
+    """Select one page of a column: the fields, board_rank and the column position"""
+    A = Application
+    query = select(*[getattr(A, name) for name in fields], A.board_rank, literal(position).label('board_column')) \
+        .where(A.user_id == user_id, A.status == status)
+    if after is not None:
+        rank, row_id = after
+        query = query.where(or_(A.board_rank > rank, and_(A.board_rank == rank, A.id > row_id)))
+    return query.order_by(A.board_rank, A.id).limit(limit + 1)
+
+
+def board_columns(session, user_id, args):
+    """Return the board payload: [{status, count, applications, next_cursor}]
+
+    `args` is a werkzeug MultiDict of query parameters:
+        limit -- cards per column (default DEFAULT_CARDS)
+        status, cursor -- one column only, continuing from next_cursor
+        fields -- comma-separated subset of APPLICATION_FIELDS
+
+    Without status the columns are BOARD_STATUSES followed by any other
+    status the user has. Every column page comes back from one UNION ALL
+    query. Raises ValueError for invalid parameters.
+    """
+    fields = parse_fields(args.get('fields'))
+    limit = max(1, min(args.get('limit', DEFAULT_CARDS, type=int), MAX_CARDS))
+    counts, _ = status_counts(user_id, session)
+
+    after = None
+    if args.get('status'):
+        statuses = [args['status']]
+        if args.get('cursor'):
+            after = decode_cursor(args['cursor'], 'board_rank')
+    elif args.get('cursor'):
+        raise ValueError("cursor requires status")
+    else:
+        statuses = list(BOARD_STATUSES) + sorted(status for status in counts if status not in BOARD_STATUSES)
+
+    pages = [column_page(user_id, position, status, fields, limit, after) for position, status in enumerate(statuses)]
+    if len(pages) == 1:
+        rows = session.execute(pages[0]).all()
+    else:
+        combined = union_all(*[select(page.subquery()) for page in pages]).subquery()
+        rows = session.execute(
+            select(combined).order_by(combined.c.board_column, combined.c.board_rank, combined.c.id)
+        ).all()
+
+    cards = [[] for _ in statuses]
+    for row in rows:
+        cards[row.board_column].append(row)
+
+    columns = []
+    for status, column_rows in zip(statuses, cards):
+        next_cursor = None
+        if len(column_rows) > limit:
+            column_rows = column_rows[:limit]
+            last = column_rows[-1]
+            next_cursor = encode_cursor('board_rank', last.board_rank, last.id)
+        columns.append({
+            "status": status,
+            "count": counts.get(status, 0),
+            "applications": [dict(zip(fields, row)) for row in column_rows],
+            "next_cursor": next_cursor
+        })
+    return columns
+
+
+def rank_between(lower, upper):
+    """A rank strictly between two neighbours' (None: end of the column),
+    or None when they are adjacent and the column needs respacing"""
+    gap = Application.RANK_GAP
+    if lower is None and upper is None:
+        return 0
+    if lower is None:
+        return upper - gap
+    if upper is None:
+        return lower + gap
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+def _neighbours(session, user_id, card_id, status, after_id):
+    """Read the card's (status, is_favorite) and the ranks around the drop point
+
+    One query: the card placed above the drop point (after_id, None for the
+    top of the column) and the first card below it, skipping the moving card.
+    """
+    A = Application
+    Above = aliased(Application)
+    Below = aliased(Application)
+    below = select(func.min(Below.board_rank)) \
+        .where(Below.user_id == user_id, Below.status == status, Below.id != card_id)
+    if after_id is None:
+        lower = literal(None)
+    else:
+        lower = select(Above.board_rank) \
+            .where(Above.id == after_id, Above.user_id == user_id, Above.status == status) \
+            .scalar_subquery()
+        below = below.where(or_(Below.board_rank > lower, and_(Below.board_rank == lower, Below.id > after_id)))
+    return session.execute(
+        select(A.status, A.is_favorite, lower.label('lower'), below.scalar_subquery().label('upper'))
+        .where(A.id == card_id, A.user_id == user_id)
+    ).first()
+
+
+def respace_column(session, user_id, status):
+    """Renumber a column's ranks RANK_GAP apart, keeping its order, in one UPDATE"""
+    A = Application
+    ordered = select(
+        A.id,
+        (func.row_number().over(order_by=(A.board_rank, A.id)) * A.RANK_GAP).label('rank')
+    ).where(A.user_id == user_id, A.status == status).subquery()
+    session.execute(
+        update(A).where(A.id == ordered.c.id).values(board_rank=ordered.c.rank)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def move_card(session, user_id, card_id, status, after_id=None):
+    """Move a card to `status`, directly below card after_id (None: on top)
+
+    The status change and the new rank are written by one UPDATE, guarded by
+    the status that was read, so a concurrent change raises BoardConflict
+    instead of corrupting the rollup. Returns (status_before, is_favorite),
+    or None if the card does not exist. The caller records the status
+    change and commits.
+
+    `status` must be one of the board's columns: BOARD_STATUSES or a status
+    the user already has. Anything else raises ValueError rather than
+    opening a new column.
+    """
+    if status not in BOARD_STATUSES and status not in status_counts(user_id, session)[0]:
+        raise ValueError(f"Unknown status: {status}")
+    if after_id == card_id:
+        raise ValueError("A card cannot be placed after itself")
+    found = _neighbours(session, user_id, card_id, status, after_id)
+    if found is None:
+        return None
+    if after_id is not None and found.lower is None:
+        raise BoardConflict(f"Application {after_id} is not in column {status}")
+
+    rank = rank_between(found.lower, found.upper)
+    if rank is None:
+        respace_column(session, user_id, status)
+        found = _neighbours(session, user_id, card_id, status, after_id)
+        rank = rank_between(found.lower, found.upper)
+
+    A = Application
+    moved = session.execute(
+        update(A)
+        .where(A.id == card_id, A.user_id == user_id, A.status == found.status)
+        .values(status=status, board_rank=rank, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved:
+        raise BoardConflict(f"Application {card_id} changed while it was being moved")
+    return found.status, found.is_favorite
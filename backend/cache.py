@@ -0,0 +1,251 @@
+"""
+Per-user response cache with ETag support for the read endpoints
+
+Cached bodies are keyed by user, the user's data version and the request URL.
+Every write endpoint bumps the user's version, which orphans all of that
+user's entries at once and changes the ETag clients revalidate against.
+
+UserCache keeps the profiles of authenticated users for the views that need
+one (/api/auth/me and the admin check), so they mostly skip the users table.
+Other protected endpoints only verify the token and never load the user.
+
+Backends:
+    memory -- in-process LRU with TTL; only coherent within one process
+    redis  -- shared across workers (CACHE_URL=redis://...)
+    none   -- caching disabled (default)
+"""
+
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, request
+from flask_jwt_extended import get_jwt, get_jwt_identity
+import hashlib
+import threading
+import time
+
+
+class CacheMetrics:
+    """Thread-safe hit/miss/eviction counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'not_modified': self.not_modified,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0
+        }
+
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry TTL
+
+    Versions live in their own dict so LRU pressure never evicts them.
+    """
+
+    def __init__(self, metrics, max_entries=1024, ttl=300):
+        self.metrics = metrics
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.incr('evictions')
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_version(self, user_id):
+        with self._lock:
+            # Seed from the clock so a restart never reissues an old ETag
+            return self._versions.setdefault(user_id, time.time_ns())
+
+    def bump_version(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, time.time_ns()) + 1
+
+
+class RedisBackend:
+    """Redis-backed cache shared by every worker"""
+
+    def __init__(self, metrics, url, ttl=300):
+        import redis
+
+        self.metrics = metrics
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(f"jobtracker:cache:{key}")
+
+    def set(self, key, value):
+        self.client.set(f"jobtracker:cache:{key}", value, ex=self.ttl)
+
+    def get_version(self, user_id):
+        key = f"jobtracker:version:{user_id}"
+        version = self.client.get(key)
+        if version is None:
+            self.client.set(key, time.time_ns(), nx=True)
+            version = self.client.get(key)
+        return int(version)
+
+    def bump_version(self, user_id):
+        key = f"jobtracker:version:{user_id}"
+        self.client.set(key, time.time_ns(), nx=True)
+        self.client.incr(key)
+
+
+class ResponseCache:
+    """Caches JSON response bodies per user and serves 304s from ETags"""
+
+    def __init__(self):
+        self.metrics = CacheMetrics()
+        self.backend = None
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'none')
+        ttl = app.config.get('CACHE_TTL', 300)
+        if kind == 'memory':
+            self.backend = MemoryBackend(self.metrics, app.config.get('CACHE_MAX_ENTRIES', 1024), ttl)
+        elif kind == 'redis':
+            self.backend = RedisBackend(self.metrics, app.config['CACHE_URL'], ttl)
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def invalidate(self, user_id):
+        """Drop every cached response for a user; call after each write"""
+        if self.enabled:
+            self.backend.bump_version(user_id)
+
+    def cached(self, view):
+        """Decorate a @jwt_required GET view returning a JSON response"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+
+            user_id = int(get_jwt_identity())
+            version = self.backend.get_version(user_id)
+            query = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+            key = f"{user_id}:{version}:{request.path}?{query}"
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+            if etag in request.if_none_match:
+                self.metrics.incr('not_modified')
+                return self._response(b'', etag, 304)
+
+            body = self.backend.get(key)
+            if body is not None:
+                self.metrics.incr('hits')
+                return self._response(body, etag)
+
+            self.metrics.incr('misses')
+            response = view(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                body = response.get_data()
+                self.backend.set(key, body)
+                return self._response(body, etag)
+            return response
+
+        return wrapper
+
+    @staticmethod
+    def _response(body, etag, status=200):
+        response = Response(body, status=status, mimetype='application/json')
+        response.set_etag(etag)
+        # Clients must revalidate; the ETag makes that cheap
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class UserCache:
+    """In-process cache of User.to_dict() profiles keyed by user id
+
+    Each worker keeps its own copy: invalidate() only reaches this process, so
+    USER_CACHE_TTL bounds how long other workers may serve a stale profile.
+    Cached dicts are shared between threads and must not be mutated.
+    """
+
+    def __init__(self):
+        self.metrics = CacheMetrics()
+        self.backend = None
+        self.load = None
+
+    def init_app(self, app, load):
+        """`load(user_id)` returns a profile from the database, or None"""
+        self.load = load
+        ttl = app.config.get('USER_CACHE_TTL', 60)
+        max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 10000)
+        self.backend = MemoryBackend(self.metrics, max_entries, ttl) if ttl > 0 else None
+
+    def get(self, user_id, load):
+        """Return the cached profile, calling load(user_id) on a miss"""
+        if self.backend is None:
+            return load(user_id)
+        profile = self.backend.get(user_id)
+        if profile is not None:
+            self.metrics.incr('hits')
+            return profile
+        self.metrics.incr('misses')
+        profile = load(user_id)
+        if profile is not None:
+            self.backend.set(user_id, profile)
+        return profile
+
+    def current(self):
+        """Profile of the user whose verified access token this request carries
+
+        Uses the token's profile claim if JWT_PROFILE_CLAIMS put one there,
+        otherwise the cache. Returns None if the user no longer exists.
+        """
+        claims = get_jwt()
+        if current_app.config.get('JWT_PROFILE_CLAIMS') and 'profile' in claims:
+            return claims['profile']
+        return self.get(int(claims['sub']), self.load)
+
+    def invalidate(self, user_id):
+        """Forget a user's profile; call after any change to the account"""
+        if self.backend is not None:
+            self.backend.delete(user_id)
+
+
+response_cache = ResponseCache()
+user_cache = UserCache()
@@ -0,0 +1,187 @@
+"""
+Outbound email: precompiled templates, a durable outbox and a batch dispatcher
+
+Endpoints call enqueue_email() inside their own transaction and return; the
+dispatcher claims due rows, sends them over one SMTP connection per batch and
+retries failures with exponential backoff.
+
+For local testing point MAIL_SERVER/MAIL_PORT at a stand-in such as
+    python -m aiosmtpd -n -l localhost:8025
+with MAIL_USE_TLS=false.
+
+Nothing starts at import: Flask-Mail is set up on the first batch and the
+dispatcher thread on the first request, so cold starts stay fast.
+"""
+
+from datetime import datetime, timedelta
+from jinja2 import Environment
+from models import db, OutboundEmail
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_templates = Environment(autoescape=True)
+
+PASSWORD_RESET_SUBJECT = "Reset Your JobTracker Password"
+PASSWORD_RESET_TEMPLATE = _templates.from_string("""
+<div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+    <div style="background: linear-gradient(to right, #16a34a, #10b981); padding: 20px; text-align: center;">
+        <h1 style="color: white; margin: 0;">JobTracker</h1>
+    </div>
+    <div style="padding: 30px; background: #f9fafb;">
+        <h2 style="color: #374151;">Password Reset Request</h2>
+        <p style="color: #6b7280;">Hi {{ name }},</p>
+        <p style="color: #6b7280;">We received a request to reset your password. Click the button below to create a new password:</p>
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{{ reset_url }}" style="background: #16a34a; color: white; padding: 12px 30px; text-decoration: none; border-radius: 8px; font-weight: bold;">Reset Password</a>
+        </div>
+        <p style="color: #6b7280; font-size: 14px;">This link will expire in 1 hour.</p>
+        <p style="color: #6b7280; font-size: 14px;">If you didn't request this, you can safely ignore this email.</p>
+        <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
+        <p style="color: #9ca3af; font-size: 12px;">If the button doesn't work, copy and paste this link into your browser:</p>
+        <p style="color: #9ca3af; font-size: 12px; word-break: break-all;">{{ reset_url }}</p>
+    </div>
+</div>
+""")
+
+
+def enqueue_email(recipient, subject, html):
+    """Add an email to the outbox; the caller commits"""
+    email = OutboundEmail(recipient=recipient, subject=subject, html=html)
+    db.session.add(email)
+    return email
+
+
+class EmailDispatcher:
+    """Sends outbox rows in batches over a shared SMTP connection"""
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = 50
+        self.max_attempts = 5
+        self.backoff_seconds = 30
+        self.poll_interval = 30
+        self.claim_timeout = timedelta(minutes=10)
+        self.mode = 'thread'
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('EMAIL_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.backoff_seconds = app.config.get('EMAIL_BACKOFF_SECONDS', 30)
+        self.poll_interval = app.config.get('EMAIL_POLL_INTERVAL', 30)
+        self.mode = app.config.get('EMAIL_DISPATCHER', 'thread')
+        if self.mode not in ('thread', 'none'):
+            raise ValueError(f"Unknown EMAIL_DISPATCHER: {self.mode}")
+        if self.mode == 'thread':
+            # The first request starts the thread, which sends rows left over
+            # from before a restart
+            app.before_request(self._before_request)
+
+    def _before_request(self):
+        if self._thread is None:
+            self._ensure_thread()
+
+    def wake(self):
+        """Ask the background thread to send now instead of at its next poll"""
+        if self.mode != 'thread':
+            return
+        self._ensure_thread()
+        self._wake.set()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self.run_forever, name='email-dispatcher', daemon=True)
+                    self._thread.start()
+
+    def run_forever(self):
+        """Dispatch until the process exits, sleeping between empty polls"""
+        while True:
+            try:
+                with self.app.app_context():
+                    while self.dispatch_batch() == self.batch_size:
+                        pass
+            except Exception:
+                logger.exception("Email dispatcher iteration failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _claim(self):
+        """Claim due rows with a conditional UPDATE so concurrent dispatchers never share one"""
+        now = datetime.utcnow()
+        # Rows stuck in SENDING belong to a dispatcher that died mid-batch
+        OutboundEmail.query.filter(
+            OutboundEmail.status == OutboundEmail.SENDING,
+            OutboundEmail.next_attempt_at < now - self.claim_timeout
+        ).update({'status': OutboundEmail.PENDING}, synchronize_session=False)
+
+        candidates = [row_id for (row_id,) in db.session.query(OutboundEmail.id).filter(
+            OutboundEmail.status == OutboundEmail.PENDING,
+            OutboundEmail.next_attempt_at <= now
+        ).order_by(OutboundEmail.next_attempt_at).limit(self.batch_size)]
+
+        claimed = []
+        for row_id in candidates:
+            updated = OutboundEmail.query.filter_by(id=row_id, status=OutboundEmail.PENDING) \
+                .update({'status': OutboundEmail.SENDING, 'next_attempt_at': now}, synchronize_session=False)
+            if updated:
+                claimed.append(row_id)
+        db.session.commit()
+        return OutboundEmail.query.filter(OutboundEmail.id.in_(claimed)).all() if claimed else []
+
+    def _mail(self):
+        """The app's Flask-Mail state, set up on first use"""
+        with self._lock:
+            mail = self.app.extensions.get('mail')
+            if mail is None:
+                from flask_mail import Mail
+
+                mail = Mail().init_app(self.app)
+        return mail
+
+    def dispatch_batch(self):
+        """Send one batch of due emails; returns how many were claimed"""
+        emails = self._claim()
+        if not emails:
+            return 0
+
+        from flask_mail import Message
+
+        try:
+            with self._mail().connect() as connection:
+                for email in emails:
+                    try:
+                        connection.send(Message(subject=email.subject, recipients=[email.recipient], html=email.html))
+                    except Exception as e:
+                        self._failed(email, e)
+                        continue
+                    email.attempts += 1
+                    email.finish(OutboundEmail.SENT)
+                    email.sent_at = datetime.utcnow()
+                    email.last_error = None
+        except Exception as e:
+            # Connecting failed; everything still claimed is retried later
+            for email in emails:
+                if email.status == OutboundEmail.SENDING:
+                    self._failed(email, e)
+        db.session.commit()
+        return len(emails)
+
+    def _failed(self, email, error):
+        logger.warning("Failed to send email %s: %s", email.id, error)
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= self.max_attempts:
+            email.finish(OutboundEmail.FAILED)
+        else:
+            email.status = OutboundEmail.PENDING
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.backoff_seconds * 2 ** (email.attempts - 1))
+
+
+email_dispatcher = EmailDispatcher()
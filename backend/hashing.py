@@ -0,0 +1,142 @@
+"""
+Password hashing off the request thread
+
+bcrypt runs in a bounded process pool so request threads only wait on a
+future. A semaphore caps how many hashes run or queue in the pool, and an
+admission limit caps how many request threads may be inside a password
+operation at all, waiting included: past it a request is refused at once, so
+a login burst can never hold more than that many threads and the rest stay
+free for the CRUD endpoints. Hashes made with a cost other than BCRYPT_ROUNDS
+are flagged for rehashing on the next login.
+
+This module must not import the Flask app: pool workers import it on spawn.
+"""
+
+import os
+import threading
+import time
+import bcrypt
+
+
+class HashingBusy(Exception):
+    """Raised when too many threads already wait to hash, or no slot frees up in HASH_QUEUE_TIMEOUT seconds"""
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def hash_cost(hashed):
+    """Return the cost factor encoded in a bcrypt hash ($2b$<cost>$...)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def calibrate_rounds(target_ms=250, minimum=10, maximum=16):
+    """Return the highest cost whose hash time stays within target_ms here"""
+    rounds = minimum
+    while rounds < maximum:
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds + 1))
+        if (time.perf_counter() - started) * 1000 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+class PasswordHasher:
+    """bcrypt behind a process pool and an admission semaphore"""
+
+    def __init__(self):
+        self.rounds = 12
+        self.mode = 'inline'
+        self.workers = 1
+        self.queue_timeout = 5.0
+        self.admission_limit = 1
+        self._admitted = 0
+        self._slots = threading.BoundedSemaphore(1)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.total_seconds = 0.0
+        self.operations = 0
+        # Called with the seconds each operation took, including queueing
+        self.observer = None
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', 12)
+        self.mode = app.config.get('HASH_POOL', 'process')
+        self.workers = app.config.get('HASH_WORKERS') or os.cpu_count() or 1
+        self.queue_timeout = app.config.get('HASH_QUEUE_TIMEOUT', 5.0)
+        # By default at most half of the worker's request threads may be hashing
+        threads = app.config.get('WEB_THREADS', 8)
+        self.admission_limit = app.config.get('HASH_ADMISSION_LIMIT') or max(1, threads // 2)
+        concurrency = min(app.config.get('HASH_CONCURRENCY') or self.workers * 2, self.admission_limit)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        if self.mode not in ('process', 'inline'):
+            raise ValueError(f"Unknown HASH_POOL: {self.mode}")
+
+    def _pool(self):
+        # Created lazily so each gunicorn worker owns its pool; spawn avoids
+        # forking a process that already runs request threads.
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._admitted >= self.admission_limit:
+                raise HashingBusy("Too many concurrent password operations")
+            self._admitted += 1
+        try:
+            # Timed from admission, so the reported time includes waiting for a slot
+            started = time.perf_counter()
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise HashingBusy("Too many concurrent password operations")
+            try:
+                result = self._call(fn, *args)
+            finally:
+                self._slots.release()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.total_seconds += elapsed
+                self.operations += 1
+            if self.observer is not None:
+                self.observer(elapsed)
+            return result
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    def _call(self, fn, *args):
+        if self.mode == 'process':
+            return self._pool().submit(fn, *args).result()
+        return fn(*args)
+
+    def hash(self, password):
+        """Hash a password at the configured cost"""
+        return self._run(_hashpw, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify(self, password, hashed):
+        """Check a password against a stored hash"""
+        return self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True if the hash was made at a cost other than the configured one"""
+        return hash_cost(hashed) != self.rounds
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,205 @@
+"""
+Application status history and the analytics built on it
+
+Every status transition appends an ApplicationEvent and events are never
+updated. They are deleted with their application: application_events has no
+foreign key, and SQLite reuses the largest deleted id, so leftover events
+would be inherited by the next application created. Creating an application records a None -> status event dated at
+date_applied (or now, if that is in the future), so time in the first stage
+starts when the user applied rather than when they logged it.
+
+Analytics read one user's events through ix_application_events_user_app_time,
+which returns them per application in time order - the order LEAD() needs -
+and on PostgreSQL only the user's hash partition is scanned.
+"""
+
+from datetime import datetime, time
+from sqlalchemy import case, delete, func, insert, or_, select, text
+from models import db, ApplicationEvent
+from stats import FUNNEL_STAGES
+
+PERCENTILES = (50, 75, 90)
+
+# Start of the first stage for rows that predate the event log
+_FIRST_STAGE_START = {
+    'sqlite': "a.date_applied || ' 00:00:00.000000'",
+    'postgresql': "CAST(a.date_applied AS timestamp)",
+}
+
+# Applications without events get None -> Applied at date_applied, and if
+# they have moved on, Applied -> status at updated_at (their last change).
+BACKFILL_SQL = """
+INSERT INTO application_events (user_id, application_id, from_status, to_status, occurred_at)
+WITH missing AS (
+    SELECT a.id, a.user_id, a.status, a.updated_at, {start} AS started_at
+    FROM applications a
+    WHERE NOT EXISTS (
+        SELECT 1 FROM application_events e
+        WHERE e.user_id = a.user_id AND e.application_id = a.id
+    )
+)
+SELECT user_id, id, NULL, 'Applied', started_at FROM missing
+UNION ALL
+SELECT user_id, id, 'Applied', status,
+       CASE WHEN updated_at > started_at THEN updated_at ELSE started_at END
+FROM missing
+WHERE status <> 'Applied'
+"""
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def first_stage_start(date_applied, now):
+    """When an application entered its first stage"""
+    started = datetime.combine(date_applied, time.min)
+    return started if started < now else now
+
+
+class StatusHistory:
+    """Accumulates status transitions and writes them with one INSERT"""
+
+    def __init__(self):
+        self.now = datetime.utcnow()
+        self.rows = []
+
+    def created(self, application_id, status, date_applied):
+        self.rows.append({
+            'application_id': application_id,
+            'from_status': None,
+            'to_status': status,
+            'occurred_at': first_stage_start(date_applied, self.now)
+        })
+
+    def changed(self, application_id, before, after):
+        if before != after:
+            self.rows.append({
+                'application_id': application_id,
+                'from_status': before,
+                'to_status': after,
+                'occurred_at': self.now
+            })
+
+    def write(self, user_id):
+        """Insert the collected events in the caller's transaction"""
+        if self.rows:
+            db.session.execute(insert(ApplicationEvent), [{**row, 'user_id': user_id} for row in self.rows])
+        self.rows = []
+
+
+def forget_events(user_id, application_ids):
+    """Delete the events of deleted applications in the caller's transaction"""
+    if application_ids:
+        db.session.execute(
+            delete(ApplicationEvent)
+            .where(ApplicationEvent.user_id == user_id, ApplicationEvent.application_id.in_(application_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def backfill_events(session=None):
+    """Record the current state of applications that have no events yet
+
+    Returns the number of events inserted; the caller commits.
+    """
+    session = session or db.session
+    sql = BACKFILL_SQL.format(start=_FIRST_STAGE_START[_dialect(session)])
+    return session.execute(text(sql)).rowcount
+
+
+def transitions(user_id, session):
+    """Return [{from, to, count}] for every status change, most common first"""
+    E = ApplicationEvent
+    count = func.count(E.id)
+    rows = session.query(E.from_status, E.to_status, count) \
+        .filter(E.user_id == user_id, E.from_status.isnot(None)) \
+        .group_by(E.from_status, E.to_status) \
+        .order_by(count.desc(), E.from_status, E.to_status) \
+        .all()
+    return [{'from': source, 'to': target, 'count': n} for source, target, n in rows]
+
+
+def stage_reach(user_id, session):
+    """Return the funnel from history: applications that ever reached each stage
+
+    An application reached a stage if any of its events moved it to that stage
+    or a later one, so one created straight into Interview also counts as
+    Applied and Phone Screen. Statuses outside FUNNEL_STAGES (Rejected) only
+    show it reached Applied. Unlike stats.funnel, which applies the same rule
+    to the current status alone, an application rejected after an interview
+    counts as having reached Interview.
+    """
+    E = ApplicationEvent
+    position = case({stage: i for i, stage in enumerate(FUNNEL_STAGES)}, value=E.to_status, else_=0)
+    furthest = select(func.max(position).label('furthest')) \
+        .where(E.user_id == user_id) \
+        .group_by(E.application_id) \
+        .subquery()
+    counts = dict(session.execute(
+        select(furthest.c.furthest, func.count()).group_by(furthest.c.furthest)
+    ).all())
+    stages = []
+    previous = None
+    for i, stage in enumerate(FUNNEL_STAGES):
+        count = sum(n for furthest_stage, n in counts.items() if furthest_stage >= i)
+        if previous is None:
+            rate = 100.0 if count else 0
+        else:
+            rate = round(count / previous * 100, 1) if previous else 0
+        stages.append({'stage': stage, 'reached': count, 'conversion_rate': rate})
+        previous = count
+    return stages
+
+
+def _days_between(start, end, dialect):
+    if dialect == 'postgresql':
+        return func.extract('epoch', end - start) / 86400.0
+    return func.julianday(end) - func.julianday(start)
+
+
+def stage_stays(user_id, dialect):
+    """Subquery of (stage, days) for every finished stay in a stage
+
+    LEAD() pairs each event with the next one for the same application; the
+    time between them is the stay. The current stage of each application is
+    still open and left out.
+    """
+    E = ApplicationEvent
+    left_at = func.lead(E.occurred_at).over(partition_by=E.application_id, order_by=(E.occurred_at, E.id))
+    events = select(E.to_status.label('stage'), E.occurred_at.label('entered_at'), left_at.label('left_at')) \
+        .where(E.user_id == user_id) \
+        .subquery()
+    return select(events.c.stage, _days_between(events.c.entered_at, events.c.left_at, dialect).label('days')) \
+        .where(events.c.left_at.isnot(None)) \
+        .subquery()
+
+
+def time_in_stage(user_id, session):
+    """Return [{stage, stays, mean_days, p50_days, ...}] for finished stays
+
+    Percentiles use the nearest-rank method: the stays of each stage are
+    numbered by duration with ROW_NUMBER() and only the rows at the wanted
+    ranks come back, so the database never returns every stay.
+    """
+    stays = stage_stays(user_id, _dialect(session))
+    window = {'partition_by': stays.c.stage}
+    ranked = select(
+        stays.c.stage,
+        stays.c.days,
+        func.row_number().over(order_by=stays.c.days, **window).label('position'),
+        func.count().over(**window).label('stays'),
+        func.avg(stays.c.days).over(**window).label('mean_days')
+    ).subquery()
+    wanted = or_(*(ranked.c.position == (ranked.c.stays * p + 99) // 100 for p in PERCENTILES))
+    rows = session.execute(select(ranked).where(wanted)).all()
+
+    stages = {}
+    for stage, days, position, count, mean in rows:
+        entry = stages.setdefault(stage, {'stage': stage, 'stays': count, 'mean_days': round(mean, 1)})
+        for p in PERCENTILES:
+            if position == (count * p + 99) // 100:
+                entry[f'p{p}_days'] = round(days, 1)
+
+    order = {stage: i for i, stage in enumerate(FUNNEL_STAGES)}
+    return sorted(stages.values(), key=lambda entry: (order.get(entry['stage'], len(order)), entry['stage']))
@@ -0,0 +1,233 @@
+"""
+Request metrics, SQL timing and on-demand profiling
+
+    per-endpoint latency and SQL-query-count histograms, SQL and bcrypt time
+    totals per endpoint, exported in the Prometheus text format by render()
+    a slow-query log: statements slower than SLOW_QUERY_MS are logged with
+    their duration and endpoint
+    ?profile=1 on any request by a user listed in ADMIN_EMAILS returns a
+    cProfile breakdown of that request instead of its normal body
+
+Metrics are per process; with several gunicorn workers each one reports its
+own counters, like the cache metrics. The endpoints serving them are wrapped
+in admin_only: an ADMIN_EMAILS user's access token, or METRICS_TOKEN as the
+bearer token for scrapers that cannot log in.
+"""
+
+from flask import g, has_request_context, jsonify, request
+from cache import user_cache
+from flask_jwt_extended import verify_jwt_in_request
+from functools import wraps
+from hashing import password_hasher
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import hmac
+import io
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+PROFILE_LINES = 40
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self, name, label_names):
+        lines = []
+        for labels, (counts, count, total) in sorted(self._series.items()):
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(label_names, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{name}_bucket{{{base},le="{bound}"}} {bucket_count}')
+            lines.append(f'{name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{base}}} {total}')
+            lines.append(f'{name}_count{{{base}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_totals(name, totals):
+    return [
+        f'{name}{{method="{method}",endpoint="{_escape(endpoint)}"}} {total}'
+        for (method, endpoint), total in sorted(totals.items())
+    ]
+
+
+class RequestMetrics:
+    """Flask extension recording per-request latency, SQL and profiling data"""
+
+    def __init__(self):
+        self.app = None
+        self.slow_query_seconds = 0.5
+        self._lock = threading.Lock()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = {}
+        self.hash_seconds = {}
+        self.slow_queries = 0
+        self._listening = False
+
+    def init_app(self, app):
+        self.app = app
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 500) / 1000
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not self._listening:
+            # Listening on the Engine class also covers the async engine in
+            # asgi.py, whose sync_engine is a plain Engine
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+        password_hasher.observer = self._observe_hash
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.hash_seconds = 0.0
+        if request.args.get('profile') == '1' and self.is_admin():
+            import cProfile
+
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def is_admin(self):
+        """Whether the request carries a valid access token of an ADMIN_EMAILS user"""
+        admins = self.app.config.get('ADMIN_EMAILS', ())
+        if not admins:
+            return False
+        try:
+            if not verify_jwt_in_request(optional=True):
+                return False
+            profile = user_cache.current()
+            return profile is not None and profile['email'].lower() in admins
+        except Exception:
+            return False
+
+    def admin_only(self, view):
+        """Answer 403 unless the caller is an admin or sends METRICS_TOKEN as its bearer token"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            token = self.app.config.get('METRICS_TOKEN')
+            header = request.headers.get('Authorization', '')
+            if token and hmac.compare_digest(header.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+                return view(*args, **kwargs)
+            if self.is_admin():
+                return view(*args, **kwargs)
+            return jsonify({"success": False, "error": "Admin access required"}), 403
+        return wrapper
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        labels = (request.method, endpoint)
+        with self._lock:
+            self.latency.observe(labels + (str(response.status_code),), elapsed)
+            self.queries.observe(labels, g.sql_count)
+            self.sql_seconds[labels] = self.sql_seconds.get(labels, 0.0) + g.sql_seconds
+            if g.hash_seconds:
+                self.hash_seconds[labels] = self.hash_seconds.get(labels, 0.0) + g.hash_seconds
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            return self._profile_response(profiler, response, elapsed)
+        return response
+
+    def _profile_response(self, profiler, response, elapsed):
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        return jsonify({
+            "success": True,
+            "status": response.status_code,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "sql_queries": g.sql_count,
+            "sql_ms": round(g.sql_seconds * 1000, 2),
+            "password_hash_ms": round(g.hash_seconds * 1000, 2),
+            "profile": out.getvalue()
+        })
+
+    def _observe_hash(self, elapsed):
+        if has_request_context() and 'hash_seconds' in g:
+            g.hash_seconds += elapsed
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's execution context rather than the
+        # connection: a statement that raises never reaches
+        # after_cursor_execute, and its start time goes away with the context
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        del context._query_started
+        elapsed = time.perf_counter() - started
+        in_request = has_request_context() and 'sql_count' in g
+        if in_request:
+            g.sql_count += 1
+            g.sql_seconds += elapsed
+        if elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self.slow_queries += 1
+            logger.warning(
+                "Slow query (%.1f ms) during %s: %s",
+                elapsed * 1000,
+                request.path if in_request else 'background task',
+                ' '.join(statement.split())[:1000]
+            )
+
+    def render(self, extra=()):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP jobtracker_request_duration_seconds Request latency by endpoint',
+                '# TYPE jobtracker_request_duration_seconds histogram',
+                *self.latency.render('jobtracker_request_duration_seconds', ('method', 'endpoint', 'status')),
+                '# HELP jobtracker_request_sql_queries SQL statements executed per request',
+                '# TYPE jobtracker_request_sql_queries histogram',
+                *self.queries.render('jobtracker_request_sql_queries', ('method', 'endpoint')),
+                '# HELP jobtracker_request_sql_seconds_total Time spent in SQL by endpoint',
+                '# TYPE jobtracker_request_sql_seconds_total counter',
+                *_render_totals('jobtracker_request_sql_seconds_total', self.sql_seconds),
+                '# HELP jobtracker_request_password_hash_seconds_total Time spent in bcrypt by endpoint',
+                '# TYPE jobtracker_request_password_hash_seconds_total counter',
+                *_render_totals('jobtracker_request_password_hash_seconds_total', self.hash_seconds),
+                '# HELP jobtracker_slow_queries_total Statements slower than SLOW_QUERY_MS',
+                '# TYPE jobtracker_slow_queries_total counter',
+                f'jobtracker_slow_queries_total {self.slow_queries}',
+            ]
+        for name, kind, help_text, value in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
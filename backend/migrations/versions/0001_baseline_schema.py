@@ -0,0 +1,72 @@
+"""Baseline schema: users, applications and password reset tokens
+
+This is the schema db.create_all() produced before migrations were added.
+Tables that already exist are left alone, so databases created by
+create_all() can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=200), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if not inspector.has_table('applications'):
+        op.create_table(
+            'applications',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('company', sa.String(length=200), nullable=False),
+            sa.Column('position', sa.String(length=200), nullable=False),
+            sa.Column('status', sa.String(length=50), nullable=False),
+            sa.Column('date_applied', sa.Date(), nullable=False),
+            sa.Column('job_url', sa.String(length=500), nullable=True),
+            sa.Column('location', sa.String(length=200), nullable=True),
+            sa.Column('salary_range', sa.String(length=100), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('is_favorite', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_applications_user_id', 'applications', ['user_id'])
+
+    if not inspector.has_table('password_reset_tokens'):
+        op.create_table(
+            'password_reset_tokens',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('token', sa.String(length=100), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('used', sa.Boolean(), nullable=True),
+        )
+        op.create_index('ix_password_reset_tokens_token', 'password_reset_tokens', ['token'], unique=True)
+
+
+def downgrade():
+    op.drop_table('password_reset_tokens')
+    op.drop_table('applications')
+    op.drop_table('users')
@@ -0,0 +1,38 @@
+"""Per-user status rollup for /api/stats, backfilled from applications
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('user_stats'):
+        return
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('status', sa.String(length=50), primary_key=True),
+        sa.Column('application_count', sa.Integer(), nullable=False),
+        sa.Column('favorite_count', sa.Integer(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO user_stats (user_id, status, application_count, favorite_count)
+        SELECT user_id, status, count(*), sum(CASE WHEN is_favorite THEN 1 ELSE 0 END)
+        FROM applications
+        GROUP BY user_id, status
+    """)
+
+
+def downgrade():
+    op.drop_table('user_stats')
@@ -0,0 +1,79 @@
+"""Full-text search index: FTS5 table and triggers on SQLite, GIN on PostgreSQL
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(company, '') || ' ' || coalesce(position, '') || ' ' || "
+    "coalesce(location, '') || ' ' || coalesce(notes, ''))"
+)
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+        owner, company, position, location, notes,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+        INSERT INTO applications_fts(rowid, owner, company, position, location, notes)
+        VALUES (new.id, 'u' || new.user_id, new.company, new.position, new.location, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications BEGIN
+        DELETE FROM applications_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS applications_fts_update
+    AFTER UPDATE OF company, position, location, notes ON applications BEGIN
+        UPDATE applications_fts
+        SET company = new.company, position = new.position, location = new.location, notes = new.notes
+        WHERE rowid = new.id;
+    END
+    """,
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # CONCURRENTLY keeps applications writable while the index builds
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_search "
+                       f"ON applications USING GIN ({PG_DOCUMENT})")
+        return
+
+    populated = sa.inspect(bind).has_table('applications_fts')
+    for statement in SQLITE_SETUP:
+        op.execute(statement)
+    if not populated:
+        op.execute("""
+            INSERT INTO applications_fts(rowid, owner, company, position, location, notes)
+            SELECT id, 'u' || user_id, company, position, location, notes FROM applications
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_applications_search")
+        return
+    for trigger in ('applications_fts_insert', 'applications_fts_delete', 'applications_fts_update'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS applications_fts")
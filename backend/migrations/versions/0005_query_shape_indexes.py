@@ -0,0 +1,55 @@
+"""Composite indexes matching the hot query shapes
+
+    ix_applications_user_date_id         list, default sort; stats timeline
+    ix_applications_user_status_date_id  list filtered by status
+    ix_applications_user_id_id           export and bulk ownership checks (ORDER BY id)
+    ix_password_reset_tokens_user_id     invalidating a user's open reset tokens
+
+ix_applications_user_id is a prefix of all three applications indexes and
+only costs writes, so it is dropped. On PostgreSQL every index is built and
+dropped CONCURRENTLY so a large applications table stays writable.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_applications_user_date_id', 'applications', ['user_id', 'date_applied', 'id']),
+    ('ix_applications_user_status_date_id', 'applications', ['user_id', 'status', 'date_applied', 'id']),
+    ('ix_applications_user_id_id', 'applications', ['user_id', 'id']),
+    ('ix_password_reset_tokens_user_id', 'password_reset_tokens', ['user_id']),
+]
+DROPPED = ('ix_applications_user_id', 'applications', ['user_id'])
+
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+        name, table, _ = DROPPED
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        name, table, columns = DROPPED
+        op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
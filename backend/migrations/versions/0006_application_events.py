@@ -0,0 +1,95 @@
+"""Append-only status history (application_events) with backfill
+
+On PostgreSQL the table is hash-partitioned on user_id into PARTITIONS
+partitions. Every analytics query filters on one user, so it touches one
+partition and that partition's slice of the (user_id, application_id,
+occurred_at, id) index; partitioned tables need the partition key in the
+primary key, hence (user_id, id) there. SQLite gets a plain table.
+
+Existing applications are backfilled with None -> Applied at date_applied
+and, if they have moved on, Applied -> status at updated_at.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+PARTITIONS = 16
+
+PG_CREATE = """
+CREATE TABLE application_events (
+    id BIGSERIAL,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    application_id INTEGER NOT NULL,
+    from_status VARCHAR(50),
+    to_status VARCHAR(50) NOT NULL,
+    occurred_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (user_id, id)
+) PARTITION BY HASH (user_id)
+"""
+PG_PARTITION = (
+    "CREATE TABLE application_events_p{n} PARTITION OF application_events "
+    "FOR VALUES WITH (MODULUS {modulus}, REMAINDER {n})"
+)
+
+FIRST_STAGE_START = {
+    'sqlite': "a.date_applied || ' 00:00:00.000000'",
+    'postgresql': "CAST(a.date_applied AS timestamp)",
+}
+BACKFILL = """
+INSERT INTO application_events (user_id, application_id, from_status, to_status, occurred_at)
+WITH missing AS (
+    SELECT a.id, a.user_id, a.status, a.updated_at, {start} AS started_at
+    FROM applications a
+    WHERE NOT EXISTS (
+        SELECT 1 FROM application_events e
+        WHERE e.user_id = a.user_id AND e.application_id = a.id
+    )
+)
+SELECT user_id, id, NULL, 'Applied', started_at FROM missing
+UNION ALL
+SELECT user_id, id, 'Applied', status,
+       CASE WHEN updated_at > started_at THEN updated_at ELSE started_at END
+FROM missing
+WHERE status <> 'Applied'
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if not sa.inspect(bind).has_table('application_events'):
+        if dialect == 'postgresql':
+            op.execute(PG_CREATE)
+            for n in range(PARTITIONS):
+                op.execute(PG_PARTITION.format(n=n, modulus=PARTITIONS))
+        else:
+            op.create_table(
+                'application_events',
+                sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+                sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+                sa.Column('application_id', sa.Integer(), nullable=False),
+                sa.Column('from_status', sa.String(length=50), nullable=True),
+                sa.Column('to_status', sa.String(length=50), nullable=False),
+                sa.Column('occurred_at', sa.DateTime(), nullable=False),
+            )
+        # On a partitioned table this creates a matching index on every partition
+        op.create_index(
+            'ix_application_events_user_app_time', 'application_events',
+            ['user_id', 'application_id', 'occurred_at', 'id']
+        )
+    op.execute(BACKFILL.format(start=FIRST_STAGE_START.get(dialect, FIRST_STAGE_START['postgresql'])))
+
+
+def downgrade():
+    op.drop_table('application_events')
@@ -0,0 +1,46 @@
+"""Delta sync: deletion tombstones and an (user_id, updated_at) index
+
+    application_tombstones               ids deleted since a sync token
+    ix_applications_user_updated         rows changed since a sync token
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('application_tombstones'):
+        op.create_table(
+            'application_tombstones',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('application_id', sa.Integer(), nullable=False),
+            sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('ix_application_tombstones_user_deleted', 'application_tombstones', ['user_id', 'deleted_at'])
+
+    existing = {index['name'] for index in sa.inspect(bind).get_indexes('applications')}
+    if 'ix_applications_user_updated' not in existing:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_applications_user_updated', 'applications', ['user_id', 'updated_at'],
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_applications_user_updated', table_name='applications', postgresql_concurrently=True)
+    op.drop_table('application_tombstones')
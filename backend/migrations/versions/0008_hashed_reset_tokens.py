@@ -0,0 +1,57 @@
+"""Store password reset tokens hashed; index expires_at for the purge job
+
+Outstanding tokens are hashed in place, so reset links already emailed keep
+working. The plaintext column and its index are dropped.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 09:50:00.000000
+
+"""
+from alembic import op
+import hashlib
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('password_reset_tokens')}
+
+
+def upgrade():
+    if 'token_hash' in _columns():
+        return
+    op.add_column('password_reset_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    tokens = sa.table('password_reset_tokens', sa.column('id'), sa.column('token'), sa.column('token_hash'))
+    rows = bind.execute(sa.select(tokens.c.id, tokens.c.token)).all()
+    if rows:
+        bind.execute(
+            tokens.update().where(tokens.c.id == sa.bindparam('row_id')).values(token_hash=sa.bindparam('hashed')),
+            [{'row_id': row_id, 'hashed': hashlib.sha256(token.encode('utf-8')).hexdigest()} for row_id, token in rows]
+        )
+
+    with op.batch_alter_table('password_reset_tokens') as batch_op:
+        batch_op.drop_index('ix_password_reset_tokens_token')
+        batch_op.drop_column('token')
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_index('ix_password_reset_tokens_token_hash', ['token_hash'], unique=True)
+        batch_op.create_index('ix_password_reset_tokens_expires_at', ['expires_at'])
+
+
+def downgrade():
+    # Hashes cannot be turned back into tokens, so outstanding links are lost
+    op.execute("DELETE FROM password_reset_tokens")
+    with op.batch_alter_table('password_reset_tokens') as batch_op:
+        batch_op.drop_index('ix_password_reset_tokens_expires_at')
+        batch_op.drop_index('ix_password_reset_tokens_token_hash')
+        batch_op.drop_column('token_hash')
+        batch_op.add_column(sa.Column('token', sa.String(length=100), nullable=False))
+        batch_op.create_index('ix_password_reset_tokens_token', ['token'], unique=True)
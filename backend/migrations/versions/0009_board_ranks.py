@@ -0,0 +1,58 @@
+"""Kanban board order: applications.board_rank and its column index
+
+    applications.board_rank              position within a status column
+    ix_applications_user_status_rank     board columns in card order
+
+Existing cards are ranked newest first, like the default list order.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+RANK_GAP = 1 << 16
+
+BACKFILL_SQL = f"""
+UPDATE applications SET board_rank = ranked.board_rank
+FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY user_id, status ORDER BY date_applied DESC, id DESC
+    ) * {RANK_GAP} AS board_rank
+    FROM applications
+) AS ranked
+WHERE applications.id = ranked.id
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('applications')}
+    if 'board_rank' not in columns:
+        # A constant default makes this a metadata-only change on PostgreSQL
+        op.add_column('applications', sa.Column('board_rank', sa.BigInteger(), nullable=False, server_default='0'))
+        op.execute(BACKFILL_SQL)
+
+    existing = {index['name'] for index in sa.inspect(bind).get_indexes('applications')}
+    if 'ix_applications_user_status_rank' not in existing:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_applications_user_status_rank', 'applications', ['user_id', 'status', 'board_rank', 'id'],
+                postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_applications_user_status_rank', table_name='applications', postgresql_concurrently=True)
+    with op.batch_alter_table('applications') as batch_op:
+        batch_op.drop_column('board_rank')
@@ -0,0 +1,66 @@
+"""Precomputed analytics: salary bounds, per-user snapshots and job watermarks
+
+    applications.salary_min/salary_max   annual bounds parsed from salary_range
+    ix_applications_updated_user         users with rows changed since a refresh
+    analytics_snapshots                  /api/analytics payload per user
+    job_watermarks                       how far each background job has got
+
+The bounds and snapshots start empty; the first `flask --app app
+refresh-analytics` run fills them.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('applications')}
+    if 'salary_min' not in columns:
+        with op.batch_alter_table('applications') as batch_op:
+            batch_op.add_column(sa.Column('salary_min', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('salary_max', sa.Integer(), nullable=True))
+
+    existing = {index['name'] for index in sa.inspect(bind).get_indexes('applications')}
+    if 'ix_applications_updated_user' not in existing:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_applications_updated_user', 'applications', ['updated_at', 'user_id'],
+                postgresql_concurrently=True
+            )
+
+    if not sa.inspect(bind).has_table('analytics_snapshots'):
+        op.create_table(
+            'analytics_snapshots',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('payload', sa.JSON(), nullable=False),
+            sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        )
+
+    if not sa.inspect(bind).has_table('job_watermarks'):
+        op.create_table(
+            'job_watermarks',
+            sa.Column('name', sa.String(length=50), primary_key=True),
+            sa.Column('high_water', sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table('job_watermarks')
+    op.drop_table('analytics_snapshots')
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_applications_updated_user', table_name='applications', postgresql_concurrently=True)
+    with op.batch_alter_table('applications') as batch_op:
+        batch_op.drop_column('salary_max')
+        batch_op.drop_column('salary_min')
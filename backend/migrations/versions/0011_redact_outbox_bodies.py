@@ -0,0 +1,29 @@
+"""Blank the bodies of sent and failed outbox emails
+
+Reset emails carry a usable reset link. The dispatcher now drops the body
+once a row is sent or given up on; this clears the rows written before.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    emails = sa.table('outbound_emails', sa.column('status'), sa.column('html'))
+    op.execute(emails.update().where(emails.c.status.in_(['sent', 'failed']), emails.c.html != '').values(html=''))
+
+
+def downgrade():
+    # The bodies are gone; nothing to restore
+    pass
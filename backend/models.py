@@ -3,11 +3,15 @@ Database models for JobTracker
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, delete, func, insert, select, update
+from collections import Counter
 from datetime import datetime, timedelta
-import bcrypt
+from hashing import password_hasher
+from routing import RoutingSession
+import hashlib
 import secrets
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -25,11 +29,15 @@ class User(db.Model):
 
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.verify(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        """True if the stored hash uses an outdated bcrypt cost"""
+        return password_hasher.needs_rehash(self.password_hash)
 
     def to_dict(self):
         """Convert user to dictionary (exclude password)"""
@@ -45,12 +53,23 @@ class User(db.Model):
 
 
 class PasswordResetToken(db.Model):
-    """Password reset token model"""
+    """Password reset token model
+
+    Only a SHA-256 hash of each token is stored; the token itself exists in
+    the reset email alone. Tokens carry 256 random bits, so a fast hash is
+    enough. Validity (unused, unexpired) is always checked in SQL.
+    """
     __tablename__ = 'password_reset_tokens'
+    __table_args__ = (
+        db.Index('ix_password_reset_tokens_user_id', 'user_id'),
+        db.Index('ix_password_reset_tokens_expires_at', 'expires_at'),
+    )
+
+    LIFETIME = timedelta(hours=1)
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    token = db.Column(db.String(100), unique=True, nullable=False, index=True)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     used = db.Column(db.Boolean, default=False)
@@ -63,29 +82,158 @@ class PasswordResetToken(db.Model):
         return secrets.token_urlsafe(32)
 
     @staticmethod
-    def create_for_user(user_id):
-        """Create a new reset token for a user (expires in 1 hour)"""
-        token = PasswordResetToken(
-            user_id=user_id,
-            token=PasswordResetToken.generate_token(),
-            expires_at=datetime.utcnow() + timedelta(hours=1)
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _valid(token):
+        """SQL conditions matching the token's row while it is unused and unexpired
+
+        Compared against the app clock, which also stamped expires_at.
+        """
+        return (
+            PasswordResetToken.token_hash == PasswordResetToken.hash_token(token),
+            PasswordResetToken.used.is_(False),
+            PasswordResetToken.expires_at > datetime.utcnow()
         )
+
+    @staticmethod
+    def revoke(user_id):
+        """Delete every token the user holds"""
+        PasswordResetToken.query.filter_by(user_id=user_id).delete()
+
+    @staticmethod
+    def issue(user_id):
+        """Replace the user's tokens with a new one and return it (expires in 1 hour)"""
+        PasswordResetToken.revoke(user_id)
+        token = PasswordResetToken.generate_token()
+        db.session.add(PasswordResetToken(
+            user_id=user_id,
+            token_hash=PasswordResetToken.hash_token(token),
+            expires_at=datetime.utcnow() + PasswordResetToken.LIFETIME
+        ))
         return token
 
-    def is_valid(self):
-        """Check if token is valid (not expired and not used)"""
-        return not self.used and datetime.utcnow() < self.expires_at
+    @staticmethod
+    def find_valid(token):
+        """Return the user_id a valid token belongs to, or None"""
+        return db.session.scalar(select(PasswordResetToken.user_id).where(*PasswordResetToken._valid(token)))
+
+    @staticmethod
+    def consume(token):
+        """Mark a valid token used and return its user_id, or None
+
+        A single UPDATE, so two concurrent resets cannot both use one token.
+        The caller commits.
+        """
+        return db.session.scalar(
+            update(PasswordResetToken)
+            .where(*PasswordResetToken._valid(token))
+            .values(used=True)
+            .returning(PasswordResetToken.user_id)
+        )
+
+    @staticmethod
+    def purge(batch_size=1000):
+        """Delete expired and used tokens in batches, committing each; returns the count
+
+        Both passes are ranges on ix_password_reset_tokens_expires_at: tokens
+        that have not expired were all issued within the last LIFETIME.
+        """
+        table = PasswordResetToken.__table__
+        now = datetime.utcnow()
+        purged = 0
+        for condition in (table.c.expires_at <= now, and_(table.c.expires_at > now, table.c.used.is_(True))):
+            batch = select(table.c.id).where(condition).limit(batch_size).scalar_subquery()
+            while True:
+                deleted = db.session.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+                db.session.commit()
+                purged += deleted
+                if deleted < batch_size:
+                    break
+        return purged
 
     def __repr__(self):
         return f"<PasswordResetToken for user {self.user_id}>"
 
 
+class OutboundEmail(db.Model):
+    """Durable outbox row for an email waiting to be sent
+
+    The body of a reset email holds a usable reset link, so it is blanked as
+    soon as the row is sent or given up on; purge() later deletes the row.
+    """
+    __tablename__ = 'outbound_emails'
+    __table_args__ = (
+        db.Index('ix_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def finish(self, status):
+        """Mark the row sent or failed and drop its body"""
+        self.status = status
+        self.html = ''
+
+    @staticmethod
+    def purge(older_than, batch_size=1000):
+        """Delete sent and failed rows last attempted before `older_than`, in batches; returns the count
+
+        Each status is a range on ix_outbound_emails_status_next_attempt.
+        """
+        table = OutboundEmail.__table__
+        purged = 0
+        for status in (OutboundEmail.SENT, OutboundEmail.FAILED):
+            batch = select(table.c.id) \
+                .where(table.c.status == status, table.c.next_attempt_at < older_than) \
+                .limit(batch_size).scalar_subquery()
+            while True:
+                deleted = db.session.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+                db.session.commit()
+                purged += deleted
+                if deleted < batch_size:
+                    break
+        return purged
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} to {self.recipient} ({self.status})>"
+
+
 class Application(db.Model):
     """Job application model"""
     __tablename__ = 'applications'
+    __table_args__ = (
+        # Keyset pagination indexes: every list query filters on user_id and
+        # walks (date_applied, id), optionally narrowed by status. Export and
+        # ownership checks walk (user_id, id). Schema changes go through
+        # migrations/ (see migration 0005 for these).
+        db.Index('ix_applications_user_date_id', 'user_id', 'date_applied', 'id'),
+        db.Index('ix_applications_user_status_date_id', 'user_id', 'status', 'date_applied', 'id'),
+        db.Index('ix_applications_user_id_id', 'user_id', 'id'),
+        # Delta sync: rows changed since a sync token
+        db.Index('ix_applications_user_updated', 'user_id', 'updated_at'),
+        # Board columns in card order (board.py)
+        db.Index('ix_applications_user_status_rank', 'user_id', 'status', 'board_rank', 'id'),
+        # Analytics refresh: which users have rows changed since the last run
+        db.Index('ix_applications_updated_user', 'updated_at', 'user_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     company = db.Column(db.String(200), nullable=False)
     position = db.Column(db.String(200), nullable=False)
     status = db.Column(db.String(50), nullable=False)  # Applied, Phone Screen, Interview, Offer, Rejected
@@ -97,6 +245,112 @@ class Application(db.Model):
     is_favorite = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Position within the board column for `status`, ascending; ties by id
+    board_rank = db.Column(db.BigInteger, nullable=False, server_default='0')
+    # Annual bounds parsed from salary_range by the analytics job (analytics.py)
+    salary_min = db.Column(db.Integer, nullable=True)
+    salary_max = db.Column(db.Integer, nullable=True)
+
+    REQUIRED_FIELDS = ('company', 'position', 'date_applied', 'status')
+    # Spacing between neighbouring board ranks: a card can be dropped into the
+    # same gap 16 times before the column has to be respaced
+    RANK_GAP = 1 << 16
+    TEXT_FIELDS = ('company', 'position', 'status', 'job_url', 'location', 'salary_range', 'notes')
+
+    @staticmethod
+    def validate(data, partial=False):
+        """Validate an API payload and return column values
+
+        With partial=True (updates) only the fields present are checked and
+        returned. Raises ValueError with a user-facing message.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Application data must be an object")
+
+        if not partial:
+            for field in Application.REQUIRED_FIELDS:
+                if field not in data:
+                    raise ValueError(f"Missing required field: {field}")
+
+        values = {}
+        for field in Application.TEXT_FIELDS:
+            if field in data:
+                value = data[field]
+                if value is not None and not isinstance(value, str):
+                    raise ValueError(f"Field {field} must be a string")
+                if value is None and field in Application.REQUIRED_FIELDS:
+                    raise ValueError(f"Field {field} cannot be empty")
+                values[field] = value
+
+        if 'date_applied' in data:
+            try:
+                values['date_applied'] = datetime.strptime(data['date_applied'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                raise ValueError("date_applied must be a date in YYYY-MM-DD format")
+
+        if 'is_favorite' in data:
+            if not isinstance(data['is_favorite'], bool):
+                raise ValueError("is_favorite must be true or false")
+            values['is_favorite'] = data['is_favorite']
+
+        return values
+
+    @staticmethod
+    def top_rank(user_id, status):
+        """SQL expression for a board rank above the top card of a column"""
+        return select(func.coalesce(func.min(Application.board_rank), 0) - Application.RANK_GAP) \
+            .where(Application.user_id == user_id, Application.status == status) \
+            .scalar_subquery()
+
+    @staticmethod
+    def top_ranks(user_id, statuses):
+        """Board ranks stacking one new card per entry of statuses on top of its column
+
+        Cards keep their relative order: the first card of each status ends up
+        on top.
+        """
+        tops = dict(
+            db.session.query(Application.status, func.min(Application.board_rank))
+            .filter(Application.user_id == user_id, Application.status.in_(set(statuses)))
+            .group_by(Application.status)
+        )
+        remaining = Counter(statuses)
+        ranks = []
+        for status in statuses:
+            ranks.append(tops.get(status, 0) - Application.RANK_GAP * remaining[status])
+            remaining[status] -= 1
+        return ranks
+
+    @staticmethod
+    def insert_many(user_id, rows):
+        """Insert validated rows with one multi-row INSERT and return their ids
+
+        New cards go on top of their board columns. The caller owns the
+        transaction and the UserStats bookkeeping.
+        """
+        if not rows:
+            return []
+        now = datetime.utcnow()
+        ranks = Application.top_ranks(user_id, [values['status'] for values in rows])
+        params = [
+            {
+                'job_url': None,
+                'location': None,
+                'salary_range': None,
+                'notes': None,
+                'is_favorite': False,
+                **values,
+                'user_id': user_id,
+                'board_rank': rank,
+                'created_at': now,
+                'updated_at': now
+            }
+            for values, rank in zip(rows, ranks)
+        ]
+        return db.session.scalars(
+            insert(Application).returning(Application.id, sort_by_parameter_order=True),
+            params
+        ).all()
 
     def to_dict(self):
         """Convert application to dictionary"""
@@ -117,3 +371,123 @@ class Application(db.Model):
 
     def __repr__(self):
         return f"<Application {self.company} - {self.position}>"
+
+
+class ApplicationTombstone(db.Model):
+    """Record of a deleted application, so delta sync can report the deletion
+
+    Tombstones older than SYNC_TOMBSTONE_DAYS are purged; sync tokens older
+    than that get a full reload instead of a delta.
+    """
+    __tablename__ = 'application_tombstones'
+    __table_args__ = (
+        db.Index('ix_application_tombstones_user_deleted', 'user_id', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    application_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @staticmethod
+    def record(user_id, application_ids):
+        """Insert one tombstone per deleted id; the caller owns the transaction"""
+        if not application_ids:
+            return
+        now = datetime.utcnow()
+        db.session.execute(insert(ApplicationTombstone), [
+            {'user_id': user_id, 'application_id': application_id, 'deleted_at': now}
+            for application_id in application_ids
+        ])
+
+    @staticmethod
+    def purge(older_than):
+        """Delete tombstones from before `older_than`; returns the count"""
+        return ApplicationTombstone.query.filter(ApplicationTombstone.deleted_at < older_than).delete()
+
+
+class ApplicationEvent(db.Model):
+    """Append-only log of application status transitions
+
+    from_status is None on the event that records an application's creation.
+    application_id has no foreign key; deleting an application deletes its
+    events in the same transaction (history.forget_events). On
+    PostgreSQL the table is hash-partitioned by user_id (migration 0006).
+    """
+    __tablename__ = 'application_events'
+    __table_args__ = (
+        # Every analytics query reads one user's events per application in
+        # time order, which is exactly this index's order.
+        db.Index('ix_application_events_user_app_time', 'user_id', 'application_id', 'occurred_at', 'id'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    application_id = db.Column(db.Integer, nullable=False)
+    from_status = db.Column(db.String(50), nullable=True)
+    to_status = db.Column(db.String(50), nullable=False)
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ApplicationEvent {self.application_id}: {self.from_status} -> {self.to_status}>"
+
+
+class UserStats(db.Model):
+    """Per-user, per-status rollup of application counters
+
+    Maintained incrementally by the write endpoints so /api/stats can read a
+    handful of rows instead of scanning applications.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    application_count = db.Column(db.Integer, nullable=False, default=0)
+    favorite_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def apply_delta(user_id, status, applications=0, favorites=0):
+        """Add to the counters for (user_id, status) inside the current transaction"""
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(UserStats).values(
+            user_id=user_id,
+            status=status,
+            application_count=applications,
+            favorite_count=favorites
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'status'],
+            set_={
+                'application_count': UserStats.application_count + applications,
+                'favorite_count': UserStats.favorite_count + favorites
+            }
+        )
+        db.session.execute(stmt)
+
+    def __repr__(self):
+        return f"<UserStats user {self.user_id} {self.status}: {self.application_count}>"
+
+
+class AnalyticsSnapshot(db.Model):
+    """Precomputed /api/analytics payload for one user
+
+    Written only by the analytics refresh job (analytics.py), so the endpoint
+    reads one row by primary key.
+    """
+    __tablename__ = 'analytics_snapshots'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+
+class JobWatermark(db.Model):
+    """The updated_at up to which a background job has processed rows"""
+    __tablename__ = 'job_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    high_water = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,276 @@
+"""
+Read queries shared by the WSGI views in app.py and the async views in asgi.py
+
+Functions take an explicit Session so the async side can run them through
+AsyncSession.run_sync.
+"""
+
+from sqlalchemy import and_, or_, func
+from datetime import datetime, date, timedelta
+from models import Application, ApplicationTombstone
+import base64
+import json
+
+
+# Sort fields accepted by GET /api/applications. Nullable columns are sorted
+# through COALESCE so that keyset comparisons never see NULL.
+SORTABLE_FIELDS = {
+    'date_applied': Application.date_applied,
+    'created_at': Application.created_at,
+    'updated_at': Application.updated_at,
+    'company': Application.company,
+    'position': Application.position,
+    'status': Application.status,
+    'location': func.coalesce(Application.location, ''),
+}
+# Cursor sort values that are integers rather than strings (see board.py)
+INTEGER_CURSOR_FIELDS = ('board_rank',)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Fields of an application payload, in Application.to_dict() order. List
+# responses select just these columns as plain rows and leave dates to the
+# JSON encoder, which skips building ORM objects for large lists.
+APPLICATION_FIELDS = (
+    'id', 'company', 'position', 'status', 'date_applied', 'job_url', 'location',
+    'salary_range', 'notes', 'is_favorite', 'created_at', 'updated_at',
+)
+
+# Delta sync re-sends rows changed this long before the client's token, so a
+# transaction that stamped updated_at before the token was issued but
+# committed after it (or a worker with a slightly fast clock) is not missed.
+# Clients apply changes idempotently, by id.
+SYNC_OVERLAP = timedelta(seconds=5)
+# Above this many changed rows a full reload is cheaper than the delta
+SYNC_MAX_CHANGES = 1000
+
+
+def parse_bool(value):
+    """Parse a boolean query string value, returning None if it is not one"""
+    if value is None:
+        return None
+    value = value.lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    return None
+
+
+def encode_cursor(sort_field, value, row_id):
+    """Encode the last row of a page as an opaque cursor"""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    payload = json.dumps([sort_field, value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor, sort_field):
+    """Decode a cursor into (value, id), raising ValueError if it is malformed"""
+    try:
+        field, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if field != sort_field or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("Cursor does not match the requested sort")
+    # Board ranks are encoded as integers, every other sort value as a string;
+    # anything else would reach SQL
+    if sort_field in INTEGER_CURSOR_FIELDS:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, str)
+    if not valid:
+        raise ValueError("Invalid cursor")
+    try:
+        if sort_field == 'date_applied':
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        elif sort_field in ('created_at', 'updated_at'):
+            value = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return value, row_id
+
+
+def encode_sync_token(moment):
+    """Encode the time a sync snapshot was taken as an opaque token"""
+    return base64.urlsafe_b64encode(moment.isoformat().encode('ascii')).decode('ascii')
+
+
+def decode_sync_token(token):
+    """Decode a sync token into a datetime, raising ValueError if it is malformed"""
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode('ascii')).decode('ascii'))
+    except Exception:
+        raise ValueError("Invalid sync token")
+
+
+def parse_fields(value):
+    """Parse a ?fields= sparse fieldset; id is always included"""
+    if not value:
+        return APPLICATION_FIELDS
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in APPLICATION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys(['id', *fields]))
+
+
+def filter_applications(query, user_id, args):
+    """Apply the user scope and the status, q and is_favorite filters"""
+    query = query.filter(Application.user_id == user_id)
+
+    status = args.get('status')
+    if status:
+        query = query.filter(Application.status == status)
+
+    is_favorite = parse_bool(args.get('is_favorite'))
+    if is_favorite is not None:
+        query = query.filter(Application.is_favorite == is_favorite)
+
+    q = args.get('q', '').strip()
+    if q:
+        query = query.filter(or_(
+            Application.company.icontains(q, autoescape=True),
+            Application.position.icontains(q, autoescape=True),
+            Application.location.icontains(q, autoescape=True),
+        ))
+
+    return query
+
+
+def get_user_application(session, user_id, application_id):
+    """Load one application if it belongs to the user"""
+    return session.query(Application).filter_by(id=application_id, user_id=user_id).first()
+
+
+def list_applications(session, user_id, args):
+    """Return one page of the user's applications as a response payload
+
+    `args` is a werkzeug MultiDict of query parameters:
+        status, q, is_favorite -- filters applied in SQL
+        sort -- one of SORTABLE_FIELDS (default date_applied)
+        order -- asc or desc (default desc)
+        limit -- page size; when omitted the full filtered list is returned
+        cursor -- next_cursor from the previous page
+        fields -- comma-separated subset of APPLICATION_FIELDS
+
+    Rows come back as dicts of raw column values (date and datetime objects
+    included), so the payload must go through the orjson encoder. The
+    sync_token in the payload starts delta sync (application_changes).
+
+    Raises ValueError for invalid parameters.
+    """
+    issued = datetime.utcnow()
+    fields = parse_fields(args.get('fields'))
+    sort_field = args.get('sort', 'date_applied')
+    if sort_field not in SORTABLE_FIELDS:
+        raise ValueError(f"Invalid sort field: {sort_field}")
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("Order must be 'asc' or 'desc'")
+
+    limit = args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    elif 'cursor' in args:
+        limit = DEFAULT_PAGE_SIZE
+
+    # The sort column is selected after the requested fields when the client
+    # left it out, so the cursor can still be built from the last row.
+    columns = fields if sort_field in fields else fields + (sort_field,)
+    filtered = filter_applications(
+        session.query(*[getattr(Application, name) for name in columns]), user_id, args
+    )
+    total = filtered.order_by(None).count()
+
+    sort_column = SORTABLE_FIELDS[sort_field]
+    query = filtered
+    if args.get('cursor'):
+        last_value, last_id = decode_cursor(args['cursor'], sort_field)
+        # Row-value comparison spelled out so it works on SQLite and Postgres
+        if order == 'desc':
+            query = query.filter(or_(
+                sort_column < last_value,
+                and_(sort_column == last_value, Application.id < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > last_value,
+                and_(sort_column == last_value, Application.id > last_id)
+            ))
+
+    if order == 'desc':
+        query = query.order_by(sort_column.desc(), Application.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Application.id.asc())
+
+    next_cursor = None
+    if limit is None:
+        rows = query.all()
+    else:
+        # Fetch one extra row to learn whether another page exists
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            last_value = (last.location or '') if sort_field == 'location' else getattr(last, sort_field)
+            next_cursor = encode_cursor(sort_field, last_value, last.id)
+
+    if len(columns) > len(fields):
+        rows = [row[:-1] for row in rows]
+    return {
+        "applications": [dict(zip(fields, row)) for row in rows],
+        "total": total,
+        "next_cursor": next_cursor,
+        "sync_token": encode_sync_token(issued)
+    }
+
+
+def changed_rows(session, user_id, window_start, limit):
+    """Up to `limit` of the user's rows updated at or after window_start, as dicts"""
+    rows = session.query(*[getattr(Application, name) for name in APPLICATION_FIELDS]) \
+        .filter(Application.user_id == user_id, Application.updated_at >= window_start) \
+        .order_by(Application.updated_at, Application.id) \
+        .limit(limit) \
+        .all()
+    return [dict(zip(APPLICATION_FIELDS, row)) for row in rows]
+
+
+def deleted_ids(session, user_id, window_start):
+    """Ids of the user's applications deleted at or after window_start"""
+    rows = session.query(ApplicationTombstone.application_id) \
+        .filter(ApplicationTombstone.user_id == user_id, ApplicationTombstone.deleted_at >= window_start) \
+        .distinct() \
+        .all()
+    return {application_id for application_id, in rows}
+
+
+def application_changes(session, user_id, since, retention):
+    """Return the rows changed and ids deleted since a sync token
+
+    `since` is a decoded sync token and `retention` how long tombstones are
+    kept. When the token predates the oldest tombstone that may still exist,
+    or more than SYNC_MAX_CHANGES rows changed, the payload has reset=True
+    and no rows: the client should reload the full list instead.
+
+    Raises ValueError for a token from the future.
+    """
+    issued = datetime.utcnow()
+    if since > issued + SYNC_OVERLAP:
+        raise ValueError("Invalid sync token")
+    payload = {"changed": [], "deleted": [], "reset": False, "sync_token": encode_sync_token(issued)}
+    if since < issued - retention:
+        payload["reset"] = True
+        return payload
+
+    window_start = since - SYNC_OVERLAP
+    changed = changed_rows(session, user_id, window_start, SYNC_MAX_CHANGES + 1)
+    if len(changed) > SYNC_MAX_CHANGES:
+        payload["reset"] = True
+        return payload
+
+    # SQLite can hand a deleted id to a new row; a row that exists now wins
+    live = {row['id'] for row in changed}
+    payload["changed"] = changed
+    payload["deleted"] = sorted(deleted_ids(session, user_id, window_start) - live)
+    return payload
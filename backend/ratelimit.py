@@ -0,0 +1,214 @@
+"""
+Token-bucket rate limiting for the auth and write endpoints
+
+Limits are set per endpoint as comma-separated rules:
+
+    "10/minute per ip, 5/minute per email"
+
+Each rule is a bucket holding `count` tokens that refills at count/period,
+so a client may burst up to `count` requests and then sustain the rate.
+Keys are the client IP, the lowercased `email` field of the JSON body, or
+the user id in the access token. The check runs in a before_request hook, so
+a limited request is answered 429 with Retry-After before its view does any
+database or bcrypt work.
+
+Backends (RATE_LIMIT_BACKEND):
+    memory -- in-process buckets; each worker enforces the limit separately
+    redis  -- buckets shared by every worker, updated atomically in Lua
+    none   -- rate limiting disabled
+"""
+
+from collections import OrderedDict, namedtuple
+from flask import jsonify, request
+from flask_jwt_extended import decode_token
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+KEYS = ('ip', 'email', 'user')
+
+# Endpoint (view function name) -> rules; RATE_LIMIT_<ENDPOINT> overrides one
+DEFAULT_LIMITS = {
+    'login': '20/minute per ip, 5/minute per email',
+    'register': '10/minute per ip, 50/day per ip',
+    'forgot_password': '5/minute per ip, 3/hour per email',
+    'reset_password': '10/minute per ip',
+    'verify_reset_token': '30/minute per ip',
+    'create_application': '120/minute per user',
+    'update_application': '120/minute per user',
+    'delete_application': '120/minute per user',
+    'toggle_favorite': '120/minute per user',
+    'move_board_card': '120/minute per user',
+    'bulk_applications': '20/minute per user',
+    'import_applications': '5/minute per user',
+}
+
+Rule = namedtuple('Rule', ['count', 'period', 'key'])
+
+
+def parse_rules(spec):
+    """Parse "10/minute per ip, ..." into Rules, raising ValueError if malformed"""
+    rules = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            rate, per, key = part.split()
+            count, period = rate.split('/')
+            rule = Rule(int(count), PERIODS[period.rstrip('s')], key)
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate limit rule: {part!r}")
+        if per != 'per' or key not in KEYS or rule.count < 1:
+            raise ValueError(f"Invalid rate limit rule: {part!r}")
+        rules.append(rule)
+    return rules
+
+
+class MemoryBackend:
+    """In-process token buckets, LRU-bounded so key spraying cannot grow memory"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, capacity, rate):
+        """Take a token; returns 0 if one was available, else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# KEYS[1] bucket; ARGV capacity, refill rate per second. Uses the server
+# clock so workers with drifting clocks share one timeline.
+_REDIS_HIT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Token buckets in Redis, shared by every worker"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._hit = self.client.register_script(_REDIS_HIT)
+
+    def hit(self, key, capacity, rate):
+        return float(self._hit(keys=[f"jobtracker:ratelimit:{key}"], args=[capacity, rate]))
+
+
+class RateLimiter:
+    """Flask extension enforcing RATE_LIMITS before views run"""
+
+    def __init__(self):
+        self.backend = None
+        self.limits = {}
+        self.limited = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        if kind == 'memory':
+            self.backend = MemoryBackend(app.config.get('RATE_LIMIT_MAX_ENTRIES', 100000))
+        elif kind == 'redis':
+            self.backend = RedisBackend(app.config['RATE_LIMIT_URL'])
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {kind}")
+        self.limits = {
+            endpoint: parse_rules(spec)
+            for endpoint, spec in app.config.get('RATE_LIMITS', {}).items()
+        }
+        self.trusts_proxy = bool(app.config.get('TRUSTED_PROXIES'))
+        self._warned_proxy = False
+        app.before_request(self._before_request)
+
+    def _key_value(self, key):
+        if key == 'ip':
+            if not self.trusts_proxy and not self._warned_proxy and 'X-Forwarded-For' in request.headers:
+                # Behind a load balancer every client would share its address and bucket
+                self._warned_proxy = True
+                logger.warning("Per-IP rate limits see the proxy address: X-Forwarded-For is set "
+                               "but TRUSTED_PROXIES is 0")
+            return request.remote_addr
+        if key == 'email':
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            return email.strip().lower() if isinstance(email, str) and email.strip() else None
+        # Signature-checked decode only; the user lookup happens in the view
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return None
+        try:
+            return decode_token(header[len('Bearer '):])['sub']
+        except Exception:
+            return None
+
+    def _before_request(self):
+        # CORS preflights carry no credentials or body and cost nothing
+        if self.backend is None or request.method == 'OPTIONS':
+            return None
+        # Views are registered on the `api` blueprint: match the view name
+        endpoint = (request.endpoint or '').rpartition('.')[2]
+        rules = self.limits.get(endpoint)
+        if not rules:
+            return None
+
+        wait = 0.0
+        for rule in rules:
+            value = self._key_value(rule.key)
+            if value is None:
+                continue
+            bucket = f"{endpoint}:{rule.count}/{rule.period}:{rule.key}:{value}"
+            try:
+                wait = max(wait, self.backend.hit(bucket, rule.count, rule.count / rule.period))
+            except Exception:
+                # Fail open: an unreachable shared backend must not take auth down
+                logger.exception("Rate limit check failed for %s", endpoint)
+                return None
+        if wait <= 0:
+            return None
+
+        with self._lock:
+            self.limited += 1
+        response = jsonify({"success": False, "error": "Too many requests, please try again later"})
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response, 429
+
+
+rate_limiter = RateLimiter()
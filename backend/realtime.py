@@ -0,0 +1,229 @@
+"""
+Server-sent events: per-user change notifications
+
+Write endpoints call event_publisher.publish_changes() after committing. The
+message goes through a pub/sub backend to the broker of every process that
+serves streams, which fans it out to that user's open connections.
+
+Backends (EVENTS_BACKEND):
+    memory -- local stand-in for pub/sub: delivers straight to this
+              process's broker, so it only reaches streams served by the same
+              process (uvicorn asgi:app with one worker; development)
+    redis  -- Redis pub/sub on EVENTS_URL; each ASGI process holds one
+              subscription and fans out locally (gunicorn + uvicorn, or
+              several uvicorn workers)
+    none   -- publishing disabled
+
+The stream endpoint itself lives in asgi.py: an idle connection there is an
+asyncio queue and a parked coroutine, where on gunicorn it would hold a
+thread. Events only say what changed; clients fetch the rows through
+/api/applications/changes, so a dropped event costs at most a late refresh.
+
+EventSource cannot send headers, so browsers open the stream with a ticket
+in the query string (POST /api/events/ticket). A ticket is a JWT signed with
+a key of its own, so only the stream accepts it, and it expires after
+TICKET_SECONDS: an access log that records it does not leak a usable token.
+The stream stays open until the access token the ticket came from expires.
+"""
+
+from serialization import dumps
+import asyncio
+import hashlib
+import hmac
+import jwt
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'jobtracker:events:'
+
+# Sent in place of the backlog when a slow client's queue overflows
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+
+TICKET_TYPE = 'event-stream'
+TICKET_SECONDS = 60
+
+
+def ticket_key(secret):
+    """Tickets are signed with a key of their own, so they never verify as access tokens"""
+    return hmac.new(secret.encode('utf-8'), TICKET_TYPE.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def issue_stream_ticket(user_id, stream_until, secret, algorithm='HS256'):
+    """A short-lived ticket for opening user_id's stream; `stream_until` is when the stream must close"""
+    now = int(time.time())
+    claims = {'sub': str(user_id), 'type': TICKET_TYPE, 'iat': now, 'exp': now + TICKET_SECONDS}
+    if stream_until is not None:
+        claims['until'] = stream_until
+    return jwt.encode(claims, ticket_key(secret), algorithm=algorithm)
+
+
+def decode_stream_ticket(ticket, secret, algorithm='HS256'):
+    """Return the ticket's claims, raising jwt.PyJWTError if it is invalid, expired or another kind of token"""
+    claims = jwt.decode(ticket, ticket_key(secret), algorithms=[algorithm])
+    if claims.get('type') != TICKET_TYPE:
+        raise jwt.InvalidTokenError("Not a stream ticket")
+    return claims
+
+
+def format_event(event, data):
+    """Encode one event in the text/event-stream format"""
+    return b'event: ' + event.encode('ascii') + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+class Broker:
+    """Fans messages out to the asyncio queues of open streams, per user
+
+    deliver() may be called from any thread (Flask views run in a thread
+    pool under asgi.py); queues are only touched on their event loop.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def connections(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id):
+        """Register a stream; call from the event loop that will read the queue"""
+        queue = asyncio.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id, {})
+            queues.pop(queue, None)
+            if not queues:
+                self._subscribers.pop(user_id, None)
+
+    def deliver(self, user_id, message):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(self._put, queue, message)
+
+    @staticmethod
+    def _put(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # The client is not keeping up; drop its backlog and tell it to
+            # resync from the changes endpoint instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+
+class MemoryPubSub:
+    """In-process stand-in for Redis pub/sub"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, user_id, message):
+        self.broker.deliver(user_id, message)
+
+    async def listen(self):
+        """Nothing to receive: publish() already delivered locally"""
+
+
+class RedisPubSub:
+    """Redis pub/sub shared by every process; one channel per user"""
+
+    def __init__(self, broker, url):
+        import redis
+
+        self.broker = broker
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, message):
+        self.client.publish(f"{CHANNEL_PREFIX}{user_id}", message)
+
+    async def listen(self):
+        """Relay every user's channel to the local broker until cancelled"""
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'pmessage':
+                    continue
+                user_id = int(message['channel'].decode('ascii')[len(CHANNEL_PREFIX):])
+                self.broker.deliver(user_id, message['data'])
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class EventPublisher:
+    """Flask extension publishing change events to users' streams"""
+
+    def __init__(self):
+        self.broker = Broker()
+        self.backend = None
+        self.heartbeat = 25
+        self.published = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.get('EVENTS_BACKEND', 'memory')
+        self.broker.queue_size = app.config.get('EVENTS_QUEUE_SIZE', 100)
+        self.heartbeat = app.config.get('EVENTS_HEARTBEAT', 25)
+        if kind == 'memory':
+            self.backend = MemoryPubSub(self.broker)
+        elif kind == 'redis':
+            self.backend = RedisPubSub(self.broker, app.config['EVENTS_URL'])
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown EVENTS_BACKEND: {kind}")
+
+    def publish_changes(self, user_id, changed=(), deleted=()):
+        """Tell a user's streams that applications and stats changed
+
+        Call after the write has committed. A failure to publish is logged
+        and never fails the request.
+        """
+        if self.backend is None:
+            return
+        message = format_event('applications', {'changed': list(changed), 'deleted': list(deleted)}) \
+            + format_event('stats', {})
+        try:
+            self.backend.publish(user_id, message)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            logger.exception("Could not publish change events for user %s", user_id)
+            return
+        with self._lock:
+            self.published += 1
+
+    async def listen(self):
+        """Relay events from other processes until cancelled, reconnecting on errors"""
+        if self.backend is None:
+            return
+        while True:
+            try:
+                await self.backend.listen()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event subscription failed; retrying")
+                await asyncio.sleep(1)
+
+
+event_publisher = EventPublisher()
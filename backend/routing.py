@@ -0,0 +1,276 @@
+"""
+Connection pools and read-replica routing
+
+Pools: engine_options() turns the DB_POOL_* settings into engine options.
+Connections are recycled after DB_POOL_RECYCLE seconds instead of being
+pinged on every checkout (DB_POOL_PRE_PING restores the ping for networks
+that drop idle connections sooner). Every checkout is timed, so
+/api/metrics shows how long requests queue for a connection and how often
+they give up after DB_POOL_TIMEOUT.
+
+Replicas: with DATABASE_REPLICA_URL set, db.session is a RoutingSession.
+Requests to REPLICA_ENDPOINTS read from the replica; everything else, and
+any flush or INSERT/UPDATE/DELETE, uses the primary. PRIMARY_ENDPOINTS never
+use the replica, even if listed. After a user's write
+succeeds their reads stay on the primary for REPLICA_STICKY_SECONDS, so
+they never see the replica's lag as their own change disappearing.
+
+Stickiness backends (REPLICA_STICKY_BACKEND):
+    memory -- per process; with several workers a read that lands on
+              another worker may still go to the replica
+    redis  -- shared by every worker (REPLICA_STICKY_URL)
+"""
+
+from collections import OrderedDict
+from flask import g, has_request_context, request
+from flask_jwt_extended import decode_token
+from flask_sqlalchemy.session import Session
+from metrics import Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+DEFAULT_REPLICA_ENDPOINTS = ('get_current_user', 'get_analytics')
+# Views whose reads must be current. The list and changes endpoints issue a
+# sync token stamped with the app clock, and a replica lagging by more than
+# SYNC_OVERLAP would make the next delta skip rows for good. The cached views
+# store their body under the user's current data version, so a stale
+# replica read would be served until that version changes.
+PRIMARY_ENDPOINTS = frozenset([
+    'get_applications', 'get_application_changes', 'get_application', 'get_statistics', 'get_board',
+    'get_transitions', 'get_time_in_stage',
+])
+
+
+class PoolMetrics:
+    """Checkout wait histogram and timeout counter per pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = Histogram(WAIT_BUCKETS)
+        self.timeouts = {}
+
+    def observe(self, pool_name, elapsed, timed_out=False):
+        with self._lock:
+            self.waits.observe((pool_name,), elapsed)
+            if timed_out:
+                self.timeouts[pool_name] = self.timeouts.get(pool_name, 0) + 1
+
+    def render(self, engines):
+        """Prometheus lines for the waits and the current state of engines' pools"""
+        with self._lock:
+            lines = [
+                '# HELP jobtracker_db_pool_checkout_seconds Time spent waiting for a pooled connection',
+                '# TYPE jobtracker_db_pool_checkout_seconds histogram',
+                *self.waits.render('jobtracker_db_pool_checkout_seconds', ('pool',)),
+                '# HELP jobtracker_db_pool_timeouts_total Checkouts that gave up after DB_POOL_TIMEOUT',
+                '# TYPE jobtracker_db_pool_timeouts_total counter',
+                *(f'jobtracker_db_pool_timeouts_total{{pool="{name}"}} {count}'
+                  for name, count in sorted(self.timeouts.items())),
+            ]
+        pools = sorted((engine.pool for engine in engines if isinstance(engine.pool, QueuePool)),
+                       key=lambda pool: pool.logging_name)
+        gauges = [
+            ('jobtracker_db_pool_size', 'Connections the pool keeps open', lambda pool: pool.size()),
+            ('jobtracker_db_pool_checked_out', 'Connections in use', lambda pool: pool.checkedout()),
+            # overflow() counts down from -size while the pool is filling
+            ('jobtracker_db_pool_overflow', 'Connections open beyond the pool size',
+             lambda pool: max(0, pool.overflow())),
+        ]
+        for name, help_text, value in gauges:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+            lines += [f'{name}{{pool="{pool.logging_name}"}} {value(pool)}' for pool in pools]
+        return lines
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """Records how long each checkout waited, including opening a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            pool_metrics.observe(self.logging_name, time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(self.logging_name, time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url, config, name, is_async=False):
+    """Engine options for url from the DB_POOL_* settings in config"""
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    # In-memory SQLite uses a single shared connection, not a queue
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:'):
+        return options
+    options.update({
+        'poolclass': TimedAsyncQueuePool if is_async else TimedQueuePool,
+        'pool_logging_name': name,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+    })
+    return options
+
+
+class MemoryStickiness:
+    """Per-process record of users who wrote recently, LRU-bounded"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._until = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, seconds):
+        with self._lock:
+            self._until[user_id] = time.monotonic() + seconds
+            self._until.move_to_end(user_id)
+            while len(self._until) > self.max_entries:
+                self._until.popitem(last=False)
+
+    def active(self, user_id):
+        with self._lock:
+            until = self._until.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._until[user_id]
+                return False
+            return True
+
+
+class RedisStickiness:
+    """Recent writers as expiring Redis keys, shared by every worker"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def mark(self, user_id, seconds):
+        self.client.set(f"jobtracker:sticky:{user_id}", b'1', px=max(1, int(seconds * 1000)))
+
+    def active(self, user_id):
+        return bool(self.client.exists(f"jobtracker:sticky:{user_id}"))
+
+
+def token_user_id():
+    """User id from the request's bearer token, or None (no user lookup)"""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return int(decode_token(header[len('Bearer '):])['sub'])
+    except Exception:
+        return None
+
+
+class ReplicaRouter:
+    """Flask extension deciding which requests may read from the replica"""
+
+    def __init__(self):
+        self.enabled = False
+        self.endpoints = frozenset()
+        self.sticky_seconds = 5.0
+        self.store = None
+        self.routed = {'primary': 0, 'replica': 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {})
+        endpoints = frozenset(app.config.get('REPLICA_ENDPOINTS', DEFAULT_REPLICA_ENDPOINTS))
+        if endpoints & PRIMARY_ENDPOINTS:
+            logger.warning("Ignoring REPLICA_ENDPOINTS that must read the primary: %s",
+                           ', '.join(sorted(endpoints & PRIMARY_ENDPOINTS)))
+        self.endpoints = endpoints - PRIMARY_ENDPOINTS
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5.0)
+        kind = app.config.get('REPLICA_STICKY_BACKEND', 'memory')
+        if kind == 'memory':
+            self.store = MemoryStickiness()
+        elif kind == 'redis':
+            self.store = RedisStickiness(app.config['REPLICA_STICKY_URL'])
+        else:
+            raise ValueError(f"Unknown REPLICA_STICKY_BACKEND: {kind}")
+        if self.enabled:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def prefer_replica(self, user_id):
+        """Whether user_id's reads may go to the replica right now"""
+        if not self.enabled:
+            return False
+        try:
+            sticky = self.store.active(user_id)
+        except Exception:
+            # Unknown: the primary is always safe
+            logger.exception("Replica stickiness check failed")
+            sticky = True
+        with self._lock:
+            self.routed['primary' if sticky else 'replica'] += 1
+        return not sticky
+
+    def mark_write(self, user_id):
+        """Keep user_id's reads on the primary until the replica has caught up"""
+        if not self.enabled:
+            return
+        try:
+            self.store.mark(user_id, self.sticky_seconds)
+        except Exception:
+            logger.exception("Could not record write for user %s", user_id)
+
+    def use_replica(self):
+        """Whether the current request reads from the replica"""
+        return has_request_context() and g.get('use_replica', False)
+
+    def _before_request(self):
+        if (request.endpoint or '').rpartition('.')[2] not in self.endpoints:
+            return None
+        user_id = token_user_id()
+        # Without a valid token the view rejects the request before reading
+        g.use_replica = user_id is not None and self.prefer_replica(user_id)
+        return None
+
+    def _after_request(self, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = token_user_id()
+            if user_id is not None:
+                self.mark_write(user_id)
+        return response
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """db.session: sends replica-routed reads to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and replica_router.use_replica() \
+                and not getattr(clause, 'is_dml', False):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,106 @@
+"""
+Alembic migrations (migrations/), applied as an explicit step
+
+Importing the app never touches the schema, and Flask-Migrate (with Alembic)
+is only imported when a migration command runs, so web processes start
+without either. Migrate with
+
+    flask --app app upgrade-db
+
+as a release/pre-deploy command, or `python app.py` in development.
+Upgrades are serialized: PostgreSQL takes an advisory lock and file-backed
+SQLite takes an flock on a sidecar file, so if several processes run the
+upgrade the first applies pending migrations and the rest find the database
+already at head. The usual `flask --app app db ...` commands still work.
+"""
+
+from contextlib import contextmanager
+from flask.cli import ScriptInfo
+from models import db
+from sqlalchemy import text
+import click
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locking, migrate without it
+    fcntl = None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Arbitrary constant identifying the migration lock among advisory locks
+MIGRATION_LOCK_KEY = 7_341_902_155
+
+
+def include_name(name, type_, parent_names):
+    """Hide objects the models do not describe from autogenerate
+
+    The search index objects (migration 0004) and the PostgreSQL partitions
+    of application_events (migration 0006).
+    """
+    if type_ == 'table':
+        return not name.startswith(('applications_fts', 'application_events_p'))
+    if type_ == 'index':
+        return name != 'ix_applications_search'
+    return True
+
+
+@contextmanager
+def migration_lock(engine):
+    """Hold a lock that only one process at a time can take"""
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        return
+
+    database = engine.url.database
+    if fcntl is None or engine.dialect.name != 'sqlite' or not database or database == ':memory:':
+        yield
+        return
+    with open(f"{database}.migrate-lock", 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def init_migrate(app):
+    """Set up Flask-Migrate on app, once"""
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+
+        Migrate(app, db, directory=MIGRATIONS_DIR, render_as_batch=True, include_name=include_name)
+
+
+class LazyMigrateCommand(click.Command):
+    """`flask db`: hands its arguments to Flask-Migrate's group, imported on use"""
+
+    def __init__(self):
+        super().__init__('db', help='Perform database migrations.', add_help_option=False,
+                         context_settings={'ignore_unknown_options': True, 'allow_extra_args': True})
+
+    def invoke(self, ctx):
+        from flask_migrate.cli import db as migrate_group
+
+        init_migrate(ctx.ensure_object(ScriptInfo).load_app())
+        with migrate_group.make_context(ctx.info_name, list(ctx.args), parent=ctx.parent) as group_ctx:
+            return migrate_group.invoke(group_ctx)
+
+
+def register_migrations(app):
+    """Add `flask db` to app's CLI without importing Alembic"""
+    app.cli.add_command(LazyMigrateCommand())
+
+
+def upgrade_database(app):
+    """Upgrade the app's database to the latest migration"""
+    from flask_migrate import upgrade
+
+    init_migrate(app)
+    with app.app_context(), migration_lock(db.engine):
+        upgrade(directory=MIGRATIONS_DIR)
@@ -0,0 +1,126 @@
+"""
+Full-text search over company, position, location and notes
+
+SQLite uses an FTS5 table kept in sync by triggers; each row carries an
+`owner` token (u<user_id>) so matches are scoped to one user inside the index.
+PostgreSQL uses a GIN index over a tsvector expression, so the index itself
+is always in sync and no triggers are needed. Both are created by migration
+0004; _PG_DOCUMENT must stay identical to the indexed expression there.
+"""
+
+from sqlalchemy import text
+import html
+import re
+
+SEARCH_FIELDS = ('company', 'position', 'location', 'notes')
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+RANK_WINDOW = 2000
+
+_SQLITE_REBUILD = """
+    INSERT INTO applications_fts(rowid, owner, company, position, location, notes)
+    SELECT id, 'u' || user_id, company, position, location, notes FROM applications
+"""
+
+_PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(company, '') || ' ' || coalesce(position, '') || ' ' || "
+    "coalesce(location, '') || ' ' || coalesce(notes, ''))"
+)
+
+
+def rebuild_search(engine):
+    """Repopulate the SQLite FTS table from applications (no-op on PostgreSQL)"""
+    if engine.dialect.name == 'postgresql':
+        return
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM applications_fts"))
+        conn.execute(text(_SQLITE_REBUILD))
+
+
+def tokenize(query):
+    """Split user input into safe search terms"""
+    return re.findall(r'\w+', query.lower())
+
+
+def search_applications(session, user_id, query, limit=20):
+    """Return [(application_id, rank)] best match first, rank higher-is-better
+
+    Every term must match; the last term also matches as a prefix so results
+    update while the user is typing.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    if session.get_bind().dialect.name == 'postgresql':
+        tsquery = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+        rows = session.execute(text(f"""
+            SELECT id, ts_rank({_PG_DOCUMENT}, q) AS rank
+            FROM applications, to_tsquery('simple', :query) AS q
+            WHERE user_id = :user_id AND {_PG_DOCUMENT} @@ q
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit
+        """), {'query': tsquery, 'user_id': user_id, 'limit': limit})
+        return [(row[0], float(row[1])) for row in rows]
+
+    terms_match = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    terms_match = f'{{company position location notes}}: ({terms_match})'
+    scoped_match = f'owner:u{user_id} AND {terms_match}'
+    # bm25 has to score every match, so broad terms on big accounts only rank
+    # the RANK_WINDOW newest matches; walking the doclist by rowid is cheap.
+    floor = session.execute(text("""
+        SELECT rowid FROM applications_fts
+        WHERE applications_fts MATCH :match
+        ORDER BY rowid DESC
+        LIMIT 1 OFFSET :window
+    """), {'match': scoped_match, 'window': RANK_WINDOW - 1}).scalar() or 0
+    ranked = session.execute(text("""
+        SELECT rowid, bm25(applications_fts, 0.0, 10.0, 5.0, 2.0, 1.0) AS rank
+        FROM applications_fts
+        WHERE applications_fts MATCH :match AND rowid >= :floor
+        ORDER BY rank, rowid DESC
+        LIMIT :limit
+    """), {'match': scoped_match, 'floor': floor, 'limit': limit}).all()
+
+    # bm25 is lower-is-better; flip it so both backends rank higher-is-better
+    return [(row_id, -rank) for row_id, rank in ranked]
+
+
+def make_snippet(application, query, width=12):
+    """Highlight query terms in the best matching field of an application
+
+    Built in Python for the handful of rows on a page; asking SQLite for
+    snippets would re-run the MATCH once per row. Text is HTML-escaped so the
+    snippet can be rendered as markup.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return None
+    alternatives = [re.escape(term) + r'\b' for term in terms[:-1]] + [re.escape(terms[-1]) + r'\w*']
+    pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + ')', re.IGNORECASE)
+
+    best = None
+    for field in SEARCH_FIELDS:
+        value = getattr(application, field) or ''
+        hits = len(pattern.findall(value))
+        if hits and (best is None or hits > best[0]):
+            best = (hits, value)
+    if best is None:
+        return None
+
+    words = best[1].split()
+    first = next(i for i, word in enumerate(words) if pattern.search(word))
+    start = max(0, first - width // 3)
+    excerpt = ' '.join(words[start:start + width])
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[position:match.start()]))
+        parts.append(SNIPPET_START + html.escape(match.group(0)) + SNIPPET_END)
+        position = match.end()
+    parts.append(html.escape(excerpt[position:]))
+
+    prefix = '...' if start > 0 else ''
+    suffix = '...' if start + width < len(words) else ''
+    return prefix + ''.join(parts) + suffix
@@ -0,0 +1,39 @@
+"""
+orjson-backed JSON for Flask and the ASGI views
+
+orjson encodes date and datetime natively in the same ISO 8601 form as
+isoformat(), so list payloads can carry raw column values instead of
+pre-formatted strings.
+"""
+
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+import orjson
+
+
+def _default(obj):
+    # Postgres NUMERIC aggregates come back as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Encode obj as UTF-8 JSON bytes"""
+    return orjson.dumps(obj, default=_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider used by jsonify and request.get_json"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
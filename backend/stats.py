@@ -0,0 +1,215 @@
+"""
+SQL-side aggregation for the dashboard statistics endpoint
+"""
+
+from sqlalchemy import case, func, literal, select, union_all
+from models import db, Application, UserStats
+
+# Pipeline order used for the funnel; Rejected is a terminal state outside it
+FUNNEL_STAGES = ['Applied', 'Phone Screen', 'Interview', 'Offer']
+INTERVALS = ('week', 'month')
+BREAKDOWNS = ('timeline', 'median')
+
+
+def _dialect(session):
+    return session.get_bind().dialect.name
+
+
+def period_expression(interval, dialect):
+    """SQL expression bucketing date_applied to the start of its week or month"""
+    column = Application.date_applied
+    if dialect == 'postgresql':
+        return func.to_char(func.date_trunc(interval, column), 'YYYY-MM-DD')
+    if interval == 'week':
+        # Weeks start on Monday, matching date_trunc('week') on Postgres
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.strftime('%Y-%m-01', column)
+
+
+def days_to_response_expression(dialect):
+    """SQL expression for days between applying and the last status change"""
+    if dialect == 'postgresql':
+        return func.extract('epoch', Application.updated_at - func.cast(Application.date_applied, db.DateTime)) / 86400.0
+    return func.julianday(Application.updated_at) - func.julianday(Application.date_applied)
+
+
+def status_counts(user_id, session):
+    """Return ({status: count}, favorites) from the UserStats rollup"""
+    rows = session.query(UserStats.status, UserStats.application_count, UserStats.favorite_count) \
+        .filter(UserStats.user_id == user_id) \
+        .all()
+    by_status = {status: count for status, count, _ in rows if count > 0}
+    favorites = sum(favorite_count for _, _, favorite_count in rows)
+    return by_status, favorites
+
+
+def track_change(user_id, before, after):
+    """Update the rollup for one application changing from `before` to `after`
+
+    Each side is a (status, is_favorite) tuple, or None when the application
+    did not exist (create) or no longer exists (delete).
+    """
+    before = (before[0], bool(before[1])) if before is not None else None
+    after = (after[0], bool(after[1])) if after is not None else None
+    if before == after:
+        return
+    if before is not None:
+        UserStats.apply_delta(user_id, before[0], applications=-1, favorites=-int(before[1]))
+    if after is not None:
+        UserStats.apply_delta(user_id, after[0], applications=1, favorites=int(after[1]))
+
+
+class StatsDelta:
+    """Accumulates rollup changes for many applications and applies them at once"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def change(self, before, after):
+        """Record one application changing; same arguments as track_change"""
+        for side, sign in ((before, -1), (after, 1)):
+            if side is not None:
+                counts = self.counts.setdefault(side[0], [0, 0])
+                counts[0] += sign
+                counts[1] += sign * int(bool(side[1]))
+
+    def apply(self, user_id):
+        """Write one upsert per touched status"""
+        for status, (applications, favorites) in self.counts.items():
+            if applications or favorites:
+                UserStats.apply_delta(user_id, status, applications, favorites)
+        self.counts = {}
+
+
+def reconcile_user_stats(fix=True):
+    """Correct the rollup where it disagrees with applications and return the drift found
+
+    Returns a list of (user_id, status, expected, actual) tuples where each
+    side is an (application_count, favorite_count) pair.
+
+    Both sides are read by one statement, so they come from one snapshot:
+    a write commits its application rows and its rollup delta together and
+    never shows up as drift. Each drifted counter gets a compensating delta
+    through UserStats.apply_delta, which adds to whatever concurrent writes
+    have applied since, and users without drift are not touched.
+    """
+    favorites = func.sum(case((Application.is_favorite, 1), else_=0))
+    sides = union_all(
+        select(Application.user_id, Application.status, func.count(Application.id).label('want_count'),
+               favorites.label('want_favorites'), literal(0).label('have_count'), literal(0).label('have_favorites'))
+        .group_by(Application.user_id, Application.status),
+        select(UserStats.user_id, UserStats.status, literal(0), literal(0),
+               UserStats.application_count, UserStats.favorite_count),
+    ).subquery()
+    totals = db.session.execute(
+        select(sides.c.user_id, sides.c.status,
+               func.sum(sides.c.want_count), func.sum(sides.c.want_favorites),
+               func.sum(sides.c.have_count), func.sum(sides.c.have_favorites))
+        .group_by(sides.c.user_id, sides.c.status)
+        .order_by(sides.c.user_id, sides.c.status)
+    ).all()
+
+    drift = []
+    for user_id, status, want_count, want_favorites, have_count, have_favorites in totals:
+        want = (int(want_count or 0), int(want_favorites or 0))
+        have = (int(have_count or 0), int(have_favorites or 0))
+        if want != have:
+            drift.append((user_id, status, want, have))
+
+    if fix and drift:
+        for user_id, status, want, have in drift:
+            UserStats.apply_delta(user_id, status, want[0] - have[0], want[1] - have[1])
+        db.session.commit()
+
+    return drift
+
+
+def timeline(user_id, interval, session):
+    """Return [{period, count, responses}] ordered by period"""
+    period = period_expression(interval, _dialect(session)).label('period')
+    responses = func.sum(case((Application.status != 'Applied', 1), else_=0))
+    rows = session.query(period, func.count(Application.id), responses) \
+        .filter(Application.user_id == user_id) \
+        .group_by(period) \
+        .order_by(period) \
+        .all()
+    return [
+        {'period': p, 'count': count, 'responses': int(resp or 0)}
+        for p, count, resp in rows
+    ]
+
+
+def funnel(by_status):
+    """Return stage reach counts and step conversion rates from status counts
+
+    An application counts as having reached every stage up to its current one.
+    Rejected applications are only known to have reached Applied.
+    """
+    total = sum(by_status.values())
+    stages = []
+    previous = total
+    for i, stage in enumerate(FUNNEL_STAGES):
+        if i == 0:
+            reached = total
+        else:
+            reached = sum(by_status.get(s, 0) for s in FUNNEL_STAGES[i:])
+        stages.append({
+            'stage': stage,
+            'reached': reached,
+            'conversion_rate': round(reached / previous * 100, 1) if previous else 0
+        })
+        previous = reached
+    return stages
+
+
+def median_days_to_response(user_id, session):
+    """Median days from applying to a response, computed in SQL
+
+    updated_at stands in for the response date since status changes are not
+    timestamped separately.
+    """
+    dialect = _dialect(session)
+    days = days_to_response_expression(dialect)
+    responded = session.query(days.label('days')) \
+        .filter(Application.user_id == user_id, Application.status != 'Applied')
+
+    if dialect == 'postgresql':
+        value = session.query(
+            func.percentile_cont(0.5).within_group(responded.subquery().c.days)
+        ).scalar()
+        return round(value, 1) if value is not None else None
+
+    count = responded.order_by(None).count()
+    if count == 0:
+        return None
+    # Average the one or two middle values, fetched with LIMIT/OFFSET
+    middle = responded.order_by(days).limit(2 - count % 2).offset((count - 1) // 2).all()
+    return round(sum(row.days for row in middle) / len(middle), 1)
+
+
+def compute_statistics(user_id, interval='month', include=(), session=None):
+    """Build the statistics payload for a user
+
+    Counters and the funnel come from the rollup and cost the same whatever the
+    account size. The timeline and median scan applications, so they are only
+    computed when named in `include`. `session` defaults to db.session.
+    """
+    session = session or db.session
+    by_status, favorites = status_counts(user_id, session)
+    total = sum(by_status.values())
+    responses = total - by_status.get('Applied', 0)
+    response_rate = round((responses / total * 100) if total > 0 else 0, 1)
+
+    stats = {
+        'total_applications': total,
+        'response_rate': response_rate,
+        'by_status': by_status,
+        'favorites': favorites,
+        'funnel': funnel(by_status)
+    }
+    if 'timeline' in include:
+        stats['timeline'] = timeline(user_id, interval, session)
+        stats['interval'] = interval
+    if 'median' in include:
+        stats['median_days_to_response'] = median_days_to_response(user_id, session)
+    return stats
@@ -0,0 +1,136 @@
+"""
+Streaming CSV / NDJSON export and import of applications
+
+Exports walk a server-side cursor (yield_per) and yield encoded chunks, so
+memory stays flat regardless of row count. Imports parse the upload line by
+line and insert in batches through Application.insert_many.
+"""
+
+from models import Application
+from history import StatusHistory
+from stats import StatsDelta
+import csv
+import io
+import json
+
+FORMATS = ('csv', 'ndjson')
+EXPORT_FIELDS = [
+    'id', 'company', 'position', 'status', 'date_applied', 'job_url', 'location',
+    'salary_range', 'notes', 'is_favorite', 'created_at', 'updated_at'
+]
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def _export_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_rows(query, fmt):
+    """Yield encoded chunks for every row of `query`
+
+    `query` must select the EXPORT_FIELDS columns in order.
+    """
+    rows = query.order_by(Application.id).yield_per(EXPORT_BATCH_SIZE)
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        count = 0
+        for row in rows:
+            writer.writerow(['' if v is None else _export_value(v) for v in row])
+            count += 1
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps({f: _export_value(v) for f, v in zip(EXPORT_FIELDS, row)}))
+            if len(chunk) == EXPORT_BATCH_SIZE:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+
+
+def export_query(base_query):
+    """Narrow a filtered Application query to the export columns"""
+    return base_query.with_entities(*(getattr(Application, f) for f in EXPORT_FIELDS))
+
+
+def _parse_csv(stream):
+    """Yield (line_number, record) from a CSV upload, empty cells as missing"""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        values = {k: v for k, v in record.items() if k and v not in (None, '')}
+        if 'is_favorite' in values:
+            values['is_favorite'] = values['is_favorite'].strip().lower() in ('1', 'true', 'yes')
+        yield reader.line_num, values
+
+
+def _parse_ndjson(stream):
+    """Yield (line_number, record) from an NDJSON upload, skipping blank lines"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def import_rows(user_id, binary_stream, fmt):
+    """Validate and insert an upload in batches within the current transaction
+
+    Invalid rows are skipped; the first MAX_REPORTED_ERRORS are reported.
+    Returns (imported, failed, errors); the caller commits.
+    """
+    stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    records = _parse_csv(stream) if fmt == 'csv' else _parse_ndjson(stream)
+
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    deltas = StatsDelta()
+    history = StatusHistory()
+
+    def flush():
+        nonlocal imported, batch
+        ids = Application.insert_many(user_id, batch)
+        for new_id, values in zip(ids, batch):
+            deltas.change(None, (values['status'], values.get('is_favorite', False)))
+            history.created(new_id, values['status'], values['date_applied'])
+        history.write(user_id)
+        imported += len(batch)
+        batch = []
+
+    for line_number, record in records:
+        try:
+            if record is None:
+                raise ValueError("Invalid JSON")
+            batch.append(Application.validate(record))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': line_number, 'error': str(e)})
+            continue
+        if len(batch) == IMPORT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    deltas.apply(user_id)
+    return imported, failed, errors
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import Dashboard from './components/Dashboard'
 import ApplicationList from './components/ApplicationList'
 import ApplicationForm from './components/ApplicationForm'
@@ -7,6 +7,38 @@ import AuthForm from './components/AuthForm'
 import ResetPassword from './components/ResetPassword'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000/api'
+// The event stream may be served by a separate uvicorn process (README: Live Updates)
+const EVENTS_BASE_URL = import.meta.env.VITE_EVENTS_BASE_URL || API_BASE_URL
+// Rows per page of the application list; the server caps pages at 200
+const PAGE_SIZE = 50
+const MAX_PAGE_SIZE = 200
+const DEFAULT_LIST_QUERY = { q: '', status: 'All', sort: 'date_applied', order: 'desc' }
+
+// Query parameters for /api/applications: filtering and sorting happen in SQL
+function listParams(query, limit, cursor) {
+  const params = new URLSearchParams({ sort: query.sort, order: query.order, limit: String(limit) })
+  if (query.status === 'Starred') {
+    params.set('is_favorite', 'true')
+  } else if (query.status !== 'All') {
+    params.set('status', query.status)
+  }
+  if (query.q.trim()) {
+    params.set('q', query.q.trim())
+  }
+  if (cursor) {
+    params.set('cursor', cursor)
+  }
+  return params
+}
+
+// Whether a row pushed by delta sync belongs in the list the server returned
+function matchesListQuery(app, query) {
+  const status = query.status === 'All' ||
+    (query.status === 'Starred' ? app.is_favorite : app.status === query.status)
+  const q = query.q.trim().toLowerCase()
+  const text = !q || [app.company, app.position, app.location].some(value => value && value.toLowerCase().includes(q))
+  return status && text
+}
 
 /**
  * Fetch wrapper with retry logic to handle Render cold starts.
@@ -33,7 +65,24 @@ function App() {
   const [token, setToken] = useState(localStorage.getItem('token'))
   const [resetToken, setResetToken] = useState(null)
   const [applications, setApplications] = useState([])
+  // Filters and sort order of the list, applied by the server
+  const [listQuery, setListQuery] = useState(DEFAULT_LIST_QUERY)
+  // Matching rows on the server and the cursor of the next page
+  const [listPage, setListPage] = useState({ total: 0, nextCursor: null })
+  // Mirrors for callbacks registered once, such as the event stream's
+  const listQueryRef = useRef(DEFAULT_LIST_QUERY)
+  const listPageRef = useRef(listPage)
+  const applicationsRef = useRef([])
+  // Only the newest list request may replace the list
+  const listRequest = useRef(0)
+  // Board columns from /api/board, loaded while the board view is shown
+  const [board, setBoard] = useState(null)
   const [stats, setStats] = useState(null)
+  const [analytics, setAnalytics] = useState(null)
+  // Sync token of the last application snapshot, for delta refreshes
+  const syncToken = useRef(null)
+  // True while the server-sent event stream is connected
+  const streamOpen = useRef(false)
   const [loading, setLoading] = useState(true)
   const [showForm, setShowForm] = useState(false)
   const [editingApp, setEditingApp] = useState(null)
@@ -81,14 +130,116 @@ function App() {
     }
   }, [])
 
-  // Fetch applications and stats when user is authenticated
   useEffect(() => {
+    applicationsRef.current = applications
+    listPageRef.current = listPage
+  }, [applications, listPage])
+
+  // Fetch the first page again whenever the filters or sort order change
+  useEffect(() => {
+    listQueryRef.current = listQuery
     if (user && token) {
       fetchApplications()
+    }
+  }, [user, token, listQuery])
+
+  // Fetch stats when user is authenticated
+  useEffect(() => {
+    if (user && token) {
       fetchStats()
+      // Precomputed in the background, so one fetch per session is enough
+      fetchAnalytics()
+    }
+  }, [user, token])
+
+  // Reload the board whenever the applications change while it is shown
+  useEffect(() => {
+    if (user && token && viewMode === 'kanban') {
+      fetchBoard()
+    }
+  }, [user, token, viewMode, applications])
+
+  // Subscribe to change events so other tabs and devices stay current
+  // without polling. The stream is only served through asgi.py; without it
+  // the app falls back to refreshing after its own writes. EventSource
+  // cannot send headers, so each connection uses a short-lived ticket
+  // rather than the access token.
+  useEffect(() => {
+    if (!user || !token || typeof EventSource === 'undefined') {
+      return
+    }
+    let source = null
+    let reopenTimer = null
+    let closed = false
+    let connectedBefore = false
+
+    const open = async () => {
+      let ticket
+      try {
+        const response = await fetchWithRetry(`${API_BASE_URL}/events/ticket`, {
+          method: 'POST',
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        })
+        const data = await response.json()
+        if (!data.success) {
+          return
+        }
+        ticket = data.ticket
+      } catch (error) {
+        console.error('Error opening event stream:', error)
+        return
+      }
+      if (closed) {
+        return
+      }
+      source = new EventSource(`${EVENTS_BASE_URL}/events?ticket=${encodeURIComponent(ticket)}`)
+      source.onopen = () => {
+        streamOpen.current = true
+        // Catch up on anything missed while disconnected
+        if (connectedBefore) {
+          syncApplications()
+          fetchStats()
+        }
+        connectedBefore = true
+      }
+      source.onerror = () => {
+        streamOpen.current = false
+        // The browser retries on its own with the same URL; once the ticket
+        // has expired that is refused and it gives up, so start over with a
+        // fresh ticket
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          reopenTimer = setTimeout(open, 5000)
+        }
+      }
+      source.addEventListener('applications', () => syncApplications())
+      source.addEventListener('stats', () => fetchStats())
+      source.addEventListener('resync', () => {
+        syncApplications()
+        fetchStats()
+      })
+    }
+
+    open()
+    return () => {
+      closed = true
+      clearTimeout(reopenTimer)
+      if (source) {
+        source.close()
+      }
+      streamOpen.current = false
     }
   }, [user, token])
 
+  // After a write: the stream delivers the change when it is connected
+  const refreshAfterWrite = () => {
+    if (!streamOpen.current) {
+      syncApplications()
+      fetchStats()
+    }
+  }
+
   const verifyToken = async () => {
     try {
       const response = await fetchWithRetry(`${API_BASE_URL}/auth/me`, {
@@ -154,7 +305,11 @@ function App() {
     setToken(null)
     setUser(null)
     setApplications([])
+    setListQuery(DEFAULT_LIST_QUERY)
+    setListPage({ total: 0, nextCursor: null })
     setStats(null)
+    setAnalytics(null)
+    syncToken.current = null
     localStorage.removeItem('token')
   }
 
@@ -166,16 +321,25 @@ function App() {
     setViewMode(viewMode === 'table' ? 'kanban' : 'table')
   }
 
-  const fetchApplications = async () => {
+  // Load the first page of the list; with keepLoaded, as many rows as are
+  // already shown so a refresh does not shrink the list
+  const fetchApplications = async ({ keepLoaded = false } = {}) => {
+    const request = ++listRequest.current
+    const limit = keepLoaded
+      ? Math.min(MAX_PAGE_SIZE, Math.max(PAGE_SIZE, applicationsRef.current.length))
+      : PAGE_SIZE
     try {
-      const response = await fetchWithRetry(`${API_BASE_URL}/applications`, {
+      const params = listParams(listQueryRef.current, limit)
+      const response = await fetchWithRetry(`${API_BASE_URL}/applications?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
       })
       const data = await response.json()
-      if (data.success) {
+      if (data.success && request === listRequest.current) {
         setApplications(data.applications)
+        setListPage({ total: data.total, nextCursor: data.next_cursor })
+        syncToken.current = data.sync_token
       }
     } catch (error) {
       console.error('Error fetching applications:', error)
@@ -184,6 +348,118 @@ function App() {
     }
   }
 
+  // Append the next page of the list
+  const loadMoreApplications = async () => {
+    if (!listPage.nextCursor) return
+    const request = listRequest.current
+    try {
+      const params = listParams(listQueryRef.current, PAGE_SIZE, listPage.nextCursor)
+      const response = await fetchWithRetry(`${API_BASE_URL}/applications?${params}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+      const data = await response.json()
+      if (data.success && request === listRequest.current) {
+        setApplications(prev => {
+          const loaded = new Set(prev.map(app => app.id))
+          return [...prev, ...data.applications.filter(app => !loaded.has(app.id))]
+        })
+        setListPage({ total: data.total, nextCursor: data.next_cursor })
+      }
+    } catch (error) {
+      console.error('Error loading applications:', error)
+    }
+  }
+
+  const fetchBoard = async () => {
+    try {
+      const response = await fetchWithRetry(`${API_BASE_URL}/board?limit=50`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+      const data = await response.json()
+      if (data.success) {
+        setBoard(data.columns)
+      }
+    } catch (error) {
+      console.error('Error fetching board:', error)
+    }
+  }
+
+  // Append the next page of one board column
+  const loadMoreCards = async (status) => {
+    const column = board && board.find(col => col.status === status)
+    if (!column || !column.next_cursor) return
+    try {
+      const params = new URLSearchParams({ status, cursor: column.next_cursor, limit: '50' })
+      const response = await fetchWithRetry(`${API_BASE_URL}/board?${params}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+      const data = await response.json()
+      if (data.success) {
+        const page = data.columns[0]
+        setBoard(prev => prev.map(col => col.status === status
+          ? { ...col, applications: [...col.applications, ...page.applications], next_cursor: page.next_cursor }
+          : col))
+      }
+    } catch (error) {
+      console.error('Error loading cards:', error)
+    }
+  }
+
+  // Apply only what changed since the last snapshot instead of refetching
+  // the list. Falls back to a fetch when the server asks for it, when a
+  // change moves a row into the list or along the sort order, which only the
+  // server can place, or when it touches rows on pages not loaded yet
+  const syncApplications = async () => {
+    if (!syncToken.current) {
+      return fetchApplications()
+    }
+    try {
+      const since = encodeURIComponent(syncToken.current)
+      const response = await fetchWithRetry(`${API_BASE_URL}/applications/changes?since=${since}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+      const data = await response.json()
+      if (!data.success || data.reset) {
+        return fetchApplications()
+      }
+      syncToken.current = data.sync_token
+      if (data.changed.length === 0 && data.deleted.length === 0) {
+        return
+      }
+      const query = listQueryRef.current
+      const shown = new Map(applicationsRef.current.map(app => [app.id, app]))
+      const sortValue = app => app[query.sort] || ''
+      const moved = data.changed.some(app => matchesListQuery(app, query) &&
+        (!shown.has(app.id) || sortValue(app) !== sortValue(shown.get(app.id))))
+      const unloaded = listPageRef.current.nextCursor &&
+        [...data.changed.map(app => app.id), ...data.deleted].some(id => !shown.has(id))
+      if (moved || unloaded) {
+        return fetchApplications({ keepLoaded: true })
+      }
+      const deleted = new Set(data.deleted)
+      const changed = new Map(data.changed.map(app => [app.id, app]))
+      const merged = applicationsRef.current
+        .filter(app => !deleted.has(app.id))
+        .map(app => changed.get(app.id) || app)
+        .filter(app => !changed.has(app.id) || matchesListQuery(app, query))
+      const removed = applicationsRef.current.length - merged.length
+      setApplications(merged)
+      if (removed) {
+        setListPage(prev => ({ ...prev, total: prev.total - removed }))
+      }
+    } catch (error) {
+      console.error('Error syncing applications:', error)
+    }
+  }
+
   const fetchStats = async () => {
     try {
       const response = await fetchWithRetry(`${API_BASE_URL}/stats`, {
@@ -200,6 +476,22 @@ function App() {
     }
   }
 
+  const fetchAnalytics = async () => {
+    try {
+      const response = await fetchWithRetry(`${API_BASE_URL}/analytics`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      })
+      const data = await response.json()
+      if (data.success) {
+        setAnalytics(data.analytics)
+      }
+    } catch (error) {
+      console.error('Error fetching analytics:', error)
+    }
+  }
+
   const handleAddNew = () => {
     setEditingApp(null)
     setShowForm(true)
@@ -225,8 +517,7 @@ function App() {
       const data = await response.json()
 
       if (data.success) {
-        fetchApplications()
-        fetchStats()
+        refreshAfterWrite()
       }
     } catch (error) {
       console.error('Error deleting application:', error)
@@ -244,9 +535,14 @@ function App() {
       const data = await response.json()
 
       if (data.success) {
-        setApplications(prev =>
-          prev.map(app => app.id === id ? { ...app, is_favorite: data.application.is_favorite } : app)
+        const query = listQueryRef.current
+        setApplications(prev => prev
+          .map(app => app.id === id ? { ...app, is_favorite: data.application.is_favorite } : app)
+          .filter(app => app.id !== id || matchesListQuery(app, query))
         )
+        if (query.status === 'Starred' && !data.application.is_favorite) {
+          setListPage(prev => ({ ...prev, total: prev.total - 1 }))
+        }
       }
     } catch (error) {
       console.error('Error toggling favorite:', error)
@@ -275,8 +571,7 @@ function App() {
       if (data.success) {
         setShowForm(false)
         setEditingApp(null)
-        fetchApplications()
-        fetchStats()
+        refreshAfterWrite()
       } else {
         console.error('Error saving application:', data.error)
       }
@@ -290,30 +585,45 @@ function App() {
     setEditingApp(null)
   }
 
-  const handleStatusUpdate = async (id, newStatus) => {
-    try {
-      const application = applications.find(app => app.id === id)
-      if (!application) return
+  // Move a card to a column, below afterId (null: on top). The board is
+  // updated at once and reloaded from the server if the move is rejected.
+  const handleCardMove = async (id, status, afterId) => {
+    setBoard(prev => {
+      const card = prev.flatMap(col => col.applications).find(app => app.id === id)
+      if (!card) return prev
+      return prev.map(col => {
+        const cards = col.applications.filter(app => app.id !== id)
+        let count = col.count - (cards.length < col.applications.length ? 1 : 0)
+        if (col.status === status) {
+          const index = afterId === null ? 0 : cards.findIndex(app => app.id === afterId) + 1
+          cards.splice(index, 0, { ...card, status })
+          count += 1
+        }
+        return { ...col, applications: cards, count }
+      })
+    })
 
-      const response = await fetchWithRetry(`${API_BASE_URL}/applications/${id}`, {
-        method: 'PUT',
+    try {
+      const response = await fetchWithRetry(`${API_BASE_URL}/board/move`, {
+        method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${token}`
         },
-        body: JSON.stringify({ ...application, status: newStatus })
+        body: JSON.stringify({ id, status, after_id: afterId })
       })
 
       const data = await response.json()
 
       if (data.success) {
-        fetchApplications()
-        fetchStats()
+        refreshAfterWrite()
       } else {
-        console.error('Error updating application status:', data.error)
+        console.error('Error moving application:', data.error)
+        fetchBoard()
       }
     } catch (error) {
-      console.error('Error updating application status:', error)
+      console.error('Error moving application:', error)
+      fetchBoard()
     }
   }
 
@@ -415,22 +725,27 @@ function App() {
         ) : (
           <>
             {/* Dashboard Stats */}
-            <Dashboard stats={stats} />
+            <Dashboard stats={stats} analytics={analytics} />
 
             {/* Applications List or Kanban Board */}
             {viewMode === 'table' ? (
               <ApplicationList
                 applications={applications}
+                total={listPage.total}
+                query={listQuery}
+                onQueryChange={setListQuery}
+                onLoadMore={listPage.nextCursor ? loadMoreApplications : null}
                 onEdit={handleEdit}
                 onDelete={handleDelete}
                 onFavoriteToggle={handleFavoriteToggle}
               />
             ) : (
               <KanbanBoard
-                applications={applications}
+                columns={board || []}
                 onEdit={handleEdit}
                 onDelete={handleDelete}
-                onStatusUpdate={handleStatusUpdate}
+                onMove={handleCardMove}
+                onLoadMore={loadMoreCards}
                 onFavoriteToggle={handleFavoriteToggle}
               />
             )}
@@ -1,10 +1,20 @@
-import { useState } from 'react'
+import { useState, useEffect } from 'react'
 
-const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) => {
-  const [searchTerm, setSearchTerm] = useState('')
-  const [statusFilter, setStatusFilter] = useState('All')
-  const [sortField, setSortField] = useState('date_applied')
-  const [sortDirection, setSortDirection] = useState('desc')
+// Wait this long after the last keystroke before searching on the server
+const SEARCH_DELAY_MS = 300
+
+const ApplicationList = ({ applications, total, query, onQueryChange, onLoadMore, onEdit, onDelete, onFavoriteToggle }) => {
+  // The search box updates at once; the server query follows after a pause
+  const [searchTerm, setSearchTerm] = useState(query.q)
+  const statusFilter = query.status
+  const sortField = query.sort
+  const sortDirection = query.order
+
+  useEffect(() => {
+    if (searchTerm === query.q) return
+    const timer = setTimeout(() => onQueryChange({ ...query, q: searchTerm }), SEARCH_DELAY_MS)
+    return () => clearTimeout(timer)
+  }, [searchTerm, query])
 
   // Status badge styling
   const getStatusBadge = (status) => {
@@ -34,46 +44,15 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
   // Handle sorting
   const handleSort = (field) => {
     if (sortField === field) {
-      setSortDirection(sortDirection === 'asc' ? 'desc' : 'asc')
+      onQueryChange({ ...query, order: sortDirection === 'asc' ? 'desc' : 'asc' })
     } else {
-      setSortField(field)
-      setSortDirection('asc')
+      onQueryChange({ ...query, sort: field, order: 'asc' })
     }
   }
 
-  // Filter and sort applications
-  const filteredApplications = applications
-    .filter(app => {
-      const matchesSearch =
-        app.company.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        app.position.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        (app.location && app.location.toLowerCase().includes(searchTerm.toLowerCase()))
-
-      const matchesStatus =
-        statusFilter === 'All' ||
-        (statusFilter === 'Starred' ? app.is_favorite : app.status === statusFilter)
-
-      return matchesSearch && matchesStatus
-    })
-    .sort((a, b) => {
-      let aVal = a[sortField]
-      let bVal = b[sortField]
-
-      // Handle null/undefined values
-      if (!aVal) aVal = ''
-      if (!bVal) bVal = ''
-
-      // Convert to lowercase for string comparison
-      if (typeof aVal === 'string') aVal = aVal.toLowerCase()
-      if (typeof bVal === 'string') bVal = bVal.toLowerCase()
+  const filtered = query.q !== '' || statusFilter !== 'All'
 
-      // Compare
-      if (aVal < bVal) return sortDirection === 'asc' ? -1 : 1
-      if (aVal > bVal) return sortDirection === 'asc' ? 1 : -1
-      return 0
-    })
-
-  if (!applications || applications.length === 0) {
+  if (!filtered && total === 0 && applications.length === 0) {
     return (
       <div className="bg-white dark:bg-gray-800 rounded-lg shadow-sm border border-gray-200 dark:border-gray-700 p-12">
         <div className="text-center">
@@ -104,9 +83,9 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
           <h2 className="text-xl font-bold text-gray-800 dark:text-gray-100 flex items-center">
             <span className="w-1 h-6 bg-gradient-to-b from-green-600 to-emerald-600 dark:from-green-400 dark:to-emerald-400 rounded-full mr-3"></span>
             Applications
-            <span className="ml-2 px-3 py-1 bg-green-600 dark:bg-green-700 text-white text-sm font-bold rounded-full">{filteredApplications.length}</span>
-            {filteredApplications.length !== applications.length && (
-              <span className="ml-2 text-sm text-gray-500 dark:text-gray-400">of {applications.length}</span>
+            <span className="ml-2 px-3 py-1 bg-green-600 dark:bg-green-700 text-white text-sm font-bold rounded-full">{total}</span>
+            {applications.length < total && (
+              <span className="ml-2 text-sm text-gray-500 dark:text-gray-400">showing {applications.length}</span>
             )}
           </h2>
         </div>
@@ -141,7 +120,7 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
           <div className="md:w-48">
             <select
               value={statusFilter}
-              onChange={(e) => setStatusFilter(e.target.value)}
+              onChange={(e) => onQueryChange({ ...query, status: e.target.value })}
               className="w-full px-4 py-2 border border-gray-300 dark:border-gray-600 rounded-lg focus:outline-none focus:ring-2 focus:ring-green-500 dark:focus:ring-green-400 focus:border-transparent bg-white dark:bg-gray-700 text-gray-900 dark:text-gray-100"
             >
               <option value="All">All Statuses</option>
@@ -156,18 +135,18 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
         </div>
       </div>
 
-      {filteredApplications.length === 0 ? (
+      {applications.length === 0 ? (
         <div className="p-12 text-center">
           <svg className="mx-auto h-12 w-12 text-gray-400 dark:text-gray-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
             <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M21 21l-6-6m2-5a7 7 0 11-14 0 7 7 0 0114 0z" />
           </svg>
           <h3 className="mt-2 text-lg font-medium text-gray-900 dark:text-gray-100">No applications found</h3>
           <p className="mt-1 text-sm text-gray-500 dark:text-gray-400">Try adjusting your search or filter criteria.</p>
-          {(searchTerm || statusFilter !== 'All') && (
+          {filtered && (
             <button
               onClick={() => {
                 setSearchTerm('')
-                setStatusFilter('All')
+                onQueryChange({ ...query, q: '', status: 'All' })
               }}
               className="mt-4 text-green-600 dark:text-green-400 hover:text-green-800 dark:hover:text-green-300 font-semibold"
             >
@@ -276,7 +255,7 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
             </tr>
           </thead>
           <tbody className="bg-white dark:bg-gray-800 divide-y divide-gray-200 dark:divide-gray-700">
-            {filteredApplications.map((app) => (
+            {applications.map((app) => (
               <tr key={app.id} className={`hover:bg-gray-50 dark:hover:bg-gray-700 transition-colors ${app.is_favorite ? 'border-l-4 border-l-yellow-400' : 'border-l-4 border-l-transparent'}`}>
                 <td className="px-3 py-4 text-center">
                   <button
@@ -351,6 +330,16 @@ const ApplicationList = ({ applications, onEdit, onDelete, onFavoriteToggle }) =
             ))}
           </tbody>
         </table>
+        {onLoadMore && (
+          <div className="px-6 py-4 text-center border-t border-gray-200 dark:border-gray-700">
+            <button
+              onClick={onLoadMore}
+              className="text-green-600 dark:text-green-400 hover:text-green-800 dark:hover:text-green-300 font-semibold hover:underline transition-colors"
+            >
+              Load more ({applications.length} of {total})
+            </button>
+          </div>
+        )}
       </div>
       )}
     </div>
@@ -12,7 +12,7 @@ const CustomTooltip = ({ active, payload }) => {
   return null
 }
 
-const Dashboard = ({ stats }) => {
+const Dashboard = ({ stats, analytics }) => {
   if (!stats) {
     return null
   }
@@ -156,6 +156,80 @@ const Dashboard = ({ stats }) => {
           </div>
         )}
       </div>
+
+      {/* Insights, precomputed by the analytics job */}
+      {analytics && (
+        <div className="mt-8 bg-white dark:bg-gray-800 rounded-xl shadow-lg border border-gray-100 dark:border-gray-700 p-6 hover:shadow-xl transition-all duration-300">
+          <h3 className="text-xl font-bold text-gray-800 dark:text-gray-100 mb-4 flex items-center">
+            <span className="w-1 h-6 bg-gradient-to-b from-teal-600 to-cyan-600 rounded-full mr-3"></span>
+            Insights
+          </h3>
+
+          <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
+            {/* Weekly volume */}
+            {analytics.weekly.length > 0 && (
+              <div>
+                <p className="text-sm font-medium text-gray-500 dark:text-gray-400 uppercase tracking-wide mb-2">Applications per Week</p>
+                <div className="h-64">
+                  <ResponsiveContainer width="100%" height="100%">
+                    <BarChart data={analytics.weekly}>
+                      <CartesianGrid strokeDasharray="3 3" />
+                      <XAxis dataKey="week" />
+                      <YAxis allowDecimals={false} />
+                      <Tooltip />
+                      <Legend />
+                      <Bar dataKey="applications" name="Applications" fill="#10b981" />
+                      <Bar dataKey="responses" name="Responses" fill="#14b8a6" />
+                    </BarChart>
+                  </ResponsiveContainer>
+                </div>
+              </div>
+            )}
+
+            {/* Salary distribution */}
+            {analytics.salary.bands.length > 0 && (
+              <div>
+                <p className="text-sm font-medium text-gray-500 dark:text-gray-400 uppercase tracking-wide mb-2">
+                  Salary Ranges
+                  {analytics.salary.median !== null && (
+                    <span className="normal-case tracking-normal ml-2">(median {Math.round(analytics.salary.median / 1000)}k)</span>
+                  )}
+                </p>
+                <div className="h-64">
+                  <ResponsiveContainer width="100%" height="100%">
+                    <BarChart data={analytics.salary.bands}>
+                      <CartesianGrid strokeDasharray="3 3" />
+                      <XAxis dataKey="band" />
+                      <YAxis allowDecimals={false} />
+                      <Tooltip />
+                      <Bar dataKey="applications" name="Applications" fill="#f59e0b" />
+                    </BarChart>
+                  </ResponsiveContainer>
+                </div>
+              </div>
+            )}
+
+            {/* Response rate by location and company */}
+            {[['Response Rate by Location', analytics.by_location], ['Response Rate by Company', analytics.by_company]].map(([title, rows]) => (
+              rows.length > 0 && (
+                <div key={title}>
+                  <p className="text-sm font-medium text-gray-500 dark:text-gray-400 uppercase tracking-wide mb-2">{title}</p>
+                  <ul className="space-y-2">
+                    {rows.map((row) => (
+                      <li key={row.name} className="flex items-center justify-between text-sm text-gray-700 dark:text-gray-300">
+                        <span className="truncate mr-4">{row.name}</span>
+                        <span className="whitespace-nowrap text-gray-500 dark:text-gray-400">
+                          {row.response_rate}% of {row.applications}
+                        </span>
+                      </li>
+                    ))}
+                  </ul>
+                </div>
+              )
+            ))}
+          </div>
+        </div>
+      )}
     </div>
   )
 }
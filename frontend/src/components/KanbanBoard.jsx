@@ -4,16 +4,12 @@ import { SortableContext, verticalListSortingStrategy } from '@dnd-kit/sortable'
 import KanbanColumn from './KanbanColumn'
 import KanbanCard from './KanbanCard'
 
-const KanbanBoard = ({ applications, onEdit, onDelete, onStatusUpdate, onFavoriteToggle }) => {
+const KanbanBoard = ({ columns, onEdit, onDelete, onMove, onLoadMore, onFavoriteToggle }) => {
   const [activeId, setActiveId] = useState(null)
 
-  const statuses = ['Applied', 'Phone Screen', 'Interview', 'Offer', 'Rejected']
-
-  // Group applications by status
-  const columns = statuses.reduce((acc, status) => {
-    acc[status] = applications.filter(app => app.status === status)
-    return acc
-  }, {})
+  const applications = columns.flatMap(column => column.applications)
+  const columnOf = (id) => columns.find(column => column.status === id)
+    || columns.find(column => column.applications.some(app => app.id === id))
 
   const sensors = useSensors(
     useSensor(PointerSensor, {
@@ -27,23 +23,33 @@ const KanbanBoard = ({ applications, onEdit, onDelete, onStatusUpdate, onFavorit
     setActiveId(event.active.id)
   }
 
+  // Work out the card the dragged one lands below (null: top of the column)
   const handleDragEnd = (event) => {
     const { active, over } = event
-
-    if (!over) {
-      setActiveId(null)
+    setActiveId(null)
+    if (!over || active.id === over.id) {
       return
     }
 
-    const activeApp = applications.find(app => app.id === active.id)
-    const overStatus = over.id
-
-    // If dropped on a column (status), update the application status
-    if (statuses.includes(overStatus) && activeApp && activeApp.status !== overStatus) {
-      onStatusUpdate(activeApp.id, overStatus)
+    const source = columnOf(active.id)
+    const target = columnOf(over.id)
+    if (!source || !target) {
+      return
     }
-
-    setActiveId(null)
+    const cards = target.applications.filter(app => app.id !== active.id)
+    let afterId
+    if (over.id === target.status) {
+      // Dropped on the column itself: append below its last card
+      afterId = cards.length ? cards[cards.length - 1].id : null
+    } else {
+      const overIndex = cards.findIndex(app => app.id === over.id)
+      // Moving down within a column lands below the hovered card, otherwise above it
+      const movingDown = source === target
+        && target.applications.findIndex(app => app.id === active.id) < target.applications.findIndex(app => app.id === over.id)
+      const index = movingDown ? overIndex + 1 : overIndex
+      afterId = index > 0 ? cards[index - 1].id : null
+    }
+    onMove(active.id, target.status, afterId)
   }
 
   const handleDragCancel = () => {
@@ -68,16 +74,19 @@ const KanbanBoard = ({ applications, onEdit, onDelete, onStatusUpdate, onFavorit
       onDragCancel={handleDragCancel}
     >
       <div className="flex gap-4 overflow-x-auto pb-4 animate-fade-in">
-        {statuses.map((status) => (
+        {columns.map((column) => (
           <SortableContext
-            key={status}
-            id={status}
-            items={columns[status].map(app => app.id)}
+            key={column.status}
+            id={column.status}
+            items={column.applications.map(app => app.id)}
             strategy={verticalListSortingStrategy}
           >
             <KanbanColumn
-              status={status}
-              applications={columns[status]}
+              status={column.status}
+              count={column.count}
+              applications={column.applications}
+              hasMore={Boolean(column.next_cursor)}
+              onLoadMore={onLoadMore}
               onEdit={onEdit}
               onDelete={onDelete}
               onFavoriteToggle={onFavoriteToggle}
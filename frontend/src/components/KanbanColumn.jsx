@@ -1,7 +1,7 @@
 import { useDroppable } from '@dnd-kit/core'
 import KanbanCard from './KanbanCard'
 
-const KanbanColumn = ({ status, applications, onEdit, onDelete, onFavoriteToggle, formatDate }) => {
+const KanbanColumn = ({ status, count, applications, hasMore, onLoadMore, onEdit, onDelete, onFavoriteToggle, formatDate }) => {
   const { setNodeRef, isOver } = useDroppable({
     id: status,
   })
@@ -31,7 +31,7 @@ const KanbanColumn = ({ status, applications, onEdit, onDelete, onFavoriteToggle
         <div className="flex items-center justify-between">
           <h3 className="font-bold text-white text-sm">{status}</h3>
           <span className="bg-white bg-opacity-30 text-white text-xs font-bold px-2 py-1 rounded-full">
-            {applications.length}
+            {count}
           </span>
         </div>
       </div>
@@ -60,6 +60,14 @@ const KanbanColumn = ({ status, applications, onEdit, onDelete, onFavoriteToggle
             />
           ))
         )}
+        {hasMore && (
+          <button
+            onClick={() => onLoadMore(status)}
+            className="w-full py-2 text-xs font-medium text-gray-600 dark:text-gray-300 hover:text-green-600 dark:hover:text-green-400"
+          >
+            Show more ({count - applications.length})
+          </button>
+        )}
       </div>
     </div>
   )